@@ -1,21 +1,14 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+"""
+Todo API package.
 
-from app.api.v1.router import api_router
-from app.core.config import settings
+`from app import app` returns the application instance built by app.main. It is resolved
+lazily so that importing a submodule (settings, models, CRUD) never constructs an app.
+"""
 
 
-def create_app() -> FastAPI:
-    app = FastAPI(title=settings.project_name)
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.parsed_cors_origins,
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-    app.include_router(api_router, prefix=settings.api_prefix)
-    return app
+def __getattr__(name: str):
+    if name == "app":
+        from app.main import app as application
 
-
-app = create_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
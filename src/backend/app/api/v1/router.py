@@ -1,8 +1,13 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from app.api.v1.routes import auth, health, tasks
+from app import deps
+from app.api.v1.routes import auth, events, health, metrics, tasks
+from app.core.config import settings
 
 api_router = APIRouter()
 api_router.include_router(health.router, prefix="/health", tags=["health"])
-api_router.include_router(auth.router)
-api_router.include_router(tasks.router)
+api_router.include_router(auth.router, dependencies=[Depends(deps.rate_limit_by_client("auth"))])
+api_router.include_router(events.router)
+api_router.include_router(tasks.router, dependencies=[Depends(deps.rate_limit_by_user("tasks"))])
+if settings.metrics_enabled:
+    api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
@@ -2,37 +2,67 @@ from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.security import create_access_token
-from app.crud.user import authenticate_user, create_user, get_user_by_email
-from app.db.session import get_db
+from app.core.security import (
+    PasswordHasherBusyError,
+    create_access_token,
+    get_password_hash_async,
+    password_needs_rehash,
+    verify_password_async,
+)
+from app.crud.user import create_user, get_user_by_email, update_password_hash
+from app.db.session import SessionRunner, get_session_runner
 from app.schemas.token import Token
 from app.schemas.user import UserCreate, UserRead
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register_user(user_in: UserCreate, db: Session = Depends(get_db)) -> UserRead:
-    existing = get_user_by_email(db, user_in.email)
+async def register_user(user_in: UserCreate, db: SessionRunner = Depends(get_session_runner)) -> UserRead:
+    existing = await db.run(get_user_by_email, user_in.email)
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-    user = create_user(db, user_in)
+    try:
+        hashed_password = await get_password_hash_async(user_in.password)
+    except PasswordHasherBusyError:
+        raise _hasher_busy()
+    user = await db.run(create_user, user_in, hashed_password)
     return user
 
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: SessionRunner = Depends(get_session_runner),
 ) -> Token:
-    user = authenticate_user(db, form_data.username, form_data.password)
-    if not user:
+    user = await db.run(get_user_by_email, form_data.username)
+    try:
+        verified = user is not None and await verify_password_async(form_data.password, user.hashed_password)
+    except PasswordHasherBusyError:
+        raise _hasher_busy()
+    if not verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
 
+    if password_needs_rehash(user.hashed_password):
+        # bcrypt cost changed since this hash was stored; upgrade it while we hold the plaintext
+        try:
+            new_hash = await get_password_hash_async(form_data.password)
+        except PasswordHasherBusyError:
+            new_hash = None  # Not worth failing the login over; retry on a later login
+        if new_hash is not None:
+            await db.run(update_password_hash, user, new_hash)
+
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(subject=str(user.id), expires_delta=access_token_expires)
 
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from app import deps
+from app.core.config import settings
+from app.core.events import get_broker, resync_json
+from app.db.session import SessionRunner, get_session_runner
+from app.models.user import User
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+
+def _ensure_enabled() -> None:
+    if not settings.events_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Change stream is disabled")
+
+
+@router.get("/events", response_class=StreamingResponse)
+async def task_events(
+    last_event_id: int | None = Header(None, description="Sent by EventSource on reconnect"),
+    since: int | None = Query(None, description="Resume after this event id, for clients that cannot set Last-Event-ID"),
+    current_user: User = Depends(deps.get_current_user),
+    db: SessionRunner = Depends(get_session_runner),
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of the caller's task changes (tasks.created, tasks.updated,
+    tasks.deleted). A `resync` event means events were missed: refetch the list, then
+    reconnect without a Last-Event-ID.
+    """
+    _ensure_enabled()
+    user_id = current_user.id
+    # The stream can stay open for hours; do not keep a pooled connection for it
+    await db.close()
+
+    subscription = get_broker().subscribe(user_id, since if since is not None else last_event_id)
+    return StreamingResponse(
+        subscription.sse(settings.events_heartbeat_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/events/ws")
+async def task_events_ws(
+    websocket: WebSocket,
+    token: str = Query(..., description="Access token; browsers cannot set headers on WebSocket requests"),
+    last_event_id: int | None = Query(None),
+    db: SessionRunner = Depends(get_session_runner),
+) -> None:
+    """The same stream as /events, as JSON text frames: {"id", "event", "data"}."""
+    try:
+        _ensure_enabled()
+        user = await deps.authenticate_token(db, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    user_id = user.id
+    await db.close()
+
+    await websocket.accept()
+    subscription = get_broker().subscribe(user_id, last_event_id)
+    try:
+        async for task_event in subscription.stream(settings.events_heartbeat_seconds):
+            await websocket.send_text(task_event.to_json() if task_event is not None else '{"event":"heartbeat"}')
+        await websocket.send_text(resync_json(subscription.resync_reason))
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        # Client went away mid-send
+        pass
+    finally:
+        subscription.close()
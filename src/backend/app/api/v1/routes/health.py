@@ -1,8 +1,56 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.db.engine import pool_status
+from app.db.session import get_async_db_sessionmaker, get_sessionmaker, open_session_runner
 
 router = APIRouter()
 
 
+def _pool_saturation(db: Session) -> dict[str, float]:
+    status_ = pool_status(db.get_bind())
+    if not status_:
+        return {}
+    capacity = status_["size"] + status_["max_overflow"]
+    return {**status_, "saturation": status_["checked_out"] / capacity if capacity else 0.0}
+
+
+def _ping(db: Session) -> None:
+    db.execute(text("SELECT 1"))
+
+
 @router.get("", summary="Health check")
-def get_health() -> dict[str, str]:
-    return {"status": "ok"}
+async def get_health(
+    response: Response,
+    ready: bool = Query(False, description="Also check the database and connection pool"),
+    session_factory: sessionmaker[Session] = Depends(get_sessionmaker),
+    async_session_factory: async_sessionmaker[AsyncSession] | None = Depends(get_async_db_sessionmaker),
+) -> dict:
+    # Liveness stays off the database: only the readiness check opens a session
+    if not ready:
+        return {"status": "ok"}
+
+    async with open_session_runner(session_factory, async_session_factory) as db:
+        # Read the pool before pinging: a saturated pool would make the ping wait for a connection
+        pool = await db.run(_pool_saturation)
+        saturated = pool.get("saturation", 0.0) >= settings.health_pool_saturation_threshold
+        database = "ok"
+        if not saturated:
+            try:
+                await db.run(_ping)
+            except SQLAlchemyError:
+                database = "unreachable"
+
+    is_ready = database == "ok" and not saturated
+    if not is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": "ok" if is_ready else "unavailable",
+        "ready": is_ready,
+        "database": database if not saturated else "saturated",
+        "pool": pool,
+    }
@@ -0,0 +1,77 @@
+from anyio import to_thread
+from fastapi import APIRouter, Response
+from sqlalchemy import Engine
+
+from app import deps
+from app.core.config import settings
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, metrics, render_gauges
+from app.db import group_commit
+from app.db.engine import pool_status, pool_wait_stats
+from app.db.session import engine, get_async_engine
+
+router = APIRouter()
+
+
+def _engines() -> dict[str, Engine]:
+    engines = {"sync": engine}
+    if settings.db_async:
+        engines["async"] = get_async_engine().sync_engine
+    return engines
+
+
+def _pool_lines() -> list[str]:
+    statuses = {name: pool_status(bound) for name, bound in _engines().items()}
+    lines: list[str] = []
+    for field, help_text in (
+        ("size", "Connections the pool keeps open."),
+        ("checked_out", "Connections currently checked out."),
+        ("overflow", "Connections open beyond the pool size."),
+        ("max_overflow", "Connections allowed beyond the pool size."),
+    ):
+        samples = [({"engine": name}, status[field]) for name, status in statuses.items() if status]
+        lines += render_gauges(f"db_pool_{field}", help_text, samples)
+
+    wait = pool_wait_stats.snapshot()
+    lines += [
+        "# HELP db_pool_checkouts_total Pool checkouts, with time spent waiting for a connection.",
+        "# TYPE db_pool_checkouts_total counter",
+        f"db_pool_checkouts_total {wait['checkouts']}",
+        "# TYPE db_pool_checkout_timeouts_total counter",
+        f"db_pool_checkout_timeouts_total {wait['timeouts']}",
+        "# TYPE db_pool_checkout_wait_seconds_total counter",
+        f"db_pool_checkout_wait_seconds_total {wait['total_wait_seconds']!r}",
+        "# TYPE db_pool_checkout_wait_seconds_max gauge",
+        f"db_pool_checkout_wait_seconds_max {wait['max_wait_seconds']!r}",
+    ]
+    return lines
+
+
+def _auth_cache_lines() -> list[str]:
+    stats = deps.token_cache.stats()
+    lines = [
+        "# HELP auth_cache_lookups_total Verified-token cache lookups, by result.",
+        "# TYPE auth_cache_lookups_total counter",
+        f'auth_cache_lookups_total{{result="hit"}} {stats["hits"]}',
+        f'auth_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+        "# HELP auth_cache_evictions_total Entries dropped to stay within AUTH_CACHE_MAX_ENTRIES.",
+        "# TYPE auth_cache_evictions_total counter",
+        f"auth_cache_evictions_total {stats['evictions']}",
+    ]
+    lines += render_gauges("auth_cache_entries", "Verified tokens currently cached.", [({}, stats["size"])])
+    return lines
+
+
+@router.get("", include_in_schema=False)
+async def get_metrics() -> Response:
+    # The limiter behind run_in_threadpool, i.e. the threads sync routes and CRUD calls run on
+    limiter = to_thread.current_default_thread_limiter()
+    lines = metrics.render()
+    lines += render_gauges("threadpool_threads_in_use", "Worker threads currently borrowed.", [({}, limiter.borrowed_tokens)])
+    lines += render_gauges("threadpool_threads_max", "Worker thread limit.", [({}, limiter.total_tokens)])
+    lines += _pool_lines()
+    if settings.auth_cache_enabled:
+        lines += _auth_cache_lines()
+    if settings.group_commit_enabled:
+        lines += group_commit.batch_size_histogram.render()
+        lines += group_commit.queue_delay_histogram.render()
+    return Response(content="\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
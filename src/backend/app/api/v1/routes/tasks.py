@@ -1,67 +1,276 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import hashlib
+import time
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app import deps
+from app.core.config import settings
+from app.core.serialization import NDJSON_MEDIA_TYPE, TaskStreamEncoder, encode_task_rows
 from app.crud import task as task_crud
-from app.db.session import get_db
+from app.db.group_commit import GroupCommitter, get_write_runner
+from app.db.session import (
+    SessionRunner,
+    aiter_partitions,
+    get_async_db_sessionmaker,
+    get_session_runner,
+    get_sessionmaker,
+    iter_partitions,
+)
+from app.models.task import Task
 from app.models.user import User
-from app.schemas.task import TaskCreate, TaskRead, TaskUpdate
+from app.schemas.task import (
+    TaskBatchCreate,
+    TaskBatchIds,
+    TaskBatchItemResult,
+    TaskBatchResult,
+    TaskBatchUpdate,
+    TaskChangesRead,
+    TaskCreate,
+    TaskRead,
+    TaskStatsRead,
+    TaskUpdate,
+)
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _list_etag(user_id: int, version: int, request: Request, media_type: str) -> str:
+    # Same version + same query string + same format => byte-identical body, so the tag can be strong
+    variant_key = f"{sorted(request.query_params.multi_items())}|{media_type}"
+    variant = hashlib.sha256(variant_key.encode("utf-8")).hexdigest()[:16]
+    return f'"{user_id}.{version}.{variant}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _stream_sync(session_factory: sessionmaker[Session], stmt: Select, encoder: TaskStreamEncoder) -> Iterator[bytes]:
+    yield encoder.start()
+    for rows in iter_partitions(session_factory, stmt, settings.tasks_stream_chunk_size):
+        yield encoder.chunk(rows)
+    yield encoder.end()
+
+
+async def _stream_async(
+    session_factory: async_sessionmaker[AsyncSession], stmt: Select, encoder: TaskStreamEncoder
+) -> AsyncIterator[bytes]:
+    yield encoder.start()
+    async for rows in aiter_partitions(session_factory, stmt, settings.tasks_stream_chunk_size):
+        yield encoder.chunk(rows)
+    yield encoder.end()
+
+
+def _batch_result(task_id: int, tasks: dict[int, Task], status_on_hit: str) -> TaskBatchItemResult:
+    task = tasks.get(task_id)
+    if task is None:
+        return TaskBatchItemResult(id=task_id, status="not_found")
+    return TaskBatchItemResult(id=task_id, status=status_on_hit, task=task)
+
+
 @router.get("", response_model=list[TaskRead])
-def list_tasks(
+async def list_tasks(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=settings.tasks_page_max_limit),
+    cursor: str | None = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor header"),
+    is_completed: bool | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    stream: bool = Query(False, description="Stream the JSON array from a server-side cursor"),
+    accept: str | None = Header(None),
+    if_none_match: str | None = Header(None),
     current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(get_db),
-) -> list[TaskRead]:
-    return task_crud.get_tasks_for_user(db, current_user.id)
+    db: SessionRunner = Depends(get_session_runner),
+    session_factory: sessionmaker[Session] = Depends(get_sessionmaker),
+    async_session_factory: async_sessionmaker[AsyncSession] | None = Depends(get_async_db_sessionmaker),
+) -> Response:
+    ndjson = NDJSON_MEDIA_TYPE in (accept or "")
+    media_type = NDJSON_MEDIA_TYPE if ndjson else "application/json"
+
+    # Read the version before the rows: a racing write can only make the tag stale, never the body
+    version = await db.run(task_crud.get_list_version, current_user.id)
+    etag = _list_etag(current_user.id, version, request, media_type)
+    headers = {"ETag": etag, "Vary": "Accept"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    filters = {"is_completed": is_completed, "created_after": created_after, "created_before": created_before}
+    if stream or ndjson:
+        try:
+            stmt = task_crud.select_task_rows(current_user.id, cursor=cursor, **filters)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        # Peak memory is one chunk of rows, however long the list is
+        encoder = TaskStreamEncoder(ndjson=ndjson)
+        if async_session_factory is not None:
+            body = _stream_async(async_session_factory, stmt, encoder)
+        else:
+            body = _stream_sync(session_factory, stmt, encoder)
+        return StreamingResponse(body, media_type=encoder.media_type, headers=headers)
+
+    try:
+        rows, next_cursor = await db.run(task_crud.get_tasks_page, current_user.id, limit=limit, cursor=cursor, **filters)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    # Rows already have TaskRead's shape; encode them directly instead of validating through response_model
+    return Response(content=encode_task_rows(rows), media_type="application/json", headers=headers)
+
+
+@router.get("/search", response_model=list[TaskRead])
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in title or description"),
+    limit: int = Query(20, ge=1, le=settings.tasks_search_max_limit),
+    prefix: bool = Query(True, description="Match words that start with each term"),
+    is_completed: bool | None = None,
+    current_user: User = Depends(deps.get_current_user),
+    db: SessionRunner = Depends(get_session_runner),
+) -> Response:
+    rows = await db.run(
+        task_crud.search_tasks, current_user.id, q, limit=limit, prefix=prefix, is_completed=is_completed
+    )
+    return Response(content=encode_task_rows(rows), media_type="application/json")
+
+
+@router.get("/stats", response_model=TaskStatsRead)
+async def task_stats(
+    current_user: User = Depends(deps.get_current_user),
+    db: SessionRunner = Depends(get_session_runner),
+) -> TaskStatsRead:
+    total, completed = await db.run(task_crud.get_task_stats, current_user.id)
+    return TaskStatsRead(total=total, completed=completed, pending=total - completed)
+
+
+@router.get("/changes", response_model=TaskChangesRead)
+async def task_changes(
+    since: str | None = Query(None, description="Cursor from a previous response; omit for a full sync"),
+    current_user: User = Depends(deps.get_current_user),
+    db: SessionRunner = Depends(get_session_runner),
+) -> Response:
+    since_version = None
+    if since is not None:
+        try:
+            since_version, issued_at = task_crud.decode_change_cursor(since)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        # Tombstones older than the retention window may be purged, so deletions could be missed
+        if issued_at < time.time() - settings.tasks_tombstone_retention_days * 86400:
+            raise HTTPException(status_code=status.HTTP_410_GONE, detail="Cursor expired; sync again without since")
+
+    rows, deleted, version = await db.run(task_crud.get_task_changes, current_user.id, since_version)
+    if since_version is not None and since_version > version:
+        # The cursor is ahead of the database (e.g. restored from a backup); the client must start over
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Cursor expired; sync again without since")
+
+    cursor = task_crud.encode_change_cursor(version, time.time())
+    deleted_ids = ",".join(str(task_id) for task_id in deleted).encode("ascii")
+    body = b'{"tasks":' + encode_task_rows(rows) + b',"deleted":[' + deleted_ids + b'],"cursor":"' + cursor.encode("ascii") + b'"}'
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
-def create_task(
+async def create_task(
     task_in: TaskCreate,
     current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(get_db),
+    writer: SessionRunner | GroupCommitter = Depends(get_write_runner),
 ) -> TaskRead:
-    return task_crud.create_task(db, current_user.id, task_in)
+    return await writer.run(task_crud.create_task, current_user.id, task_in)
+
+
+@router.post("/batch", response_model=TaskBatchResult, status_code=status.HTTP_201_CREATED)
+async def create_tasks_batch(
+    batch_in: TaskBatchCreate,
+    current_user: User = Depends(deps.get_current_user),
+    db: SessionRunner = Depends(get_session_runner),
+) -> TaskBatchResult:
+    tasks = await db.run(task_crud.create_tasks, current_user.id, batch_in.items)
+    return TaskBatchResult(
+        results=[TaskBatchItemResult(id=task.id, status="created", task=task) for task in tasks]
+    )
+
+
+@router.patch("/batch", response_model=TaskBatchResult)
+async def update_tasks_batch(
+    batch_in: TaskBatchUpdate,
+    current_user: User = Depends(deps.get_current_user),
+    db: SessionRunner = Depends(get_session_runner),
+) -> TaskBatchResult:
+    updated = await db.run(task_crud.update_tasks, current_user.id, batch_in.items)
+    return TaskBatchResult(results=[_batch_result(item.id, updated, "updated") for item in batch_in.items])
+
+
+@router.post("/batch/complete", response_model=TaskBatchResult)
+async def complete_tasks_batch(
+    batch_in: TaskBatchIds,
+    current_user: User = Depends(deps.get_current_user),
+    db: SessionRunner = Depends(get_session_runner),
+) -> TaskBatchResult:
+    completed = await db.run(task_crud.complete_tasks, current_user.id, batch_in.ids)
+    return TaskBatchResult(results=[_batch_result(task_id, completed, "updated") for task_id in batch_in.ids])
+
+
+@router.post("/batch/delete", response_model=TaskBatchResult)
+async def delete_tasks_batch(
+    batch_in: TaskBatchIds,
+    current_user: User = Depends(deps.get_current_user),
+    db: SessionRunner = Depends(get_session_runner),
+) -> TaskBatchResult:
+    deleted = await db.run(task_crud.delete_tasks, current_user.id, batch_in.ids)
+    return TaskBatchResult(
+        results=[
+            TaskBatchItemResult(id=task_id, status="deleted" if task_id in deleted else "not_found")
+            for task_id in batch_in.ids
+        ]
+    )
 
 
 @router.put("/{task_id}", response_model=TaskRead)
-def update_task(
+async def update_task(
     task_id: int,
     task_in: TaskUpdate,
     current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(get_db),
+    writer: SessionRunner | GroupCommitter = Depends(get_write_runner),
 ) -> TaskRead:
-    task = task_crud.get_task(db, task_id, current_user.id)
+    task = await writer.run(task_crud.update_task, task_id, current_user.id, task_in)
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    return task_crud.update_task(db, task, task_in)
+    return task
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+async def delete_task(
     task_id: int,
     current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(get_db),
+    writer: SessionRunner | GroupCommitter = Depends(get_write_runner),
 ) -> None:
-    task = task_crud.get_task(db, task_id, current_user.id)
-    if not task:
+    if not await writer.run(task_crud.delete_task, task_id, current_user.id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    task_crud.delete_task(db, task)
 
 
 @router.patch("/{task_id}/complete", response_model=TaskRead)
-def mark_complete(
+async def mark_complete(
     task_id: int,
     current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(get_db),
+    writer: SessionRunner | GroupCommitter = Depends(get_write_runner),
 ) -> TaskRead:
-    task = task_crud.get_task(db, task_id, current_user.id)
+    task = await writer.run(task_crud.complete_task, task_id, current_user.id)
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    task.is_completed = True
-    db.commit()
-    db.refresh(task)
     return task
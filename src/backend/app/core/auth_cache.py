@@ -0,0 +1,88 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class TokenCache:
+    """
+    Bounded, TTL-based LRU cache mapping a token hash to a verified principal.
+    Entries never outlive the token's own `exp`, and can be dropped per user
+    when that user changes. Safe to share between threadpool workers.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[Any, int, float]] = OrderedDict()
+        self._keys_by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Any | None:
+        key = self.key_for(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            principal, user_id, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key, user_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return principal
+
+    def set(self, token: str, user_id: int, principal: Any, token_exp: int | None) -> None:
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        key = self.key_for(token)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key, self._entries[key][1])
+            self._entries[key] = (principal, user_id, time.monotonic() + ttl)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                old_key, (_, old_user_id, _) = next(iter(self._entries.items()))
+                self._remove(old_key, old_user_id)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, set()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key: str, user_id: int) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
@@ -15,11 +15,102 @@ class Settings(BaseSettings):
     backend_cors_origins: str = "*"  # Allow all origins by default for production ease
 
     database_url: str = os.getenv("DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    # Serve requests through an AsyncSession (aiosqlite / psycopg async) instead of the threadpool
+    db_async: bool = False
+    # Defaults to database_url with its driver swapped for the asyncio one
+    async_database_url: str | None = None
+
+    # Connection pool (ignored for in-memory SQLite). With a recycle interval shorter than the
+    # server's idle timeout, pre-ping can be turned off to save a round trip per checkout.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = -1
+    db_pool_pre_ping: bool = True
+
+    # PRAGMAs applied to every SQLite connection
+    sqlite_profile_enabled: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64 * 1024  # negative = KiB
+
+    # Group commit: single-task writes arriving within max_delay_ms of each other (up to max_batch)
+    # share one transaction and one durable flush, trading a little latency for write throughput
+    group_commit_enabled: bool = False
+    group_commit_max_batch: int = 64
+    group_commit_max_delay_ms: float = 2.0
+
+    # Adds a Server-Timing header (DB time, query count, slowest statement) to every response
+    debug: bool = False
+    # Log a warning when a request runs more SQL statements than this, or the same statement
+    # shape this many times (N+1); 0 disables either check
+    sql_instrumentation_enabled: bool = True
+    sql_query_budget: int = 20
+    sql_repeated_statement_threshold: int = 5
+
+    # Task change stream (GET /tasks/events). "local" serves one worker; "redis" shares events
+    # between workers and needs the redis package and EVENTS_REDIS_URL
+    events_enabled: bool = True
+    events_backend: str = "local"
+    events_redis_url: str | None = None
+    events_heartbeat_seconds: float = 15.0
+    # Per-subscriber queue: a client this far behind is told to resync and disconnected
+    events_queue_size: int = 256
+    # Recent events kept per user for resuming from Last-Event-ID
+    events_replay_size: int = 200
+
+    # Per-route request metrics at {api_prefix}/metrics (Prometheus text format)
+    metrics_enabled: bool = True
+    # GET /health?ready=true answers 503 once this share of the connection pool is checked out
+    health_pool_saturation_threshold: float = 0.9
+
+    # Request budgets per route group, as "<count>/<second|minute|hour|day>" ("" = unlimited):
+    # auth routes per client IP, task routes per user. "redis" shares budgets between workers
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "local"
+    rate_limit_redis_url: str | None = None
+    rate_limit_auth: str = "20/minute"
+    rate_limit_tasks: str = "600/minute"
+    # Requests served at once per worker before the rest are shed with 503 (0 = no cap)
+    max_concurrent_requests: int = 100
+    # Proxies python -m app.server takes the client address from (X-Forwarded-For), comma
+    # separated, "*" = any. Per-IP auth budgets need the real address, not the proxy's
+    forwarded_allow_ips: str = "127.0.0.1,::1"
+
+    # python -m app.server: worker processes (0 = one per available CPU, within the container's
+    # CPU quota, once events and rate limits use Redis and the auth cache is off; else 1),
+    # requests after which a worker is replaced (0 = never), and how long a stopping worker
+    # may spend finishing in-flight requests
+    web_concurrency: int = 0
+    worker_max_requests: int = 0
+    worker_graceful_timeout_seconds: float = 30.0
 
     jwt_secret_key: str = "change-me"
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 1440  # 24 hours
 
+    # Password hashing: bcrypt cost, hashing processes (0 = threadpool), max queued hashes before 503
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 32
+
+    # In-process cache of verified tokens -> principals (per worker)
+    auth_cache_enabled: bool = True
+    auth_cache_max_entries: int = 10000
+    auth_cache_ttl_seconds: int = 60
+
+    tasks_page_max_limit: int = 500
+    tasks_batch_max_items: int = 1000
+    tasks_search_max_limit: int = 100
+    # GET /tasks/changes cursors older than this answer 410; purge_tombstones keeps deletions this long
+    tasks_tombstone_retention_days: int = 30
+    # Rows fetched per server-side cursor round trip when streaming task lists
+    tasks_stream_chunk_size: int = 500
+    # "auto" uses orjson when installed; "pydantic" forces the built-in encoder
+    json_backend: str = "auto"
+
     @property
     def parsed_cors_origins(self) -> List[str]:
         if isinstance(self.backend_cors_origins, str):
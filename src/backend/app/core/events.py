@@ -0,0 +1,334 @@
+"""
+Per-user task change events, fanned out to Server-Sent Events and WebSocket subscribers.
+
+Task mutations queue an event on their Session; it is published only once the transaction
+commits. Publishing goes through a backend that assigns event ids and delivers every
+message to each attached broker:
+
+- LocalEventBackend: in-process, one worker. Two brokers attached to one instance behave
+  like two workers sharing a backend, which is how the tests stand in for Redis.
+- RedisEventBackend: ids from INCR, delivery via PUBLISH, so all workers see all events.
+
+Each broker keeps a short replay buffer per user for resuming from a Last-Event-ID, and a
+bounded queue per subscriber. A subscriber that falls behind, or asks to resume from an
+event that is no longer buffered, is told to resync instead of silently missing events.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.serialization import encode_task_rows
+
+logger = logging.getLogger(__name__)
+
+TASKS_CREATED = "tasks.created"
+TASKS_UPDATED = "tasks.updated"
+TASKS_DELETED = "tasks.deleted"
+RESYNC = "resync"
+
+# Reconnect delay suggested to EventSource clients
+SSE_RETRY_MS = 3000
+
+_PENDING_KEY = "pending_task_events"
+
+
+@dataclass(frozen=True, slots=True)
+class TaskEvent:
+    id: int
+    user_id: int
+    type: str
+    data: bytes  # JSON object
+
+    def encode(self) -> bytes:
+        return b"%d %d %s " % (self.id, self.user_id, self.type.encode("ascii")) + self.data
+
+    @classmethod
+    def decode(cls, message: bytes) -> "TaskEvent":
+        event_id, user_id, event_type, data = message.split(b" ", 3)
+        return cls(int(event_id), int(user_id), event_type.decode("ascii"), data)
+
+    def to_sse(self) -> bytes:
+        return b"id: %d\nevent: %s\ndata: %s\n\n" % (self.id, self.type.encode("ascii"), self.data)
+
+    def to_json(self) -> str:
+        return f'{{"id":{self.id},"event":"{self.type}","data":{self.data.decode("utf-8")}}}'
+
+
+def resync_json(reason: str) -> str:
+    return f'{{"event":"{RESYNC}","data":{{"reason":"{reason}"}}}}'
+
+
+def resync_sse(reason: str) -> bytes:
+    return b'event: %s\ndata: {"reason":"%s"}\n\n' % (RESYNC.encode("ascii"), reason.encode("ascii"))
+
+
+class LocalEventBackend:
+    """Delivers events to the brokers attached in this process."""
+
+    def __init__(self):
+        # Seeded from the clock so ids keep increasing across restarts, keeping stale Last-Event-IDs detectable
+        self._last_id = time.time_ns() // 1000
+        self._ids = itertools.count(self._last_id + 1)
+        self._listeners: list[Callable[[bytes], None]] = []
+        self._lock = threading.Lock()
+
+    def attach(self, deliver: Callable[[bytes], None]) -> None:
+        self._listeners.append(deliver)
+
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, user_id: int, event_type: str, data: bytes) -> None:
+        # Held across delivery so every broker sees events in id order
+        with self._lock:
+            self._last_id = next(self._ids)
+            message = TaskEvent(self._last_id, user_id, event_type, data).encode()
+            for deliver in self._listeners:
+                deliver(message)
+
+    def close(self) -> None:
+        self._listeners.clear()
+
+
+class RedisEventBackend:
+    """
+    Shares events between workers through Redis pub/sub. Requires the optional `redis` package,
+    unless `client` (a connection or a stand-in with incr / get / publish) is passed.
+
+    Publishing runs after a commit, which in async mode happens on the event loop, so the
+    round trips are handed to one writer thread; being a single thread keeps events in order.
+    """
+
+    def __init__(self, url: str | None = None, channel: str = "todo:task-events", *, client: Any = None):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self._channel = channel
+        self._id_key = f"{channel}:last-id"
+        self._pubsub = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="redis-events")
+
+    def attach(self, deliver: Callable[[bytes], None]) -> None:
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self._channel: lambda message: deliver(message["data"])})
+        # Dispatches on a daemon thread; delivery into each subscriber's event loop is thread-safe
+        self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def last_id(self) -> int:
+        return int(self._client.get(self._id_key) or 0)
+
+    def publish(self, user_id: int, event_type: str, data: bytes) -> None:
+        self._writer.submit(self._publish, user_id, event_type, data).add_done_callback(_log_publish_error)
+
+    def _publish(self, user_id: int, event_type: str, data: bytes) -> None:
+        event_id = self._client.incr(self._id_key)
+        self._client.publish(self._channel, TaskEvent(event_id, user_id, event_type, data).encode())
+
+    def close(self) -> None:
+        # Let the queued events go out first
+        self._writer.shutdown(wait=True)
+        if self._pubsub is not None:
+            self._pubsub.close()
+        self._client.close()
+
+
+def _log_publish_error(future: Future) -> None:
+    if future.exception() is not None:
+        logger.error("Publishing a task event to Redis failed", exc_info=future.exception())
+
+
+class Subscription:
+    """One client's view of a user's events: replayed backlog, then a bounded live queue."""
+
+    def __init__(self, broker: "EventBroker", user_id: int, queue_size: int):
+        self.broker = broker
+        self.user_id = user_id
+        self.replay: list[TaskEvent] = []
+        # Set when the client must refetch: its resume point is gone, or it fell behind
+        self.resync_reason: str | None = None
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[TaskEvent] = asyncio.Queue(maxsize=queue_size)
+
+    def offer_threadsafe(self, task_event: TaskEvent) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._offer, task_event)
+        except RuntimeError:
+            # The subscriber's event loop is gone; it will be unsubscribed by its own cleanup
+            pass
+
+    def _offer(self, task_event: TaskEvent) -> None:
+        if self.resync_reason is not None:
+            return
+        try:
+            self._queue.put_nowait(task_event)
+        except asyncio.QueueFull:
+            # Backpressure: drop this slow client rather than buffer without bound
+            self.resync_reason = "lagged"
+
+    async def get(self, timeout: float) -> TaskEvent | None:
+        """The next live event, or None when `timeout` passes without one."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+    async def stream(self, heartbeat: float) -> AsyncIterator[TaskEvent | None]:
+        """
+        Yield the replayed backlog, then live events, with None after every `heartbeat`
+        seconds of silence. Ends once `resync_reason` is set.
+        """
+        if self.resync_reason is not None:
+            return
+        for task_event in self.replay:
+            yield task_event
+        while self.resync_reason is None:
+            yield await self.get(heartbeat)
+
+    async def sse(self, heartbeat: float) -> AsyncIterator[bytes]:
+        """Server-Sent Events framing of `stream`; comments as heartbeats, then a resync event if needed."""
+        try:
+            yield b"retry: %d\n\n" % SSE_RETRY_MS
+            async for task_event in self.stream(heartbeat):
+                yield task_event.to_sse() if task_event is not None else b": keep-alive\n\n"
+            yield resync_sse(self.resync_reason)
+        finally:
+            self.close()
+
+
+class EventBroker:
+    def __init__(self, backend: Any, *, replay_size: int = 200, queue_size: int = 256):
+        self.backend = backend
+        self.replay_size = replay_size
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._replay: dict[int, deque[TaskEvent]] = {}
+        # Highest event id per user that has fallen out of the replay buffer
+        self._evicted_up_to: dict[int, int] = {}
+        # Events up to this id happened before this broker was listening
+        self._floor = backend.last_id()
+        self._lock = threading.Lock()
+        backend.attach(self._deliver)
+
+    def publish(self, user_id: int, event_type: str, data: bytes) -> None:
+        self.backend.publish(user_id, event_type, data)
+
+    def _deliver(self, message: bytes) -> None:
+        task_event = TaskEvent.decode(message)
+        with self._lock:
+            buffer = self._replay.setdefault(task_event.user_id, deque())
+            if len(buffer) >= self.replay_size:
+                self._evicted_up_to[task_event.user_id] = buffer.popleft().id
+            buffer.append(task_event)
+            subscribers = list(self._subscribers.get(task_event.user_id, ()))
+        for subscription in subscribers:
+            subscription.offer_threadsafe(task_event)
+
+    def subscribe(self, user_id: int, last_event_id: int | None = None) -> Subscription:
+        """Register a subscriber; with `last_event_id`, queue up the buffered events after it."""
+        subscription = Subscription(self, user_id, self.queue_size)
+        with self._lock:
+            # Registering and snapshotting under the delivery lock: no event is both replayed and queued, or lost
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            if last_event_id is not None:
+                if last_event_id < max(self._floor, self._evicted_up_to.get(user_id, 0)):
+                    subscription.resync_reason = "expired"
+                else:
+                    subscription.replay = [e for e in self._replay.get(user_id, ()) if e.id > last_event_id]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+def create_backend():
+    if settings.events_backend == "redis":
+        if not settings.events_redis_url:
+            raise RuntimeError("EVENTS_BACKEND=redis requires EVENTS_REDIS_URL")
+        return RedisEventBackend(settings.events_redis_url)
+    return LocalEventBackend()
+
+
+@lru_cache
+def get_broker() -> EventBroker:
+    return EventBroker(
+        create_backend(),
+        replay_size=settings.events_replay_size,
+        queue_size=settings.events_queue_size,
+    )
+
+
+def _task_snapshot(task: Any) -> dict[str, Any]:
+    return {
+        "title": task.title,
+        "description": task.description,
+        "id": task.id,
+        "is_completed": task.is_completed,
+        "created_at": task.created_at,
+        "updated_at": task.updated_at,
+    }
+
+
+def queue_tasks_changed(db: Session, user_id: int, event_type: str, tasks: Iterable[Any]) -> None:
+    """Publish the tasks' new state once `db` commits; dropped if it rolls back."""
+    if not settings.events_enabled:
+        return
+    data = b'{"tasks":' + encode_task_rows([_task_snapshot(task) for task in tasks]) + b"}"
+    db.info.setdefault(_PENDING_KEY, []).append((user_id, event_type, data))
+
+
+def queue_tasks_deleted(db: Session, user_id: int, task_ids: Iterable[int]) -> None:
+    if not settings.events_enabled:
+        return
+    data = b'{"ids":[' + ",".join(str(task_id) for task_id in sorted(task_ids)).encode("ascii") + b"]}"
+    db.info.setdefault(_PENDING_KEY, []).append((user_id, TASKS_DELETED, data))
+
+
+def pending_mark(db: Session) -> int:
+    """Position in `db`'s queued events, for discarding what a rolled-back savepoint queued."""
+    return len(db.info.get(_PENDING_KEY, ()))
+
+
+def discard_pending_after(db: Session, mark: int) -> None:
+    pending = db.info.get(_PENDING_KEY)
+    if pending is not None:
+        del pending[mark:]
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        broker = get_broker()
+        for user_id, event_type, data in pending:
+            broker.publish(user_id, event_type, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
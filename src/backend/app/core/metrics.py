@@ -0,0 +1,195 @@
+"""
+In-process request metrics, rendered in the Prometheus text exposition format.
+
+Counters are per worker process; scrape every worker (or aggregate downstream).
+Routes are labelled by their template (`/api/tasks/{task_id}`), never the raw path,
+so label cardinality stays bounded.
+"""
+import bisect
+import threading
+import time
+from collections.abc import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: object) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Histogram:
+    __slots__ = ("bucket_counts", "count", "sum")
+
+    def __init__(self, size: int):
+        self.bucket_counts = [0] * size
+        self.count = 0
+        self.sum = 0.0
+
+
+class MetricsRegistry:
+    """Request counts, latency histograms and in-flight requests for one process."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.in_flight = 0
+        self._requests: dict[tuple[str, str, int], int] = {}
+        self._latency: dict[tuple[str, str], _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        key = (method, route)
+        with self._lock:
+            request_key = (method, route, status_code)
+            self._requests[request_key] = self._requests.get(request_key, 0) + 1
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = _Histogram(len(self.buckets))
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                histogram.bucket_counts[index] += 1
+            histogram.count += 1
+            histogram.sum += seconds
+
+    def request_count(self, method: str, route: str, status_code: int) -> int:
+        with self._lock:
+            return self._requests.get((method, route, status_code), 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._latency.clear()
+
+    def render(self) -> list[str]:
+        lines = [
+            "# HELP http_requests_total HTTP requests by method, route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        with self._lock:
+            for (method, route, status_code), count in sorted(self._requests.items()):
+                lines.append(f"http_requests_total{_labels(method=method, route=route, status=status_code)} {count}")
+
+            lines += [
+                "# HELP http_request_duration_seconds Time from request start to the last body chunk sent.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), histogram in sorted(self._latency.items()):
+                cumulative = 0
+                for upper, bucket_count in zip(self.buckets, histogram.bucket_counts):
+                    cumulative += bucket_count
+                    labels = _labels(method=method, route=route, le=_number(upper))
+                    lines.append(f"http_request_duration_seconds_bucket{labels} {cumulative}")
+                labels = _labels(method=method, route=route, le="+Inf")
+                lines.append(f"http_request_duration_seconds_bucket{labels} {histogram.count}")
+                labels = _labels(method=method, route=route)
+                lines.append(f"http_request_duration_seconds_sum{labels} {_number(histogram.sum)}")
+                lines.append(f"http_request_duration_seconds_count{labels} {histogram.count}")
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        return lines
+
+
+class Histogram:
+    """A label-less histogram for values observed outside the request path (batch sizes, queue delays)."""
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._histogram = _Histogram(len(self.buckets))
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                self._histogram.bucket_counts[index] += 1
+            self._histogram.count += 1
+            self._histogram.sum += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histogram = _Histogram(len(self.buckets))
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets, self._histogram.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels(le=_number(upper))} {cumulative}")
+            lines.append(f'{self.name}_bucket{{le="+Inf"}} {self._histogram.count}')
+            lines.append(f"{self.name}_sum {_number(self._histogram.sum)}")
+            lines.append(f"{self.name}_count {self._histogram.count}")
+        return lines
+
+
+def render_gauges(name: str, help_text: str, samples: Iterable[tuple[dict[str, object], float]]) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    lines += [f"{name}{_labels(**labels)} {_number(value)}" for labels, value in samples]
+    return lines
+
+
+metrics = MetricsRegistry()
+
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path template, with router prefixes; UNMATCHED_ROUTE for 404s."""
+    # Newer FastAPI resolves included routers lazily and leaves the prefix-less route in
+    # scope["route"]; the fully prefixed context it matched is kept under scope["fastapi"]
+    fastapi_scope = scope.get("fastapi")
+    route = fastapi_scope.get("effective_route_context") if isinstance(fastapi_scope, dict) else None
+    route = route or scope.get("route")
+    return getattr(route, "path_format", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task hop) that times each HTTP request.
+    The route template is read from the scope after routing has matched it.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry | None = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        registry = self.registry
+        registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.in_flight -= 1
+            registry.observe(scope["method"], route_template(scope), status_code, time.perf_counter() - start)
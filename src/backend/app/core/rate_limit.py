@@ -0,0 +1,193 @@
+"""
+Request rate limits per route group, and a global cap on concurrent requests.
+
+Budgets are enforced with GCRA (the generic cell rate algorithm), which behaves like a
+token bucket refilled continuously: a full bucket allows a burst of `count` requests,
+then one more every `period / count` seconds. Each key needs one number of state (its
+theoretical arrival time), so a store only has to read and write a single value:
+
+- LocalRateLimitStore: in-process, per worker. The default.
+- RedisRateLimitStore: one Redis key per bucket, updated in a WATCH/MULTI transaction,
+  so every worker draws from the same budget. Requires the optional `redis` package.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True, slots=True)
+class Rate:
+    count: int
+    period: float  # seconds
+
+    @classmethod
+    def parse(cls, text: str) -> "Rate":
+        """Parse "<count>/<second|minute|hour|day>", e.g. "20/minute". Raises ValueError if malformed."""
+        count, _, unit = text.partition("/")
+        unit = unit.strip().lower().removesuffix("s")
+        if unit not in _PERIODS or not count.strip().isdigit() or int(count) < 1:
+            raise ValueError(f"Invalid rate {text!r}, expected e.g. '20/minute'")
+        return cls(int(count), _PERIODS[unit])
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.count
+
+
+def gcra(tat: float | None, now: float, rate: Rate) -> tuple[float, float]:
+    """
+    One GCRA step for a key whose stored arrival time is `tat` (None when unknown).
+    Returns (new arrival time, seconds to wait): a wait of 0 admits the request and
+    the new time must be stored; otherwise the stored value stays as it was.
+    """
+    new_tat = max(tat if tat is not None else now, now) + rate.interval
+    allow_at = new_tat - rate.period
+    if now < allow_at:
+        return tat, allow_at - now
+    return new_tat, 0.0
+
+
+class LocalRateLimitStore:
+    """GCRA state in a dict, for one worker. Least recently seen keys are dropped beyond `max_keys`."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._tats: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, rate: Rate, now: float) -> float:
+        with self._lock:
+            tat, wait = gcra(self._tats.get(key), now, rate)
+            if not wait:
+                self._tats[key] = tat
+                self._tats.move_to_end(key)
+                # A dropped key starts again with a full bucket, so evict the least recently seen
+                while len(self._tats) > self.max_keys:
+                    self._tats.popitem(last=False)
+            return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tats.clear()
+
+
+class RedisRateLimitStore:
+    """
+    GCRA state shared through Redis. Pass `client` to reuse a connection (or a stand-in
+    with the same get / set / transaction methods); otherwise one is opened from `url`.
+    """
+
+    # Each check is a network round trip; callers run it off the event loop
+    blocking = True
+
+    def __init__(self, url: str | None = None, *, client: Any = None, prefix: str = "todo:rate-limit:"):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self._prefix = prefix
+
+    def acquire(self, key: str, rate: Rate, now: float) -> float:
+        name = self._prefix + key
+        wait = 0.0
+
+        def attempt(pipe: Any) -> None:
+            nonlocal wait
+            stored = pipe.get(name)
+            tat, wait = gcra(float(stored) if stored is not None else None, now, rate)
+            if not wait:
+                pipe.multi()
+                # The key is only needed until its bucket would be full again
+                pipe.set(name, repr(tat), px=max(math.ceil((tat - now) * 1000), 1))
+
+        # Retried by redis-py when another worker wrote the key between the GET and EXEC
+        self._client.transaction(attempt, name)
+        return wait
+
+
+def create_store():
+    if settings.rate_limit_backend == "redis":
+        if not settings.rate_limit_redis_url:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires RATE_LIMIT_REDIS_URL")
+        return RedisRateLimitStore(settings.rate_limit_redis_url)
+    return LocalRateLimitStore()
+
+
+class RateLimiter:
+    """Budgets per route group, drawn from `store` under "<group>:<client key>"."""
+
+    def __init__(self, store: Any, limits: dict[str, str]):
+        self.store = store
+        # An empty budget leaves that group unlimited
+        self.limits = {group: Rate.parse(text) for group, text in limits.items() if text}
+
+    def check(self, group: str, key: str) -> float:
+        """Spend one request of `key`'s budget in `group`; returns the seconds to wait, 0 when admitted."""
+        rate = self.limits.get(group)
+        if rate is None:
+            return 0.0
+        return self.store.acquire(f"{group}:{key}", rate, time.time())
+
+
+rate_limiter = RateLimiter(
+    create_store(),
+    {"auth": settings.rate_limit_auth, "tasks": settings.rate_limit_tasks},
+)
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Answers 503 with Retry-After once `max_concurrent` HTTP requests are already in progress
+    in this worker. Shedding the excess straight away keeps the admitted requests fast,
+    instead of queueing everything until every request times out. Paths starting with one
+    of `exempt_prefixes` (health probes, long-lived streams) are never counted or shed.
+    """
+
+    def __init__(self, app: ASGIApp, max_concurrent: int, exempt_prefixes: tuple[str, ...] = ()):
+        self.app = app
+        self.max_concurrent = max_concurrent
+        self.exempt_prefixes = exempt_prefixes
+        self.in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        # Single-threaded event loop: the check and the increment cannot interleave
+        if self.in_flight >= self.max_concurrent:
+            await _send_overloaded(send)
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+
+async def _send_overloaded(send: Send) -> None:
+    body = b'{"detail":"Server is busy, please retry"}'
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", b"1"),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -1,11 +1,20 @@
+import asyncio
+import threading
+from concurrent.futures import Executor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from typing import Any, Callable, Optional, TypeVar
 
 import bcrypt
-from jose import jwt
+from starlette.concurrency import run_in_threadpool
 
 from .config import settings
 
+T = TypeVar("T")
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when the password hashing queue is full and the request should be shed."""
+
 
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta is None:
@@ -14,10 +23,27 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
     # Use timezone-aware UTC datetime
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode: dict[str, Any] = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    encoded_jwt = _jwt().encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> dict[str, Any]:
+    """Verify a token's signature and expiry and return its claims. Raises ValueError if invalid."""
+    from jose import JWTError
+
+    try:
+        return _jwt().decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+    except JWTError as exc:
+        raise ValueError("Invalid token") from exc
+
+
+def _jwt():
+    # Imported on first use: jose pulls in cryptography, a large share of the app's import time
+    from jose import jwt
+
+    return jwt
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(
         plain_password.encode("utf-8"),
@@ -25,7 +51,67 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
-def get_password_hash(password: str) -> str:
-    salt = bcrypt.gensalt()
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    salt = bcrypt.gensalt(rounds=rounds or settings.bcrypt_rounds)
     hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
     return hashed.decode("utf-8")
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was produced with a bcrypt cost other than the configured one."""
+    try:
+        # Modular crypt format: $2b$<cost>$<salt+hash>
+        return int(hashed_password.split("$")[2]) != settings.bcrypt_rounds
+    except (IndexError, ValueError):
+        return False
+
+
+_executor: Executor | None = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(max(settings.password_hash_max_pending, 1))
+
+
+def _get_executor() -> Executor | None:
+    global _executor
+    if settings.password_hash_workers <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn: never fork a process that may already hold threads and DB connections
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.password_hash_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown_password_hasher() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def _run_bcrypt(fn: Callable[..., T], *args: Any) -> T:
+    # Bound the number of queued hashes; beyond that, shed load instead of stacking latency
+    if not _pending.acquire(blocking=False):
+        raise PasswordHasherBusyError("Password hashing queue is full")
+    try:
+        executor = _get_executor()
+        if executor is None:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.wrap_future(executor.submit(fn, *args))
+    finally:
+        _pending.release()
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_bcrypt(get_password_hash, password, settings.bcrypt_rounds)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_bcrypt(verify_password, plain_password, hashed_password)
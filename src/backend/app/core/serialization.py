@@ -0,0 +1,87 @@
+"""
+Fast JSON encoding for task rows.
+
+Rows selected as TASK_READ_COLUMNS already have TaskRead's shape, so they are
+encoded directly instead of going through response_model validation,
+jsonable_encoder and the stdlib json module. orjson is used when installed;
+otherwise a precompiled pydantic TypeAdapter produces the same bytes.
+"""
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import datetime
+from typing import Any
+
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class TaskJSON(TypedDict):
+    title: str
+    description: str | None
+    id: int
+    is_completed: bool
+    created_at: datetime
+    updated_at: datetime
+
+
+# TypedDict serialization does not validate its input, it only walks and encodes it
+task_list_adapter = TypeAdapter(list[TaskJSON])
+task_adapter = TypeAdapter(TaskJSON)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _use_orjson() -> bool:
+    return orjson is not None and settings.json_backend != "pydantic"
+
+
+def _as_dict(row: Any) -> Mapping[str, Any]:
+    return row if isinstance(row, Mapping) else row._asdict()
+
+
+def encode_task_rows(rows: Iterable[Any]) -> bytes:
+    """Encode rows with TaskRead's fields (SQLAlchemy Rows or mappings) as a JSON array."""
+    items = [_as_dict(row) for row in rows]
+    if _use_orjson():
+        # OPT_UTC_Z matches pydantic's rendering of UTC datetimes
+        return orjson.dumps(items, option=orjson.OPT_UTC_Z)
+    return task_list_adapter.dump_json(items)
+
+
+def encode_task_row(row: Any) -> bytes:
+    item = _as_dict(row)
+    if _use_orjson():
+        return orjson.dumps(item, option=orjson.OPT_UTC_Z)
+    return task_adapter.dump_json(item)
+
+
+class TaskStreamEncoder:
+    """Frames chunks of task rows as one JSON array, or as newline-delimited JSON."""
+
+    def __init__(self, ndjson: bool = False):
+        self.ndjson = ndjson
+        self.media_type = NDJSON_MEDIA_TYPE if ndjson else "application/json"
+        self._first = True
+
+    def start(self) -> bytes:
+        return b"" if self.ndjson else b"["
+
+    def chunk(self, rows: Sequence[Any]) -> bytes:
+        if not rows:
+            return b""
+        if self.ndjson:
+            return b"".join(encode_task_row(row) + b"\n" for row in rows)
+        inner = encode_task_rows(rows)[1:-1]
+        if self._first:
+            self._first = False
+            return inner
+        return b"," + inner
+
+    def end(self) -> bytes:
+        return b"" if self.ndjson else b"]"
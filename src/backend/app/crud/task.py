@@ -1,37 +1,533 @@
+import base64
+import binascii
+from datetime import datetime
+
+from sqlalchemy import (
+    Row,
+    Select,
+    and_,
+    case,
+    column,
+    delete,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    table,
+    update,
+)
 from sqlalchemy.orm import Session
 
+from app.core import events
+from app.db import group_commit, search
 from app.models.task import Task
-from app.schemas.task import TaskCreate, TaskUpdate
+from app.models.task_list_version import TaskListVersion
+from app.models.task_stats import TaskStats
+from app.models.task_tombstone import TaskTombstone
+from app.schemas.task import TaskBatchUpdateItem, TaskCreate, TaskUpdate
+
+
+def encode_cursor(task: Task | Row) -> str:
+    raw = f"{task.created_at.isoformat()}|{task.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode an opaque cursor into its (created_at, id) key. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_at, task_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def get_list_version(db: Session, user_id: int) -> int:
+    return db.scalar(select(TaskListVersion.version).where(TaskListVersion.user_id == user_id)) or 0
+
+
+def _upsert_insert(db: Session):
+    """The dialect's INSERT ... ON CONFLICT construct, or None where it has none."""
+    # Imported per dialect so a SQLite deployment never loads the PostgreSQL dialect, and vice versa
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+
+        return postgresql_insert
+    return None
+
+
+def _bump_list_version(db: Session, user_id: int) -> int:
+    """
+    Increment the user's task list version inside the caller's transaction and return it.
+
+    The row stays locked until commit, so one user's writes commit in version order; mutations
+    bump first, stamp the new version on the tasks they write, and take their row locks after it.
+    """
+    upsert_insert = _upsert_insert(db)
+    if upsert_insert is not None:
+        stmt = upsert_insert(TaskListVersion.__table__).values(user_id=user_id, version=1)
+        return db.scalar(
+            stmt.on_conflict_do_update(
+                index_elements=[TaskListVersion.user_id],
+                set_={"version": TaskListVersion.version + 1},
+            ).returning(TaskListVersion.version)
+        )
+
+    bumped = db.execute(
+        update(TaskListVersion.__table__)
+        .where(TaskListVersion.user_id == user_id)
+        .values(version=TaskListVersion.version + 1)
+    ).rowcount
+    if not bumped:
+        db.add(TaskListVersion(user_id=user_id, version=1))
+        db.flush()
+    return get_list_version(db, user_id)
+
+
+def get_task_stats(db: Session, user_id: int) -> tuple[int, int]:
+    """Return the user's (total, completed) task counts from the counters table."""
+    row = db.execute(select(TaskStats.total, TaskStats.completed).where(TaskStats.user_id == user_id)).first()
+    return (row.total, row.completed) if row is not None else (0, 0)
+
+
+def _adjust_task_stats(db: Session, user_id: int, *, total: int = 0, completed: int = 0) -> None:
+    """Apply counter deltas inside the caller's transaction."""
+    if not total and not completed:
+        return
+    upsert_insert = _upsert_insert(db)
+    if upsert_insert is not None:
+        stmt = upsert_insert(TaskStats.__table__).values(user_id=user_id, total=total, completed=completed)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[TaskStats.user_id],
+                set_={"total": TaskStats.total + total, "completed": TaskStats.completed + completed},
+            )
+        )
+        return
+
+    adjusted = db.execute(
+        update(TaskStats.__table__)
+        .where(TaskStats.user_id == user_id)
+        .values(total=TaskStats.total + total, completed=TaskStats.completed + completed)
+    ).rowcount
+    if not adjusted:
+        db.add(TaskStats(user_id=user_id, total=total, completed=completed))
+        db.flush()
+
+
+def rebuild_task_stats(db: Session, user_id: int | None = None) -> int:
+    """
+    Recompute counters from the tasks table, for every user or just one, and commit.
+    Returns the number of counter rows written.
+    """
+    counts = select(
+        Task.user_id,
+        func.count().label("total"),
+        func.coalesce(func.sum(case((Task.is_completed, 1), else_=0)), 0).label("completed"),
+    ).group_by(Task.user_id)
+    clear = delete(TaskStats)
+    if user_id is not None:
+        counts = counts.where(Task.user_id == user_id)
+        clear = clear.where(TaskStats.user_id == user_id)
+
+    db.execute(clear)
+    written = db.execute(
+        insert(TaskStats).from_select(["user_id", "total", "completed"], counts)
+    ).rowcount
+    db.commit()
+    return written
 
 
 def get_tasks_for_user(db: Session, user_id: int) -> list[Task]:
     return db.query(Task).filter(Task.user_id == user_id).order_by(Task.created_at.desc()).all()
 
 
+# Columns of TaskRead, in its field order, so rows can be encoded to JSON without building ORM objects
+TASK_READ_COLUMNS = (Task.title, Task.description, Task.id, Task.is_completed, Task.created_at, Task.updated_at)
+
+
+def select_task_rows(
+    user_id: int,
+    *,
+    cursor: str | None = None,
+    is_completed: bool | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+) -> Select:
+    """Build the filtered, newest-first SELECT of TASK_READ_COLUMNS behind the list endpoints."""
+    stmt = select(*TASK_READ_COLUMNS).where(Task.user_id == user_id)
+    if is_completed is not None:
+        stmt = stmt.where(Task.is_completed == is_completed)
+    if created_after is not None:
+        stmt = stmt.where(Task.created_at >= created_after)
+    if created_before is not None:
+        stmt = stmt.where(Task.created_at < created_before)
+    if cursor is not None:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            or_(
+                Task.created_at < cursor_created_at,
+                and_(Task.created_at == cursor_created_at, Task.id < cursor_id),
+            )
+        )
+    return stmt.order_by(Task.created_at.desc(), Task.id.desc())
+
+
+def get_tasks_page(
+    db: Session,
+    user_id: int,
+    *,
+    limit: int | None = None,
+    cursor: str | None = None,
+    is_completed: bool | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+) -> tuple[list[Row], str | None]:
+    """
+    Return one page of a user's tasks as TASK_READ_COLUMNS rows, newest first, plus the cursor
+    for the next page. Pages are keyed on (created_at, id) so every page is an index range scan,
+    regardless of how deep into the list it is.
+    """
+    stmt = select_task_rows(
+        user_id,
+        cursor=cursor,
+        is_completed=is_completed,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    if limit is None:
+        return list(db.execute(stmt)), None
+
+    # Fetch one extra row to learn whether another page exists
+    rows = list(db.execute(stmt.limit(limit + 1)))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
+
+
+def search_tasks(
+    db: Session,
+    user_id: int,
+    query: str,
+    *,
+    limit: int,
+    prefix: bool = True,
+    is_completed: bool | None = None,
+) -> list[Row]:
+    """
+    Rank a user's tasks against `query` (all terms must match) using the dialect's text index:
+    FTS5 bm25 on SQLite, ts_rank over the GIN-indexed tsvector on PostgreSQL, a LIKE scan elsewhere.
+    """
+    terms = search.search_terms(query)
+    if not terms:
+        return []
+
+    stmt = select(*TASK_READ_COLUMNS).where(Task.user_id == user_id)
+    if is_completed is not None:
+        stmt = stmt.where(Task.is_completed == is_completed)
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite" and search.sqlite_fts5_available():
+        fts = table(search.FTS_TABLE, column("rowid"))
+        fts_ref = literal_column(search.FTS_TABLE)
+        stmt = (
+            stmt.join(fts, fts.c.rowid == Task.id)
+            .where(fts_ref.op("MATCH")(search.fts5_match_expression(terms, prefix)))
+            # Title hits weigh ten times description hits; bm25 is lower-is-better
+            .order_by(func.bm25(fts_ref, 10.0, 1.0))
+        )
+    elif dialect == "postgresql":
+        vector = literal_column(search.PG_SEARCH_VECTOR)
+        tsquery = func.to_tsquery(literal_column("'simple'::regconfig"), search.tsquery_expression(terms, prefix))
+        stmt = stmt.where(vector.op("@@")(tsquery)).order_by(func.ts_rank(vector, tsquery).desc())
+    else:
+        for term in terms:
+            stmt = stmt.where(
+                or_(
+                    func.lower(Task.title).contains(term, autoescape=True),
+                    func.lower(func.coalesce(Task.description, "")).contains(term, autoescape=True),
+                )
+            )
+
+    stmt = stmt.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit)
+    return list(db.execute(stmt))
+
+
+def encode_change_cursor(version: int, issued_at: float) -> str:
+    raw = f"{version}|{int(issued_at)}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_change_cursor(cursor: str) -> tuple[int, int]:
+    """Decode a delta sync cursor into (list version, issued-at epoch seconds). Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        version, issued_at = raw.split("|")
+        return int(version), int(issued_at)
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def get_task_changes(db: Session, user_id: int, since: int | None = None) -> tuple[list[Row], list[int], int]:
+    """
+    Return the user's tasks written after list version `since` (every task when None) as
+    TASK_READ_COLUMNS rows, the ids deleted after it, and the version both are complete up to.
+
+    Versions come from the per-user counter every mutation bumps under a row lock, so they are
+    assigned in commit order; unlike timestamps, a write can never land behind a cursor.
+    """
+    version = get_list_version(db, user_id)
+    stmt = select(*TASK_READ_COLUMNS).where(Task.user_id == user_id, Task.change_version <= version)
+    deleted = []
+    if since is not None:
+        stmt = stmt.where(Task.change_version > since)
+        deleted = list(
+            db.scalars(
+                select(TaskTombstone.task_id)
+                .where(TaskTombstone.user_id == user_id, TaskTombstone.version > since, TaskTombstone.version <= version)
+                .order_by(TaskTombstone.version, TaskTombstone.task_id)
+            )
+        )
+    rows = list(db.execute(stmt.order_by(Task.change_version, Task.id)))
+    return rows, deleted, version
+
+
+def purge_task_tombstones(db: Session, older_than: datetime) -> int:
+    """Delete tombstones recorded before `older_than` and commit. Returns how many were removed."""
+    purged = db.execute(delete(TaskTombstone).where(TaskTombstone.deleted_at < older_than)).rowcount
+    db.commit()
+    return purged
+
+
 def get_task(db: Session, task_id: int, user_id: int) -> Task | None:
     return db.query(Task).filter(Task.id == task_id, Task.user_id == user_id).first()
 
 
 def create_task(db: Session, user_id: int, task_in: TaskCreate) -> Task:
-    task = Task(user_id=user_id, title=task_in.title, description=task_in.description)
+    version = _bump_list_version(db, user_id)
+    task = Task(user_id=user_id, title=task_in.title, description=task_in.description, change_version=version)
     db.add(task)
-    db.commit()
-    db.refresh(task)
-    return task
+    # Defaults are client-side and the id comes back from the INSERT, so no refresh is needed
+    db.flush()
+    _adjust_task_stats(db, user_id, total=1)
+    events.queue_tasks_changed(db, user_id, events.TASKS_CREATED, [task])
+    return _commit_detached(db, [task])[0]
 
 
-def update_task(db: Session, task: Task, task_in: TaskUpdate) -> Task:
-    if task_in.title is not None:
-        task.title = task_in.title
-    if task_in.description is not None:
-        task.description = task_in.description
-    if task_in.is_completed is not None:
-        task.is_completed = task_in.is_completed
-    db.commit()
-    db.refresh(task)
-    return task
+def _commit_detached(db: Session, tasks: list[Task]) -> list[Task]:
+    # Detach before commit so the rows we already hold are not expired and re-fetched one by one
+    for task in tasks:
+        db.expunge(task)
+    group_commit.commit_unit(db)
+    return tasks
 
 
-def delete_task(db: Session, task: Task) -> None:
-    db.delete(task)
-    db.commit()
+def _rollback_detached(db: Session, tasks: list[Task]) -> list[Task]:
+    # Nothing was written: keep the rows as read and roll back the version bump
+    for task in tasks:
+        db.expunge(task)
+    group_commit.rollback_unit(db)
+    return tasks
+
+
+def _read_unchanged(db: Session, task_id: int, user_id: int) -> Task | None:
+    # Detached, so the row survives the commit and close of a group-commit session
+    task = get_task(db, task_id, user_id)
+    if task is None:
+        group_commit.rollback_unit(db)
+        return None
+    return _rollback_detached(db, [task])[0]
+
+
+def update_task(db: Session, task_id: int, user_id: int, task_in: TaskUpdate) -> Task | None:
+    """
+    Apply a partial update with a single ownership-scoped UPDATE ... RETURNING.
+    Returns None when the task does not exist or belongs to someone else.
+    """
+    changes = task_in.model_dump(exclude_none=True)
+    if not changes:
+        return _read_unchanged(db, task_id, user_id)
+
+    changes["change_version"] = _bump_list_version(db, user_id)
+    task = None
+    completed_delta = 0
+    if "is_completed" in changes:
+        # Try the update as a state flip first: a hit tells us the completed counter moves,
+        # without a separate read of the old value
+        task = _update_owned_task(db, task_id, user_id, changes, Task.is_completed != changes["is_completed"])
+        if task is not None:
+            completed_delta = 1 if changes["is_completed"] else -1
+        elif changes.keys() == {"is_completed", "change_version"}:
+            # Already in that state and nothing else to change: a no-op, like complete_tasks,
+            # so updated_at, the list version and the change feed stay as they were
+            return _read_unchanged(db, task_id, user_id)
+    if task is None:
+        task = _update_owned_task(db, task_id, user_id, changes)
+
+    if task is None:
+        group_commit.rollback_unit(db)
+        return None
+    _adjust_task_stats(db, user_id, completed=completed_delta)
+    events.queue_tasks_changed(db, user_id, events.TASKS_UPDATED, [task])
+    return _commit_detached(db, [task])[0]
+
+
+def _update_owned_task(db: Session, task_id: int, user_id: int, changes: dict, *criteria) -> Task | None:
+    stmt = update(Task).where(Task.id == task_id, Task.user_id == user_id, *criteria).values(**changes)
+    if db.get_bind().dialect.update_returning:
+        return db.scalars(stmt.returning(Task)).one_or_none()
+    if db.execute(stmt).rowcount:
+        return get_task(db, task_id, user_id)
+    return None
+
+
+def complete_task(db: Session, task_id: int, user_id: int) -> Task | None:
+    return update_task(db, task_id, user_id, TaskUpdate(is_completed=True))
+
+
+def delete_task(db: Session, task_id: int, user_id: int) -> bool:
+    """Delete with a single ownership-scoped DELETE; False when nothing matched."""
+    version = _bump_list_version(db, user_id)
+    deleted = _delete_owned_tasks(db, user_id, [task_id], version)
+    if not deleted:
+        group_commit.rollback_unit(db)
+        return False
+    _adjust_task_stats(db, user_id, total=-1, completed=-sum(deleted.values()))
+    events.queue_tasks_deleted(db, user_id, deleted)
+    group_commit.commit_unit(db)
+    return True
+
+
+def _delete_owned_tasks(db: Session, user_id: int, task_ids: list[int], version: int) -> dict[int, bool]:
+    """
+    Delete the user's tasks among `task_ids` and leave a tombstone for each at `version`.
+    Returns the completion state of each deleted task by id.
+    """
+    stmt = delete(Task).where(Task.user_id == user_id, Task.id.in_(task_ids))
+    if db.get_bind().dialect.delete_returning:
+        deleted = dict(db.execute(stmt.returning(Task.id, Task.is_completed)).all())
+    else:
+        deleted = dict(
+            db.execute(
+                select(Task.id, Task.is_completed)
+                .where(Task.user_id == user_id, Task.id.in_(task_ids))
+                .with_for_update()
+            ).all()
+        )
+        db.execute(stmt)
+    if deleted:
+        _record_tombstones(db, user_id, list(deleted), version)
+    return deleted
+
+
+def _record_tombstones(db: Session, user_id: int, task_ids: list[int], version: int) -> None:
+    rows = [{"user_id": user_id, "task_id": task_id, "version": version} for task_id in task_ids]
+    # SQLite hands out a deleted max rowid again, so the same id can be tombstoned twice
+    upsert_insert = _upsert_insert(db)
+    if upsert_insert is not None:
+        stmt = upsert_insert(TaskTombstone.__table__)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[TaskTombstone.user_id, TaskTombstone.task_id],
+                set_={"version": stmt.excluded.version, "deleted_at": stmt.excluded.deleted_at},
+            ),
+            rows,
+        )
+        return
+    db.execute(delete(TaskTombstone).where(TaskTombstone.user_id == user_id, TaskTombstone.task_id.in_(task_ids)))
+    db.execute(insert(TaskTombstone.__table__), rows)
+
+
+def create_tasks(db: Session, user_id: int, items: list[TaskCreate]) -> list[Task]:
+    """Insert many tasks with one multi-row INSERT ... RETURNING, in input order."""
+    version = _bump_list_version(db, user_id)
+    values = [
+        {"user_id": user_id, "title": item.title, "description": item.description, "change_version": version}
+        for item in items
+    ]
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        tasks = list(db.scalars(insert(Task).returning(Task, sort_by_parameter_order=True), values))
+    else:
+        tasks = [Task(**value) for value in values]
+        db.add_all(tasks)
+        db.flush()
+    _adjust_task_stats(db, user_id, total=len(tasks))
+    events.queue_tasks_changed(db, user_id, events.TASKS_CREATED, tasks)
+    return _commit_detached(db, tasks)
+
+
+def update_tasks(db: Session, user_id: int, items: list[TaskBatchUpdateItem]) -> dict[int, Task]:
+    """Apply partial updates to many tasks in one transaction. Returns the updated tasks by id."""
+    version = _bump_list_version(db, user_id)
+    # Lock the rows we are about to change so the completed delta computed from them stays exact
+    was_completed = dict(
+        db.execute(
+            select(Task.id, Task.is_completed)
+            .where(Task.user_id == user_id, Task.id.in_([item.id for item in items]))
+            .with_for_update()
+        ).all()
+    )
+    owned = set(was_completed)
+    params = [
+        {"id": item.id, **changes, "change_version": version}
+        for item in items
+        if item.id in owned and (changes := item.model_dump(exclude={"id"}, exclude_none=True))
+    ]
+    if params:
+        # ORM bulk UPDATE by primary key: one executemany per distinct set of changed columns
+        db.execute(
+            update(Task).where(Task.user_id == user_id).execution_options(synchronize_session=None),
+            params,
+        )
+        completed_delta = sum(
+            int(param["is_completed"]) - int(was_completed[param["id"]])
+            for param in params
+            if "is_completed" in param
+        )
+        _adjust_task_stats(db, user_id, completed=completed_delta)
+    tasks = list(db.scalars(select(Task).where(Task.id.in_(owned)).execution_options(populate_existing=True)))
+    if not params:
+        return {task.id: task for task in _rollback_detached(db, tasks)}
+    changed = {param["id"] for param in params}
+    events.queue_tasks_changed(db, user_id, events.TASKS_UPDATED, [task for task in tasks if task.id in changed])
+    return {task.id: task for task in _commit_detached(db, tasks)}
+
+
+def complete_tasks(db: Session, user_id: int, task_ids: list[int]) -> dict[int, Task]:
+    # Only pending tasks are written, so the rows touched are exactly the counter delta
+    version = _bump_list_version(db, user_id)
+    owned = and_(Task.user_id == user_id, Task.id.in_(task_ids))
+    stmt = update(Task).where(owned, Task.is_completed.is_(False)).values(is_completed=True, change_version=version)
+    if db.get_bind().dialect.update_returning:
+        flipped = list(db.scalars(stmt.returning(Task)))
+    else:
+        flipped_ids = set(db.scalars(select(Task.id).where(owned, Task.is_completed.is_(False)).with_for_update()))
+        db.execute(stmt)
+        flipped = list(db.scalars(select(Task).where(Task.id.in_(flipped_ids))))
+    already_completed = list(db.scalars(select(Task).where(owned, Task.id.not_in([task.id for task in flipped]))))
+    if not flipped:
+        return {task.id: task for task in _rollback_detached(db, already_completed)}
+    _adjust_task_stats(db, user_id, completed=len(flipped))
+    events.queue_tasks_changed(db, user_id, events.TASKS_UPDATED, flipped)
+    return {task.id: task for task in _commit_detached(db, flipped + already_completed)}
+
+
+def delete_tasks(db: Session, user_id: int, task_ids: list[int]) -> set[int]:
+    version = _bump_list_version(db, user_id)
+    deleted = _delete_owned_tasks(db, user_id, task_ids, version)
+    if not deleted:
+        group_commit.rollback_unit(db)
+        return set()
+    _adjust_task_stats(db, user_id, total=-len(deleted), completed=-sum(deleted.values()))
+    events.queue_tasks_deleted(db, user_id, deleted)
+    group_commit.commit_unit(db)
+    return set(deleted)
@@ -5,12 +5,17 @@ from app.models.user import User
 from app.schemas.user import UserCreate
 
 
+def get_user(db: Session, user_id: int) -> User | None:
+    return db.query(User).filter(User.id == user_id).first()
+
+
 def get_user_by_email(db: Session, email: str) -> User | None:
     return db.query(User).filter(User.email == email).first()
 
 
-def create_user(db: Session, user_in: UserCreate) -> User:
-    hashed_password = get_password_hash(user_in.password)
+def create_user(db: Session, user_in: UserCreate, hashed_password: str | None = None) -> User:
+    if hashed_password is None:
+        hashed_password = get_password_hash(user_in.password)
     db_user = User(email=user_in.email, hashed_password=hashed_password)
     db.add(db_user)
     db.commit()
@@ -18,6 +23,12 @@ def create_user(db: Session, user_in: UserCreate) -> User:
     return db_user
 
 
+def update_password_hash(db: Session, user: User, hashed_password: str) -> User:
+    user.hashed_password = hashed_password
+    db.commit()
+    return user
+
+
 def authenticate_user(db: Session, email: str, password: str) -> User | None:
     user = get_user_by_email(db, email)
     if not user:
@@ -1,13 +1,81 @@
+import logging
+
+from sqlalchemy import Connection, Engine, delete, inspect, insert, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.crud.task import rebuild_task_stats
+from app.db.search import ensure_search_index
 from app.db.session import engine
 from app.models.base import Base
+from app.models.schema_version import SchemaVersion
 from app.models.user import User  # noqa: F401 - Import to register with metadata
-from app.models.task import Task  # noqa: F401 - Import to register with metadata
+from app.models.task import Task
+from app.models.task_list_version import TaskListVersion  # noqa: F401 - Import to register with metadata
+from app.models.task_stats import TaskStats
+from app.models.task_tombstone import TaskTombstone  # noqa: F401 - Import to register with metadata
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a table, index or trigger is added, so existing databases pick it up on the next boot
+SCHEMA_VERSION = 3
+
+
+def get_schema_version(connection: Connection) -> int:
+    """The database's recorded schema version; 0 when it has never been initialised."""
+    try:
+        return connection.scalar(select(SchemaVersion.version)) or 0
+    except DBAPIError:
+        # Table missing: a fresh database, or one created before versioning
+        connection.rollback()
+        return 0
 
 
-def init_db() -> None:
+def _add_task_change_version(connection: Connection) -> None:
+    """Add tasks.change_version (and its index) to databases created before delta sync."""
+    if any(column["name"] == "change_version" for column in inspect(connection).get_columns(Task.__tablename__)):
+        return
+    connection.execute(text("ALTER TABLE tasks ADD COLUMN change_version INTEGER NOT NULL DEFAULT 0"))
+    # create_all skips the indexes of tables that already exist
+    for index in Task.__table__.indexes:
+        if index.name == "ix_tasks_user_id_change_version":
+            index.create(connection, checkfirst=True)
+
+
+def _add_task_keyset_index(connection: Connection) -> None:
+    """Add the keyset pagination index to tasks tables created before it existed."""
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_tasks_user_id_created_at_id ON tasks (user_id, created_at, id)")
+    )
+
+
+def init_db(bind: Engine | None = None) -> bool:
     """
-    Initialize database tables.
-    This function creates all tables if they don't exist.
-    It's safe to call multiple times - it will only create missing tables.
+    Bring the database up to SCHEMA_VERSION. Returns True if anything had to be created.
+
+    An up-to-date database costs a single SELECT, so this is cheap to run on every boot;
+    only a new or outdated database pays for create_all's catalog queries.
     """
-    Base.metadata.create_all(bind=engine)
+    bind = bind or engine
+    with bind.connect() as connection:
+        current = get_schema_version(connection)
+    if current >= SCHEMA_VERSION:
+        if current > SCHEMA_VERSION:
+            logger.warning("Database schema version %d is newer than this build's %d", current, SCHEMA_VERSION)
+        return False
+
+    logger.info("Upgrading database schema from version %d to %d", current, SCHEMA_VERSION)
+    stats_existed = inspect(bind).has_table(TaskStats.__tablename__)
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as connection:
+        _add_task_change_version(connection)
+        _add_task_keyset_index(connection)
+        # create_all only builds the search index alongside a new tasks table; cover older databases too
+        ensure_search_index(connection)
+        connection.execute(delete(SchemaVersion))
+        connection.execute(insert(SchemaVersion).values(id=1, version=SCHEMA_VERSION))
+    if not stats_existed:
+        # Seed the counters for tasks that predate them
+        with Session(bind) as db:
+            rebuild_task_stats(db)
+    return True
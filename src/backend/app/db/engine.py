@@ -0,0 +1,135 @@
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.config import settings
+
+
+class PoolWaitStats:
+    """Time spent waiting for a pooled connection, across every engine in the process."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "total_wait_seconds": self.total_wait_seconds,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+
+pool_wait_stats = PoolWaitStats()
+
+
+class _CheckoutTimingMixin:
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_wait_stats.record(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_kwargs(url: str) -> dict[str, Any]:
+    kwargs: dict[str, Any] = {
+        "echo": False,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    parsed = make_url(url)
+    default_pool = parsed.get_dialect().get_pool_class(parsed)
+    # In-memory SQLite gets a singleton/static pool, which takes no sizing arguments
+    if issubclass(default_pool, QueuePool):
+        kwargs.update(
+            poolclass=TimedAsyncAdaptedQueuePool if issubclass(default_pool, AsyncAdaptedQueuePool) else TimedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return kwargs
+
+
+def _sqlite_pragmas() -> list[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}",
+        f"PRAGMA cache_size = {int(settings.sqlite_cache_size)}",
+    ]
+    # Keywords only; these are interpolated into SQL
+    if settings.sqlite_journal_mode.isalpha():
+        pragmas.insert(0, f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+    if settings.sqlite_synchronous.isalpha():
+        pragmas.insert(1, f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+    return pragmas
+
+
+def apply_sqlite_profile(engine: Engine) -> None:
+    """Run the tuned PRAGMAs on every new SQLite connection: WAL so readers never block on the writer."""
+    if engine.dialect.name != "sqlite" or not settings.sqlite_profile_enabled:
+        return
+    pragmas = _sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def create_db_engine(url: str) -> Engine:
+    engine = create_engine(url, future=True, **_engine_kwargs(url))
+    apply_sqlite_profile(engine)
+    return engine
+
+
+def create_async_db_engine(url: str) -> AsyncEngine:
+    engine = create_async_engine(url, **_engine_kwargs(url))
+    apply_sqlite_profile(engine.sync_engine)
+    return engine
+
+
+def pool_status(engine: Engine) -> dict[str, int]:
+    """Current occupancy of a QueuePool-backed engine; empty for pools that do not track it."""
+    pool: Pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+    }
@@ -0,0 +1,237 @@
+"""
+Group commit: coalesce concurrent single-task writes into one transaction.
+
+Every commit costs a durable flush (fsync on SQLite, a WAL flush on PostgreSQL with
+synchronous_commit on), which caps write throughput however many workers run. With
+GROUP_COMMIT_ENABLED, the single-task mutation routes hand their CRUD call to a
+GroupCommitter instead of running it on the request's session. A writer thread collects
+calls for up to GROUP_COMMIT_MAX_DELAY_MS after the first one arrives (or until
+GROUP_COMMIT_MAX_BATCH are queued), then runs them all in one transaction:
+
+- each call runs inside its own SAVEPOINT, so one that raises (or rolls back its own unit
+  of work) is undone alone and its caller gets its own result or error;
+- callers are answered only after the shared COMMIT, so a returned result is durable. If
+  that COMMIT fails, every call that had succeeded gets its error.
+
+CRUD functions end their unit of work with commit_unit / rollback_unit, which release or
+roll back the call's savepoint here and commit or roll back the session everywhere else.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from fastapi import Depends
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core import events
+from app.core.config import settings
+from app.core.metrics import Histogram
+from app.db.session import SessionRunner, get_session_runner, get_sessionmaker
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+_UNIT_KEY = "group_commit_unit"
+
+batch_size_histogram = Histogram(
+    "db_group_commit_batch_size",
+    "Task mutations committed together in one transaction.",
+    (1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+queue_delay_histogram = Histogram(
+    "db_group_commit_queue_delay_seconds",
+    "Time a task mutation waited for its batch to start.",
+    (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+
+def commit_unit(db: Session) -> None:
+    """Finish the caller's unit of work: release its savepoint inside a group commit, else commit."""
+    unit = db.info.get(_UNIT_KEY)
+    if unit is None:
+        db.commit()
+    elif unit.savepoint.is_active:
+        unit.savepoint.commit()
+
+
+def rollback_unit(db: Session) -> None:
+    """Undo the caller's unit of work: roll back its savepoint inside a group commit, else the transaction."""
+    unit = db.info.get(_UNIT_KEY)
+    if unit is None:
+        db.rollback()
+        return
+    unit.rollback(db)
+
+
+@dataclass(slots=True)
+class _Unit:
+    savepoint: Any
+    # Events queued before this unit began; a rolled-back unit drops the ones after
+    event_mark: int
+
+    def rollback(self, db: Session) -> None:
+        if self.savepoint.is_active:
+            self.savepoint.rollback()
+        events.discard_pending_after(db, self.event_mark)
+
+
+@dataclass(slots=True)
+class _Call:
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: dict
+    enqueued: float = field(default_factory=time.monotonic)
+    future: Future = field(default_factory=Future)
+
+
+class GroupCommitter:
+    """Runs `fn(session, *args)` calls in shared transactions from one writer thread."""
+
+    def __init__(self, session_factory: sessionmaker[Session], *, max_batch: int = 64, max_delay: float = 0.002):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: list[_Call] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_loop, name="group-commit", daemon=True)
+        self._thread.start()
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Queue `fn` for the next batch; returns its result once the batch has committed."""
+        call = _Call(fn, args, kwargs)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("GroupCommitter is closed")
+            self._pending.append(call)
+            self._condition.notify()
+        return await asyncio.wrap_future(call.future)
+
+    def close(self) -> None:
+        """Stop accepting calls, commit what is queued, and stop the writer thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _next_batch(self) -> list[_Call] | None:
+        with self._condition:
+            while not self._pending:
+                if self._closed:
+                    return None
+                self._condition.wait()
+            # The window opens with the oldest call: nobody waits longer than max_delay for company
+            deadline = self._pending[0].enqueued + self.max_delay
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._pending[: self.max_batch]
+            del self._pending[: self.max_batch]
+            return batch
+
+    def _write_loop(self) -> None:
+        while (batch := self._next_batch()) is not None:
+            try:
+                self.execute(batch)
+            except Exception as exc:
+                # Never let one batch take the writer down: every later call would wait forever
+                logger.exception("Group commit batch failed")
+                for call in batch:
+                    if not call.future.done():
+                        call.future.set_exception(exc)
+
+    def execute(self, batch: list[_Call]) -> None:
+        # A caller that went away (client disconnect) cancelled its call; it is neither run nor answered.
+        # Once marked running, a call can no longer be cancelled, so setting its outcome below is safe.
+        batch = [call for call in batch if call.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        started = time.monotonic()
+        batch_size_histogram.observe(len(batch))
+        for call in batch:
+            queue_delay_histogram.observe(started - call.enqueued)
+
+        outcomes: list[tuple[_Call, Any, BaseException | None]] = []
+        try:
+            with self.session_factory() as db:
+                _begin_write(db)
+                for call in batch:
+                    outcomes.append(self._run_call(db, call))
+                db.commit()
+        except Exception as exc:
+            # The shared transaction is lost: calls that had succeeded get its error, failed ones keep theirs
+            failed = {id(call): error for call, _, error in outcomes if error is not None}
+            for call in batch:
+                call.future.set_exception(failed.get(id(call), exc))
+            return
+
+        for call, result, error in outcomes:
+            if error is not None:
+                call.future.set_exception(error)
+            else:
+                call.future.set_result(result)
+
+    @staticmethod
+    def _run_call(db: Session, call: _Call) -> tuple[_Call, Any, BaseException | None]:
+        unit = _Unit(db.begin_nested(), events.pending_mark(db))
+        db.info[_UNIT_KEY] = unit
+        try:
+            result = call.fn(db, *call.args, **call.kwargs)
+        except Exception as exc:
+            unit.rollback(db)
+            return call, None, exc
+        finally:
+            del db.info[_UNIT_KEY]
+        if unit.savepoint.is_active:
+            # Read-only paths return without finishing their unit
+            unit.savepoint.commit()
+        return call, result, None
+
+
+def _begin_write(db: Session) -> None:
+    if db.get_bind().dialect.name == "sqlite":
+        # pysqlite opens its transaction lazily at the first DML, so a leading SAVEPOINT would start
+        # (and its RELEASE commit) a transaction of its own. Begin explicitly, taking the write lock now.
+        db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+
+
+_committers: dict[int, GroupCommitter] = {}
+_committers_lock = threading.Lock()
+
+
+def get_group_committer(session_factory: sessionmaker[Session]) -> GroupCommitter:
+    with _committers_lock:
+        committer = _committers.get(id(session_factory))
+        if committer is None:
+            committer = _committers[id(session_factory)] = GroupCommitter(
+                session_factory,
+                max_batch=settings.group_commit_max_batch,
+                max_delay=settings.group_commit_max_delay_ms / 1000,
+            )
+        return committer
+
+
+def shutdown_group_committers() -> None:
+    with _committers_lock:
+        committers = list(_committers.values())
+        _committers.clear()
+    for committer in committers:
+        committer.close()
+
+
+async def get_write_runner(
+    db: SessionRunner = Depends(get_session_runner),
+    session_factory: sessionmaker[Session] = Depends(get_sessionmaker),
+) -> SessionRunner | GroupCommitter:
+    """Where single-task mutations run: the request's session, or the shared group committer."""
+    if settings.group_commit_enabled:
+        return get_group_committer(session_factory)
+    return db
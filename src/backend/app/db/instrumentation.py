@@ -0,0 +1,152 @@
+"""
+Per-request SQL accounting: statement count, time spent in the database and the slowest
+statement, collected from engine cursor events into a context-local QueryStats.
+
+The contextvar follows the request into the threadpool (sync mode) and into run_sync
+greenlets (async mode), so every engine in the process reports to the request that
+issued the statement. Outside a request the listeners cost one ContextVar lookup.
+"""
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+# "IN (?, ?, ?)" and "VALUES (?, ?), (?, ?)" vary with the number of parameters, not the query shape
+_GROUP = rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)"
+_PLACEHOLDER_LIST = re.compile(rf"{_GROUP}(?:\s*,\s*{_GROUP})*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalise a parameterised statement so repeats of the same query compare equal."""
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryStats:
+    __slots__ = ("count", "total_seconds", "slowest_seconds", "slowest_statement", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: str | None = None
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+        self.shapes[statement_shape(statement)] += 1
+
+    def most_repeated(self) -> tuple[str, int] | None:
+        common = self.shapes.most_common(1)
+        return common[0] if common else None
+
+
+_current_stats: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current_stats.get()
+    started = conn.info.get("query_start_time")
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(exception_context) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start time so the
+    # stack does not grow on a pooled connection and later statements pop their own
+    conn = exception_context.connection
+    started = conn.info.get("query_start_time") if conn is not None else None
+    if _current_stats.get() is not None and started:
+        started.pop()
+
+
+def _timing_description(text: str, max_length: int = 120) -> str:
+    text = _WHITESPACE.sub(" ", text).strip()[:max_length]
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def server_timing(stats: QueryStats, total_seconds: float) -> str:
+    db_ms = stats.total_seconds * 1000
+    app_ms = max(total_seconds * 1000 - db_ms, 0.0)
+    metrics = [f'db;dur={db_ms:.2f};desc="{stats.count} queries"']
+    if stats.slowest_statement is not None:
+        slowest = _timing_description(stats.slowest_statement)
+        metrics.append(f'db-slowest;dur={stats.slowest_seconds * 1000:.2f};desc="{slowest}"')
+    metrics.append(f"app;dur={app_ms:.2f}")
+    return ", ".join(metrics)
+
+
+class QueryStatsMiddleware:
+    """
+    Collects QueryStats for each HTTP request. In debug mode they are sent back as a
+    Server-Timing header; requests over the query budget, or repeating one statement
+    shape too often (the N+1 pattern), are logged as warnings.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.debug:
+                # Streamed bodies keep querying after this point; the log check below still sees them
+                MutableHeaders(scope=message).append("Server-Timing", server_timing(stats, time.perf_counter() - start))
+            await send(message)
+
+        token = _current_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            _check_query_budget(scope, stats)
+
+
+def _check_query_budget(scope: Scope, stats: QueryStats) -> None:
+    if not stats.count:
+        return
+    route = route_template(scope)
+    budget = settings.sql_query_budget
+    if budget and stats.count > budget:
+        logger.warning(
+            "%s %s ran %d SQL statements (budget %d, %.1f ms in the database)",
+            scope["method"], route, stats.count, budget, stats.total_seconds * 1000,
+        )
+    threshold = settings.sql_repeated_statement_threshold
+    repeated = stats.most_repeated()
+    if threshold and repeated is not None and repeated[1] >= threshold:
+        shape, times = repeated
+        logger.warning("%s %s ran the same statement %d times, likely N+1: %s", scope["method"], route, times, shape)
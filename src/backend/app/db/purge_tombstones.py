@@ -0,0 +1,34 @@
+"""
+Delete task tombstones older than the delta sync retention window.
+
+Tombstones let GET /api/tasks/changes report deletions. Change cursors older than
+TASKS_TOMBSTONE_RETENTION_DAYS are rejected with 410, so with the default --days no
+cursor still accepted needs the rows removed here. Run it daily from cron or a scheduler.
+
+    python -m app.db.purge_tombstones [--days N]
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.crud.task import purge_task_tombstones
+from app.db.session import SessionLocal
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=settings.tasks_tombstone_retention_days,
+        help="Keep tombstones this many days (default: TASKS_TOMBSTONE_RETENTION_DAYS)",
+    )
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        purged = purge_task_tombstones(db, datetime.utcnow() - timedelta(days=args.days))
+    print(f"Purged {purged} task tombstone(s) older than {args.days} day(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Rebuild the per-user task counters behind GET /api/tasks/stats from the tasks table.
+
+The counters are updated in the same transaction as every task mutation, so this is
+only needed after writes that bypass the API (manual SQL, restores, imports).
+
+    python -m app.db.reconcile [--user-id ID]
+"""
+import argparse
+
+from app.crud.task import rebuild_task_stats
+from app.db.session import SessionLocal
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's counters")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        written = rebuild_task_stats(db, args.user_id)
+    scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+    print(f"Rebuilt task stats for {scope}: {written} counter row(s) written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Full-text search index over task title and description.
+
+SQLite: an external-content FTS5 table (`tasks_fts`) kept in sync with `tasks`
+by triggers. PostgreSQL: a GIN index on a tsvector expression. Other databases
+fall back to a LIKE scan. The index is created together with the `tasks` table,
+and `ensure_search_index` adds it to databases created before it existed.
+"""
+import functools
+import logging
+import re
+import sqlite3
+
+from sqlalchemy import Connection, event, text
+
+from app.models.task import Task
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "tasks_fts"
+
+# Must match the expression used by the search query for PostgreSQL to pick the index
+PG_SEARCH_VECTOR = "to_tsvector('simple'::regconfig, coalesce(title, '') || ' ' || coalesce(description, ''))"
+PG_SEARCH_INDEX = "ix_tasks_search_vector"
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='tasks', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+
+@functools.cache
+def sqlite_fts5_available() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE probe USING fts5(x)")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(query: str) -> list[str]:
+    """Split free text into lowercase word tokens; everything else (operators, quotes) is dropped."""
+    return [token.lower() for token in _TOKEN_RE.findall(query)]
+
+
+def fts5_match_expression(terms: list[str], prefix: bool) -> str:
+    star = "*" if prefix else ""
+    return " AND ".join(f'"{term}"{star}' for term in terms)
+
+
+def tsquery_expression(terms: list[str], prefix: bool) -> str:
+    suffix = ":*" if prefix else ""
+    return " & ".join(f"{term}{suffix}" for term in terms)
+
+
+def ensure_search_index(connection: Connection) -> None:
+    """Idempotently create the search index for the connection's dialect."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        if not sqlite_fts5_available():
+            logger.warning("SQLite was built without FTS5; task search will scan instead of using an index")
+            return
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).first()
+        for statement in _SQLITE_DDL:
+            connection.exec_driver_sql(statement)
+        if not exists:
+            # Index rows that predate the FTS table
+            connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif dialect == "postgresql":
+        connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {PG_SEARCH_INDEX} ON tasks USING GIN ({PG_SEARCH_VECTOR})")
+
+
+@event.listens_for(Task.__table__, "after_create")
+def _create_search_index(target, connection: Connection, **kw) -> None:
+    ensure_search_index(connection)
+
+
+@event.listens_for(Task.__table__, "before_drop")
+def _drop_search_index(target, connection: Connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        # Triggers go with the tasks table; the FTS table would otherwise outlive it
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
@@ -1,16 +1,59 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Iterator, Sequence
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, TypeVar
+
+from fastapi import Depends
+from sqlalchemy import Row, Select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
+from app.db.engine import create_async_db_engine, create_db_engine
+
+T = TypeVar("T")
 
-engine = create_engine(
-    settings.database_url,
-    echo=False,
-    future=True,
-    pool_pre_ping=True,
-)
+engine = create_db_engine(settings.database_url)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Sync driver -> asyncio driver for the same database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+psycopg",
+    "postgres": "postgresql+psycopg",
+}
+
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    backend, _, driver = scheme.partition("+")
+    if not sep or driver in ("aiosqlite", "asyncpg", "psycopg_async") or backend not in ASYNC_DRIVERS:
+        return url
+    return f"{ASYNC_DRIVERS[backend]}://{rest}"
+
+
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    # Created on first use so sync-only deployments never import an asyncio driver
+    return create_async_db_engine(settings.async_database_url or to_async_url(settings.database_url))
+
+
+@lru_cache
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    # expire_on_commit=False: attributes read after commit must not trigger implicit IO
+    return async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+def dispose_engines(close: bool = True) -> None:
+    """
+    Drop every pooled connection. In a freshly forked process pass close=False: the inherited
+    connections still belong to the parent, so they are forgotten rather than closed.
+    """
+    engine.dispose(close=close)
+    if get_async_engine.cache_info().currsize:
+        get_async_engine().sync_engine.dispose(close=close)
+
 
 def get_db():
     db = SessionLocal()
@@ -18,3 +61,89 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+class SessionRunner:
+    """
+    Runs sync data-access functions (`fn(session, *args)`) against whichever
+    session the current mode provides, so CRUD code is written once.
+
+    - sync mode: the function runs on the threadpool with a regular Session.
+    - async mode: the function runs via AsyncSession.run_sync, which drives the
+      asyncio driver from the event loop without occupying a worker thread.
+    """
+
+    def __init__(self, session: Session | AsyncSession):
+        self.session = session
+
+    @property
+    def is_async(self) -> bool:
+        return isinstance(self.session, AsyncSession)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def close(self) -> None:
+        """Return the session's connection to the pool early, e.g. before a long-lived stream."""
+        if isinstance(self.session, AsyncSession):
+            await self.session.close()
+        else:
+            await run_in_threadpool(self.session.close)
+
+
+async def get_sessionmaker() -> sessionmaker[Session]:
+    return SessionLocal
+
+
+async def get_async_db_sessionmaker() -> async_sessionmaker[AsyncSession] | None:
+    return get_async_sessionmaker() if settings.db_async else None
+
+
+@asynccontextmanager
+async def open_session_runner(
+    session_factory: sessionmaker[Session],
+    async_session_factory: async_sessionmaker[AsyncSession] | None,
+) -> AsyncIterator[SessionRunner]:
+    """A SessionRunner over an AsyncSession when `async_session_factory` is given, else over a sync Session."""
+    if async_session_factory is not None:
+        async with async_session_factory() as async_db:
+            yield SessionRunner(async_db)
+        return
+
+    db = session_factory()
+    try:
+        yield SessionRunner(db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def get_session_runner(
+    session_factory: sessionmaker[Session] = Depends(get_sessionmaker),
+    async_session_factory: async_sessionmaker[AsyncSession] | None = Depends(get_async_db_sessionmaker),
+) -> AsyncGenerator[SessionRunner, None]:
+    """Yield a SessionRunner over an AsyncSession when `db_async` is enabled, else over a sync Session."""
+    async with open_session_runner(session_factory, async_session_factory) as runner:
+        yield runner
+
+
+def iter_partitions(session_factory: sessionmaker[Session], stmt: Select, size: int) -> Iterator[Sequence[Row]]:
+    """Stream `stmt` through a server-side cursor on a dedicated session, `size` rows at a time."""
+    with session_factory() as db:
+        result = db.execute(stmt.execution_options(yield_per=size))
+        yield from result.partitions()
+
+
+async def aiter_partitions(
+    session_factory: async_sessionmaker[AsyncSession], stmt: Select, size: int
+) -> AsyncIterator[Sequence[Row]]:
+    async with session_factory() as db:
+        result = await db.stream(stmt.execution_options(yield_per=size))
+        async for partition in result.partitions():
+            yield partition
@@ -1,12 +1,17 @@
-from datetime import datetime
+import math
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
 
+from app.core.auth_cache import TokenCache
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.rate_limit import rate_limiter
+from app.core.security import decode_access_token
+from app.crud.user import get_user
+from app.db.session import SessionRunner, get_session_runner
 from app.models.user import User
 from app.schemas.token import TokenPayload
 
@@ -15,19 +20,90 @@ reuseable_oauth2 = OAuth2PasswordBearer(
     scheme_name="JWT",
 )
 
+token_cache = TokenCache(
+    max_entries=settings.auth_cache_max_entries if settings.auth_cache_enabled else 0,
+    ttl_seconds=settings.auth_cache_ttl_seconds,
+)
+
+
+def _detached_principal(user: User) -> User:
+    """Snapshot a user's column state into a detached instance that can be cached across sessions."""
+    principal = User(
+        id=user.id,
+        email=user.email,
+        hashed_password=user.hashed_password,
+        created_at=user.created_at,
+    )
+    make_transient_to_detached(principal)
+    return principal
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_principal(mapper, connection, target: User) -> None:
+    token_cache.invalidate_user(target.id)
+
+
+async def get_current_user(
+    db: SessionRunner = Depends(get_session_runner),
+    token: str = Depends(reuseable_oauth2),
+) -> User:
+    return await authenticate_token(db, token)
+
+
+async def authenticate_token(db: SessionRunner, token: str) -> User:
+    """Resolve a bearer token to its user; raises 401 HTTPException when it is not valid."""
+    cached = token_cache.get(token)
+    if cached is not None:
+        # Attach the cached snapshot to this session without a SELECT
+        return await db.run(Session.merge, cached, load=False)
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(reuseable_oauth2)) -> User:
     try:
-        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        token_data = TokenPayload(**payload)
-    except (JWTError, ValueError):
+        token_data = TokenPayload(**decode_access_token(token))
+    except ValueError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
 
     if token_data.sub is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-    user = db.query(User).filter(User.id == int(token_data.sub)).first()
+    user = await db.run(get_user, int(token_data.sub))
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
+    token_cache.set(token, user.id, _detached_principal(user), token_data.exp)
     return user
+
+
+async def _enforce_rate_limit(group: str, key: str) -> None:
+    if not settings.rate_limit_enabled:
+        return
+    if rate_limiter.store.blocking:
+        wait = await run_in_threadpool(rate_limiter.check, group, key)
+    else:
+        wait = rate_limiter.check(group, key)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+def rate_limit_by_user(group: str):
+    """Dependency spending the authenticated user's budget for `group`."""
+
+    async def check_user_rate_limit(current_user: User = Depends(get_current_user)) -> None:
+        await _enforce_rate_limit(group, f"user:{current_user.id}")
+
+    return check_user_rate_limit
+
+
+def rate_limit_by_client(group: str):
+    """Dependency spending the client IP's budget for `group`, for routes without a user."""
+
+    async def check_client_rate_limit(request: Request) -> None:
+        # Behind a proxy this is the real client address only if FORWARDED_ALLOW_IPS trusts the proxy
+        host = request.client.host if request.client is not None else "unknown"
+        await _enforce_rate_limit(group, f"ip:{host}")
+
+    return check_client_rate_limit
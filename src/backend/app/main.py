@@ -4,20 +4,27 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
+from app.core.rate_limit import ConcurrencyLimitMiddleware
+from app.db.instrumentation import QueryStatsMiddleware
 from app.api.v1.router import api_router
+from app.core.security import shutdown_password_hasher
 from app.db.base import init_db
+from app.db.group_commit import shutdown_group_committers
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application lifespan manager.
-    Initializes database tables on startup.
+    Brings the database schema up to date on startup (one SELECT when it already is).
     """
     # Startup
     init_db()
     yield
-    # Shutdown (no cleanup needed for this simple app)
+    # Shutdown
+    shutdown_group_committers()
+    shutdown_password_hasher()
 
 
 def create_app() -> FastAPI:
@@ -29,14 +36,32 @@ def create_app() -> FastAPI:
         lifespan=lifespan,
     )
 
-    # CORS middleware - allow all origins to bypass CORS issues
+    if settings.max_concurrent_requests:
+        # Inside CORS, so browsers can read the 503; probes and long-lived streams are never shed
+        app.add_middleware(
+            ConcurrencyLimitMiddleware,
+            max_concurrent=settings.max_concurrent_requests,
+            exempt_prefixes=(
+                f"{settings.api_prefix}/health",
+                f"{settings.api_prefix}/metrics",
+                f"{settings.api_prefix}/tasks/events",
+            ),
+        )
+
+    # CORS middleware - BACKEND_CORS_ORIGINS defaults to "*", allowing all origins
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=["*"],
+        allow_origins=settings.parsed_cors_origins,
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor", "Retry-After"],
     )
+    if settings.sql_instrumentation_enabled:
+        app.add_middleware(QueryStatsMiddleware)
+    if settings.metrics_enabled:
+        # Outermost, so the timing includes CORS handling and every other middleware
+        app.add_middleware(MetricsMiddleware)
 
     # Root endpoint
     @app.get("/", include_in_schema=False)
@@ -57,6 +82,7 @@ app = create_app()
 
 
 if __name__ == "__main__":
-    import uvicorn
+    # Same as `python -m app.server`; for auto-reload while developing, use `uvicorn app.main:app --reload`
+    from app.server import main
 
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    raise SystemExit(main(app=app))
@@ -1,5 +1,9 @@
 from app.models.base import Base
+from app.models.schema_version import SchemaVersion
 from app.models.task import Task
+from app.models.task_list_version import TaskListVersion
+from app.models.task_stats import TaskStats
+from app.models.task_tombstone import TaskTombstone
 from app.models.user import User
 
-__all__ = ["Base", "Task", "User"]
+__all__ = ["Base", "SchemaVersion", "Task", "TaskListVersion", "TaskStats", "TaskTombstone", "User"]
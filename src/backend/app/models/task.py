@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -10,6 +10,12 @@ from app.models.base import Base
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves keyset pagination: WHERE user_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+        Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Serves delta sync: WHERE user_id = ? AND change_version > ? ORDER BY change_version
+        Index("ix_tasks_user_id_change_version", "user_id", "change_version"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -23,5 +29,7 @@ class Task(Base):
         onupdate=datetime.utcnow,
         nullable=False,
     )
+    # The owner's task list version at this task's last write; the delta sync cursor compares against it
+    change_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     owner: Mapped["User"] = relationship(back_populates="tasks")
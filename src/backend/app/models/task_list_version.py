@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from sqlalchemy import ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class TaskListVersion(Base):
+    """Per-user counter bumped on every task mutation; drives the ETag of GET /tasks."""
+
+    __tablename__ = "task_list_versions"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class TaskTombstone(Base):
+    """A deleted task's id, kept so GET /tasks/changes can report the deletion to syncing clients."""
+
+    __tablename__ = "task_tombstones"
+    __table_args__ = (
+        # Serves the delta query: WHERE user_id = ? AND version > ?
+        Index("ix_task_tombstones_user_id_version", "user_id", "version"),
+        # Serves the retention purge: WHERE deleted_at < ?
+        Index("ix_task_tombstones_deleted_at", "deleted_at"),
+    )
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    task_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # The user's task list version the deletion was committed at
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
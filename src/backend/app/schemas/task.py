@@ -1,6 +1,9 @@
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
+
+from app.core.config import settings
 
 
 class TaskBase(BaseModel):
@@ -27,3 +30,49 @@ class TaskRead(TaskBase):
     model_config = {
         "from_attributes": True
     }
+
+
+class TaskStatsRead(BaseModel):
+    total: int
+    completed: int
+    pending: int
+
+
+class TaskChangesRead(BaseModel):
+    # Apply `deleted` before `tasks`: an id can be deleted and then reused by a new task
+    tasks: list[TaskRead]
+    deleted: list[int]
+    cursor: str
+
+
+class TaskBatchCreate(BaseModel):
+    items: list[TaskCreate] = Field(min_length=1, max_length=settings.tasks_batch_max_items)
+
+
+class TaskBatchUpdateItem(TaskUpdate):
+    id: int
+
+
+class TaskBatchUpdate(BaseModel):
+    items: list[TaskBatchUpdateItem] = Field(min_length=1, max_length=settings.tasks_batch_max_items)
+
+    @field_validator("items")
+    @classmethod
+    def unique_ids(cls, items: list[TaskBatchUpdateItem]) -> list[TaskBatchUpdateItem]:
+        if len({item.id for item in items}) != len(items):
+            raise ValueError("Each task id may appear only once per batch")
+        return items
+
+
+class TaskBatchIds(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=settings.tasks_batch_max_items)
+
+
+class TaskBatchItemResult(BaseModel):
+    id: int
+    status: Literal["created", "updated", "deleted", "not_found"]
+    task: TaskRead | None = None
+
+
+class TaskBatchResult(BaseModel):
+    results: list[TaskBatchItemResult]
@@ -0,0 +1,337 @@
+"""
+Production launcher: preload the app once, then fork worker processes sharing one socket.
+
+    python -m app.server [--host 0.0.0.0] [--port 8000] [--workers N]
+
+The master imports the app and brings the schema up to date before forking, so workers
+share the imported code copy-on-write and boot in milliseconds. Each worker forgets the
+inherited connection pools straight after the fork; pooled connections are never shared
+between processes. The master keeps the listening socket, so connections wait in its
+backlog rather than being refused while a worker is replaced.
+
+Signals to the master:
+
+- SIGTERM / SIGINT: graceful shutdown. Workers stop accepting, finish in-flight requests
+  (up to WORKER_GRACEFUL_TIMEOUT_SECONDS) and exit.
+- SIGHUP: rolling restart. Workers are replaced one at a time, each old one retired only
+  once its replacement is serving. New workers are forked from the preloaded master, so
+  this recycles processes; deploying new code means restarting the master.
+
+With WORKER_MAX_REQUESTS set, a worker exits after that many requests (plus up to 10%
+jitter, so workers do not all recycle at once) and the master forks a fresh one.
+
+Without WEB_CONCURRENCY / --workers, one worker per CPU is started only once nothing is kept
+per process: change events and rate limits in Redis, and the token cache off. Otherwise the
+default is a single worker, since separate workers would each see only their own events,
+budgets and cache.
+"""
+import argparse
+import inspect
+import logging
+import math
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import uvicorn
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+# A worker that has not started serving within this long is treated as failed
+BOOT_TIMEOUT_SECONDS = 60.0
+_READY = b"1"
+# Newer uvicorn spreads WORKER_MAX_REQUESTS itself; with older releases each worker adds its own jitter
+CONFIG_HAS_JITTER = "limit_max_requests_jitter" in inspect.signature(uvicorn.Config).parameters
+
+
+def cpu_quota(cgroup_root: Path = CGROUP_ROOT) -> float | None:
+    """CPUs granted by the container's cgroup CPU quota (v2, then v1); None when unlimited or unknown."""
+    try:
+        quota, period = (cgroup_root / "cpu.max").read_text().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int((cgroup_root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((cgroup_root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def default_worker_count(cgroup_root: Path = CGROUP_ROOT) -> int:
+    """One worker per CPU this process may use, capped by the container's CPU quota."""
+    try:
+        available = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        available = os.cpu_count() or 1
+    quota = cpu_quota(cgroup_root)
+    if quota is not None:
+        available = min(available, math.ceil(quota))
+    return max(available, 1)
+
+
+def per_process_state() -> list[str]:
+    """Enabled features whose state each worker keeps to itself, by the setting that causes it."""
+    local = []
+    if settings.events_enabled and settings.events_backend == "local":
+        local.append("EVENTS_BACKEND=local")
+    if settings.rate_limit_enabled and settings.rate_limit_backend == "local":
+        local.append("RATE_LIMIT_BACKEND=local")
+    if settings.auth_cache_enabled:
+        # Invalidated from mapper hooks, which only fire in the worker that made the change
+        local.append("AUTH_CACHE_ENABLED=true")
+    return local
+
+
+def choose_worker_count(requested: int | None) -> int:
+    """`requested` if given; else one per CPU, or a single worker while state is per process."""
+    if requested:
+        return requested
+    local = per_process_state()
+    if local:
+        logger.info("Serving from one worker: %s keep state per process; set WEB_CONCURRENCY to override",
+                    ", ".join(local))
+        return 1
+    return default_worker_count()
+
+
+class WorkerServer(uvicorn.Server):
+    """
+    A uvicorn Server that writes to `ready_fd` once it is accepting connections, and exits
+    on its own if the master process disappears.
+    """
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+        self.master_pid = os.getppid()
+
+    async def startup(self, sockets: list[socket.socket] | None = None) -> None:
+        await super().startup(sockets)
+        if self.started:
+            os.write(self.ready_fd, _READY)
+        # Closing without writing tells the master this worker failed to start
+        os.close(self.ready_fd)
+
+    async def on_tick(self, counter: int) -> bool:
+        if counter % 10 == 0 and os.getppid() != self.master_pid:
+            # The master died without stopping us; nobody would ever reap or replace this worker
+            logger.warning("Master process %d is gone; worker %d exiting", self.master_pid, os.getpid())
+            self.should_exit = True
+        return await super().on_tick(counter)
+
+
+def _run_worker(config: uvicorn.Config, listener: socket.socket, ready_fd: int) -> None:
+    from app.db.session import dispose_engines
+
+    # The master's handlers only make sense in the master; uvicorn installs its own for INT/TERM
+    for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    dispose_engines(close=False)
+    if not CONFIG_HAS_JITTER and config.limit_max_requests:
+        # The config was copied by the fork, so this worker's limit is its own
+        config.limit_max_requests += random.randint(0, config.limit_max_requests // 10)
+    WorkerServer(config, ready_fd).run(sockets=[listener])
+
+
+class Arbiter:
+    """Keeps `worker_count` forked workers serving `listener`; see the module docstring for signals."""
+
+    def __init__(self, config: uvicorn.Config, listener: socket.socket, worker_count: int):
+        self.config = config
+        self.listener = listener
+        self.worker_count = worker_count
+        self.workers: set[int] = set()
+        # Workers told to stop; they are not replaced when they exit
+        self.retiring: set[int] = set()
+        self.stopping = False
+        self.reload_requested = False
+
+    def spawn(self) -> tuple[int, int]:
+        """Fork a worker; returns its pid and the read end of its readiness pipe."""
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            status = 0
+            try:
+                _run_worker(self.config, self.listener, ready_w)
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                status = 1
+            finally:
+                os._exit(status)
+        os.close(ready_w)
+        self.workers.add(pid)
+        logger.info("Booting worker with pid: %d", pid)
+        return pid, ready_r
+
+    def wait_ready(self, pid: int, ready_r: int) -> bool:
+        try:
+            readable, _, _ = select.select([ready_r], [], [], BOOT_TIMEOUT_SECONDS)
+            ready = bool(readable) and os.read(ready_r, 1) == _READY
+        finally:
+            os.close(ready_r)
+        if ready:
+            logger.info("Worker %d ready", pid)
+        else:
+            logger.error("Worker %d failed to start", pid)
+        return ready
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        booting = [self.spawn() for _ in range(self.worker_count)]
+        if not all([self.wait_ready(pid, ready_r) for pid, ready_r in booting]):
+            self.shutdown()
+            return 1
+
+        while not self.stopping:
+            self.reap(respawn=True)
+            if self.reload_requested:
+                self.reload_requested = False
+                self.rolling_restart()
+            time.sleep(0.1)
+
+        self.shutdown()
+        return 0
+
+    def reap(self, respawn: bool) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.workers.discard(pid)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code == 0:
+                # Exited on its own: WORKER_MAX_REQUESTS reached
+                logger.info("Worker %d recycled", pid)
+            else:
+                logger.warning("Worker %d exited with status %d", pid, code)
+            if respawn and not self.stopping:
+                self.spawn_ready()
+
+    def spawn_ready(self) -> bool:
+        return self.wait_ready(*self.spawn())
+
+    def rolling_restart(self) -> None:
+        logger.info("Rolling restart of %d worker(s)", len(self.workers))
+        for old_pid in list(self.workers - self.retiring):
+            if self.stopping:
+                return
+            if not self.spawn_ready():
+                logger.error("Rolling restart aborted; the remaining workers keep serving")
+                return
+            self.retiring.add(old_pid)
+            os.kill(old_pid, signal.SIGTERM)
+
+    def shutdown(self) -> None:
+        logger.info("Shutting down %d worker(s)", len(self.workers))
+        for pid in self.workers:
+            self.retiring.add(pid)
+            os.kill(pid, signal.SIGTERM)
+        # uvicorn enforces the graceful timeout itself; the margin covers lifespan shutdown
+        deadline = time.monotonic() + settings.worker_graceful_timeout_seconds + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap(respawn=False)
+            time.sleep(0.05)
+        for pid in self.workers:
+            logger.warning("Worker %d did not stop in time; killing it", pid)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.clear()
+
+    def _handle_stop(self, signum: int, frame: Any) -> None:
+        self.stopping = True
+
+    def _handle_reload(self, signum: int, frame: Any) -> None:
+        self.reload_requested = True
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.web_concurrency or None,
+        help="Worker processes (default: WEB_CONCURRENCY, else one per available CPU once events, "
+             "rate limits and the token cache are not per process, else 1)",
+    )
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args(argv)
+
+
+def build_config(app: Any, args: argparse.Namespace) -> uvicorn.Config:
+    max_requests = settings.worker_max_requests or None
+    options: dict[str, Any] = {}
+    if CONFIG_HAS_JITTER:
+        options["limit_max_requests_jitter"] = (max_requests or 0) // 10
+    return uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        # The master already did this once; each worker's lifespan check is then a single SELECT
+        lifespan="on",
+        timeout_graceful_shutdown=math.ceil(settings.worker_graceful_timeout_seconds),
+        limit_max_requests=max_requests,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.forwarded_allow_ips,
+        **options,
+    )
+
+
+def main(argv: list[str] | None = None, app: Any = None) -> int:
+    args = parse_args(argv)
+    worker_count = choose_worker_count(args.workers)
+
+    if app is None:
+        from app.main import app
+    from app.db.base import init_db
+    from app.db.session import dispose_engines
+
+    config = build_config(app, args)
+    init_db()
+    # Nothing pooled may survive into the forks
+    dispose_engines()
+
+    if worker_count > 1:
+        for setting in per_process_state():
+            logger.warning("%s with %d workers: each worker only sees its own share of this state", setting, worker_count)
+
+    if not hasattr(os, "fork"):
+        logger.warning("os.fork is unavailable; serving from a single process")
+        uvicorn.Server(config).run()
+        return 0
+
+    listener = config.bind_socket()
+    listener.set_inheritable(True)
+    logger.info("Started master process [%d] with %d worker(s)", os.getpid(), worker_count)
+    try:
+        return Arbiter(config, listener, worker_count).run()
+    finally:
+        listener.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
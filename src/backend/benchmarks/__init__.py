@@ -0,0 +1,11 @@
+"""
+Load-test and benchmark suite for the Todo API.
+
+Drives the real application (app.main:app) in-process over ASGI with
+controlled concurrency, against a database seeded with synthetic users and
+tasks, and reports throughput, per-route latency percentiles and queries per
+request. See `python -m benchmarks.run --help`.
+
+`python -m benchmarks.startup` measures import time and time to the first
+successful /api/health of a freshly spawned server.
+"""
@@ -0,0 +1,163 @@
+"""
+Compare the CLI's task stores (todo_cli.py at the repository root): memory held per task
+and throughput of the TodoCLI commands, for each store and list size.
+
+    python -m benchmarks.cli_store --tasks 1000000 5000000 --sample 200000 --output cli_store.json
+
+Every store and size is measured in a fresh interpreter, so one case's heap does not
+inflate the next one's memory figure. The task count is reached with add_task; the other
+operations then run on a random sample of IDs.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks import report
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+# "dict" is the layout before the compact stores: a Task with a per-instance __dict__, in a dict
+STORES = ("dict", "records", "columnar")
+OPERATIONS = ("add", "lookup", "update", "complete", "delete")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1_000_000, 5_000_000], help="List sizes to measure")
+    parser.add_argument("--stores", nargs="+", choices=STORES, default=list(STORES))
+    parser.add_argument("--sample", type=int, default=200_000, help="Operations per measured command after the load")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Write the JSON result here")
+    # Internal: measure one case in this process and print its JSON
+    parser.add_argument("--case", nargs=2, metavar=("STORE", "TASKS"), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def resident_bytes() -> int:
+    """Current resident set size; the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds) if seconds > 0 else 0.0
+
+
+def _dict_store(todo_cli: Any) -> Any:
+    class DictTask:
+        def __init__(self, task_id: int, title: str, description: str = "", completed: bool = False):
+            self.id = task_id
+            self.title = title
+            self.description = description
+            self.completed = completed
+
+    class DictTaskStore(todo_cli.TaskStore):
+        def add(self, task_id: int, title: str, description: str = "", completed: bool = False) -> None:
+            self._tasks[task_id] = DictTask(task_id, title, description, completed)
+
+    return DictTaskStore()
+
+
+def measure_case(store_name: str, tasks: int, sample: int, seed: int) -> dict[str, Any]:
+    sys.path.insert(0, str(REPO_ROOT))
+    import todo_cli
+
+    rng = random.Random(seed)
+    store = _dict_store(todo_cli) if store_name == "dict" else todo_cli.STORES[store_name]()
+    cli = todo_cli.TodoCLI(quiet=True, store=store)
+    before = resident_bytes()
+
+    start = time.perf_counter()
+    for i in range(1, tasks + 1):
+        cli.add_task(f"Task number {i}", f"Description of task {i}" if i % 2 else "")
+    add_seconds = time.perf_counter() - start
+    held = resident_bytes() - before
+
+    ids = rng.sample(range(1, tasks + 1), min(sample, tasks))
+    timings = {"add": _rate(tasks, add_seconds)}
+
+    start = time.perf_counter()
+    for task_id in ids:
+        cli.tasks[task_id]
+    timings["lookup"] = _rate(len(ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for task_id in ids:
+        cli.update_task(task_id, f"Renamed task {task_id}")
+    timings["update"] = _rate(len(ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for task_id in ids:
+        cli.complete_task(task_id)
+    timings["complete"] = _rate(len(ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for task_id in ids:
+        cli.delete_task(task_id)
+    timings["delete"] = _rate(len(ids), time.perf_counter() - start)
+
+    return {
+        "store": store_name,
+        "tasks": tasks,
+        "memory_mb": round(held / 2**20, 1),
+        "bytes_per_task": round(held / tasks, 1),
+        "ops_per_s": timings,
+    }
+
+
+def run_case(store_name: str, tasks: int, args: argparse.Namespace) -> dict[str, Any]:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.cli_store", "--case", store_name, str(tasks),
+         "--sample", str(args.sample), "--seed", str(args.seed)],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout)
+
+
+def format_table(result: dict[str, Any]) -> str:
+    header = f"{'store':<10} {'tasks':>10} {'memory MB':>10} {'B/task':>8}" + "".join(
+        f" {name + '/s':>11}" for name in OPERATIONS
+    )
+    lines = [header, "-" * len(header)]
+    for case in result["cases"]:
+        rates = "".join(f" {case['ops_per_s'][name]:>11,.0f}" for name in OPERATIONS)
+        lines.append(
+            f"{case['store']:<10} {case['tasks']:>10,} {case['memory_mb']:>10.1f} {case['bytes_per_task']:>8.1f}{rates}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.case:
+        store_name, tasks = args.case
+        print(json.dumps(measure_case(store_name, int(tasks), args.sample, args.seed)))
+        return 0
+
+    result = {
+        "config": {"sample": args.sample, "seed": args.seed, "python": sys.version.split()[0]},
+        "cases": [run_case(store_name, tasks, args) for tasks in args.tasks for store_name in args.stores],
+    }
+    print(format_table(result))
+    if args.output:
+        report.save(result, args.output)
+        print(f"\nResult written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import json
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(len(sorted_values) * pct / 100))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class RouteSamples:
+    latencies_ms: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    errors: int = 0
+
+
+class Recorder:
+    def __init__(self):
+        self.routes: dict[str, RouteSamples] = defaultdict(RouteSamples)
+
+    def record(self, route: str, latency_ms: float, queries: int, ok: bool) -> None:
+        samples = self.routes[route]
+        samples.latencies_ms.append(latency_ms)
+        samples.queries.append(queries)
+        if not ok:
+            samples.errors += 1
+
+    def summary(self, duration_s: float, config: dict[str, Any]) -> dict[str, Any]:
+        routes = {}
+        total = 0
+        for route, samples in sorted(self.routes.items()):
+            latencies = sorted(samples.latencies_ms)
+            count = len(latencies)
+            total += count
+            routes[route] = {
+                "count": count,
+                "errors": samples.errors,
+                "throughput_rps": round(count / duration_s, 2) if duration_s else 0.0,
+                "mean_ms": round(sum(latencies) / count, 3),
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+                "queries_per_request": round(sum(samples.queries) / count, 2),
+            }
+        return {
+            "config": config,
+            "total": {
+                "requests": total,
+                "duration_s": round(duration_s, 3),
+                "throughput_rps": round(total / duration_s, 2) if duration_s else 0.0,
+            },
+            "routes": routes,
+        }
+
+
+# Lower is better for latencies and query counts; higher is better for throughput
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries_per_request")
+
+
+def compare(result: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> list[str]:
+    """Return a human-readable line for every metric that regressed by more than `max_regression` (0.2 = 20%)."""
+    regressions = []
+    for route, current in result["routes"].items():
+        previous = baseline.get("routes", {}).get(route)
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = previous.get(metric, 0), current.get(metric, 0)
+            if old > 0 and new > old * (1 + max_regression):
+                regressions.append(f"{route} {metric}: {old} -> {new} (+{(new / old - 1) * 100:.1f}%)")
+
+    old_rps = baseline.get("total", {}).get("throughput_rps", 0)
+    new_rps = result["total"]["throughput_rps"]
+    if old_rps > 0 and new_rps < old_rps * (1 - max_regression):
+        regressions.append(f"total throughput_rps: {old_rps} -> {new_rps} ({(new_rps / old_rps - 1) * 100:.1f}%)")
+    return regressions
+
+
+def format_table(result: dict[str, Any]) -> str:
+    header = f"{'route':<40} {'count':>7} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'q/req':>6}"
+    lines = [header, "-" * len(header)]
+    for route, stats in result["routes"].items():
+        lines.append(
+            f"{route:<40} {stats['count']:>7} {stats['errors']:>5} {stats['p50_ms']:>9.2f} "
+            f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['queries_per_request']:>6.2f}"
+        )
+    total = result["total"]
+    lines.append(f"\n{total['requests']} requests in {total['duration_s']}s -> {total['throughput_rps']} req/s")
+    return "\n".join(lines)
+
+
+def load(path: Path) -> dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save(result: dict[str, Any], path: Path) -> None:
+    path.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
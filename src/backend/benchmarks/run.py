@@ -0,0 +1,261 @@
+"""
+Run the API benchmark.
+
+    python -m benchmarks.run --users 20 --tasks-per-user 2000 --concurrency 16 --requests 5000 \
+        --output base.json
+    python -m benchmarks.run --users 20 --tasks-per-user 2000 --concurrency 16 --requests 5000 \
+        --output bench.json --baseline base.json --max-regression 0.2
+
+Exits with status 1 when any route regressed past --max-regression versus the baseline.
+Results depend on the machine, so no baseline is committed: record one from the base
+revision on the same machine, then run the change against it (see README.md).
+"""
+import argparse
+import asyncio
+import contextvars
+import os
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+from sqlalchemy import event
+
+from benchmarks import report
+
+# Matches benchmarks.seed.BENCH_PASSWORD; that module imports app/, which must wait for configure_environment()
+BENCH_PASSWORD = "benchmark-password"
+
+DEFAULT_MIX = "list=60,create=12,update=10,complete=8,delete=5,login=4,register=1"
+
+_query_counter: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar("bench_query_counter", default=None)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Defaults to a fresh SQLite file in a temp directory")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tasks-per-user", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000, help="Measured requests (after warmup)")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted operation mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--page-size", type=int, default=50, help="limit for list requests; 0 lists everything")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--async-db", action="store_true", help="Run with DB_ASYNC=true")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the operation mix")
+    parser.add_argument("--output", type=Path, help="Write the JSON result here")
+    parser.add_argument("--baseline", type=Path, help="Compare against this stored JSON result")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"Unknown operation in --mix: {name!r} (choose from {', '.join(OPERATIONS)})")
+        weights[name.strip()] = int(weight)
+    return weights
+
+
+def configure_environment(args: argparse.Namespace, workdir: Path) -> None:
+    # Settings are read at import time, so this must run before anything under app/ is imported
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+pysqlite:///{workdir / 'bench.db'}"
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ["DB_ASYNC"] = "true" if args.async_db else "false"
+    # Measure the request path itself: the per-IP auth budget and load shedding would turn
+    # the setup logins and registers into 429s and 503s
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["MAX_CONCURRENT_REQUESTS"] = "0"
+
+
+def _count_query(*_args) -> None:
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    user_id: int = 0
+    headers: dict[str, str] = field(default_factory=dict)
+    task_ids: list[int] = field(default_factory=list)
+
+
+Operation = Callable[[httpx.AsyncClient, VirtualUser, random.Random, argparse.Namespace], Awaitable[tuple[str, bool]]]
+
+
+async def op_list(client, user, rng, args):
+    params = {"limit": args.page_size} if args.page_size else {}
+    response = await client.get("/api/tasks", params=params, headers=user.headers)
+    return "GET /api/tasks", response.status_code == 200
+
+
+async def op_create(client, user, rng, args):
+    response = await client.post("/api/tasks", json={"title": f"Bench {rng.random()}"}, headers=user.headers)
+    if response.status_code == 201:
+        user.task_ids.append(response.json()["id"])
+    return "POST /api/tasks", response.status_code == 201
+
+
+async def op_update(client, user, rng, args):
+    if not user.task_ids:
+        return await op_create(client, user, rng, args)
+    task_id = rng.choice(user.task_ids)
+    response = await client.put(f"/api/tasks/{task_id}", json={"title": f"Edited {rng.random()}"}, headers=user.headers)
+    return "PUT /api/tasks/{task_id}", response.status_code == 200
+
+
+async def op_complete(client, user, rng, args):
+    if not user.task_ids:
+        return await op_create(client, user, rng, args)
+    task_id = rng.choice(user.task_ids)
+    response = await client.patch(f"/api/tasks/{task_id}/complete", headers=user.headers)
+    return "PATCH /api/tasks/{task_id}/complete", response.status_code == 200
+
+
+async def op_delete(client, user, rng, args):
+    if not user.task_ids:
+        return await op_create(client, user, rng, args)
+    task_id = user.task_ids.pop(rng.randrange(len(user.task_ids)))
+    response = await client.delete(f"/api/tasks/{task_id}", headers=user.headers)
+    return "DELETE /api/tasks/{task_id}", response.status_code == 204
+
+
+async def op_login(client, user, rng, args):
+    response = await client.post("/api/auth/login", data={"username": user.email, "password": BENCH_PASSWORD})
+    return "POST /api/auth/login", response.status_code == 200
+
+
+async def op_register(client, user, rng, args):
+    email = f"bench-register-{rng.getrandbits(64):x}@example.com"
+    response = await client.post("/api/auth/register", json={"email": email, "password": BENCH_PASSWORD})
+    return "POST /api/auth/register", response.status_code == 201
+
+
+OPERATIONS: dict[str, Operation] = {
+    "list": op_list,
+    "create": op_create,
+    "update": op_update,
+    "complete": op_complete,
+    "delete": op_delete,
+    "login": op_login,
+    "register": op_register,
+}
+
+
+async def _login(client: httpx.AsyncClient, user: VirtualUser) -> None:
+    response = await client.post("/api/auth/login", data={"username": user.email, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    user.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    from app.core.config import settings
+    from app.core.security import get_password_hash, shutdown_password_hasher
+    from app.db.base import init_db
+    from app.db.session import engine, get_async_engine
+    from app.main import app
+    from benchmarks.seed import seed, task_ids_by_user
+
+    init_db()
+    user_ids = seed(engine, args.users, args.tasks_per_user, get_password_hash(BENCH_PASSWORD))
+
+    event.listen(engine, "before_cursor_execute", _count_query)
+    if settings.db_async:
+        event.listen(get_async_engine().sync_engine, "before_cursor_execute", _count_query)
+
+    ids = task_ids_by_user(engine)
+    users = [
+        VirtualUser(email=email, user_id=user_id, task_ids=ids.get(user_id, []))
+        for email, user_id in user_ids.items()
+    ]
+
+    weights = parse_mix(args.mix)
+    names, cumulative = list(weights), list(weights.values())
+    recorder = report.Recorder()
+    remaining = args.warmup + args.requests
+    measured_start: float | None = None
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def login(user: VirtualUser) -> None:
+            async with semaphore:
+                await _login(client, user)
+
+        await asyncio.gather(*(login(user) for user in users))
+
+        async def worker(worker_id: int) -> None:
+            nonlocal remaining, measured_start
+            rng = random.Random(args.seed * 1000 + worker_id)
+            while remaining > 0:
+                remaining -= 1
+                measuring = remaining < args.requests
+                if measuring and measured_start is None:
+                    measured_start = time.perf_counter()
+
+                user = rng.choice(users)
+                operation = OPERATIONS[rng.choices(names, cumulative)[0]]
+                counter = [0]
+                token = _query_counter.set(counter)
+                start = time.perf_counter()
+                try:
+                    route, ok = await operation(client, user, rng, args)
+                finally:
+                    _query_counter.reset(token)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if measuring:
+                    recorder.record(route, elapsed_ms, counter[0], ok)
+
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+
+    duration = time.perf_counter() - (measured_start or time.perf_counter())
+    shutdown_password_hasher()
+
+    config = {
+        "users": args.users,
+        "tasks_per_user": args.tasks_per_user,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "mix": weights,
+        "page_size": args.page_size,
+        "bcrypt_rounds": args.bcrypt_rounds,
+        "async_db": args.async_db,
+        "database": engine.dialect.name,
+    }
+    return recorder.summary(duration, config)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="todo-bench-") as workdir:
+        configure_environment(args, Path(workdir))
+        result = asyncio.run(run_benchmark(args))
+
+    print(report.format_table(result))
+    if args.output:
+        report.save(result, args.output)
+        print(f"\nResult written to {args.output}")
+
+    if args.baseline:
+        regressions = report.compare(result, report.load(args.baseline), args.max_regression)
+        if regressions:
+            print(f"\nRegressions beyond {args.max_regression:.0%} versus {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.max_regression:.0%} versus {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import Engine, insert, select
+
+from app.models.task import Task
+from app.models.user import User
+
+BENCH_PASSWORD = "benchmark-password"
+
+
+def bench_email(index: int) -> str:
+    return f"bench-user-{index}@example.com"
+
+
+def seed(
+    engine: Engine, users: int, tasks_per_user: int, hashed_password: str, batch_size: int = 5000
+) -> dict[str, int]:
+    """Insert `users` users with `tasks_per_user` tasks each, using multi-row INSERTs. Returns user ids by email."""
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        connection.execute(
+            insert(User),
+            [{"email": bench_email(i), "hashed_password": hashed_password, "created_at": now} for i in range(users)],
+        )
+        user_ids = dict(connection.execute(select(User.email, User.id).where(User.email.like("bench-user-%"))).all())
+
+        batch = []
+        for user_id in user_ids.values():
+            for n in range(tasks_per_user):
+                # Spread creation times so ordering and keyset pagination behave like real data
+                created_at = now - timedelta(seconds=tasks_per_user - n)
+                batch.append(
+                    {
+                        "user_id": user_id,
+                        "title": f"Task {n}",
+                        "description": f"Synthetic task {n} for user {user_id}",
+                        "is_completed": n % 3 == 0,
+                        "created_at": created_at,
+                        "updated_at": created_at,
+                    }
+                )
+                if len(batch) >= batch_size:
+                    connection.execute(insert(Task), batch)
+                    batch = []
+        if batch:
+            connection.execute(insert(Task), batch)
+    return user_ids
+
+
+def task_ids_by_user(engine: Engine) -> dict[int, list[int]]:
+    ids: dict[int, list[int]] = {}
+    with engine.connect() as connection:
+        for task_id, user_id in connection.execute(select(Task.id, Task.user_id)):
+            ids.setdefault(user_id, []).append(task_id)
+    return ids
@@ -0,0 +1,150 @@
+"""
+Measure cold-start cost: how long `import app.main` takes in a fresh interpreter, and how
+long a new uvicorn process takes to answer its first successful GET /api/health.
+
+    python -m benchmarks.startup --runs 5 --output startup.json
+
+Boots are measured twice: against an empty database (the schema is created) and against an
+up-to-date one (a single schema-version SELECT), the case every new replica should hit.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any
+
+from benchmarks import report
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+IMPORT_PROBE = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Repetitions of each measurement")
+    parser.add_argument("--database-url", help="Defaults to a SQLite file in a temp directory")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Give up on a boot after this many seconds")
+    parser.add_argument("--output", type=Path, help="Write the JSON result here")
+    return parser.parse_args(argv)
+
+
+def summarize(samples_s: list[float]) -> dict[str, float]:
+    ordered = sorted(samples_s)
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 1),
+        "median_ms": round(statistics.median(ordered) * 1000, 1),
+        "p95_ms": round(report.percentile(ordered, 95) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+def _environment(database_url: str) -> dict[str, str]:
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return env
+
+
+def measure_import(database_url: str) -> float:
+    completed = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=BACKEND_DIR,
+        env=_environment(database_url),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_health(database_url: str, timeout: float) -> float:
+    """Seconds from spawning the server process to its first 200 from /api/health."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/api/health"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=_environment(database_url),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {process.returncode}: {process.stderr.read().decode()}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.005)
+        raise TimeoutError(f"No successful response from {url} within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def run(args: argparse.Namespace, workdir: Path) -> dict[str, Any]:
+    imports, cold_boots, warm_boots = [], [], []
+    for run_index in range(args.runs):
+        if args.database_url:
+            database_url = args.database_url
+        else:
+            database_url = f"sqlite+pysqlite:///{workdir / f'startup-{run_index}.db'}"
+            # Empty database: the first boot creates the schema
+            cold_boots.append(measure_first_health(database_url, args.timeout))
+        warm_boots.append(measure_first_health(database_url, args.timeout))
+        imports.append(measure_import(database_url))
+
+    result = {
+        "config": {"runs": args.runs, "python": sys.version.split()[0], "database": database_url.split(":", 1)[0]},
+        "import": summarize(imports),
+        "first_health_current_schema": summarize(warm_boots),
+    }
+    if cold_boots:
+        result["first_health_empty_database"] = summarize(cold_boots)
+    return result
+
+
+def format_table(result: dict[str, Any]) -> str:
+    header = f"{'measurement':<30} {'min ms':>9} {'median ms':>10} {'p95 ms':>9} {'max ms':>9}"
+    lines = [header, "-" * len(header)]
+    for name, stats in result.items():
+        if name == "config":
+            continue
+        lines.append(
+            f"{name:<30} {stats['min_ms']:>9.1f} {stats['median_ms']:>10.1f} {stats['p95_ms']:>9.1f} {stats['max_ms']:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="todo-startup-") as workdir:
+        result = run(args, Path(workdir))
+
+    print(format_table(result))
+    if args.output:
+        report.save(result, args.output)
+        print(f"\nResult written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
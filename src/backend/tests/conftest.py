@@ -5,14 +5,17 @@ from typing import Generator
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-TEST_DATABASE_URL = "sqlite+pysqlite:///:memory:"
+# Named shared-cache in-memory database so the sync and async engines see the same tables
+TEST_DATABASE_URL = "sqlite+pysqlite:///file:todo_test?mode=memory&cache=shared&uri=true"
+TEST_ASYNC_DATABASE_URL = "sqlite+aiosqlite:///file:todo_test?mode=memory&cache=shared&uri=true"
 engine = create_engine(
     TEST_DATABASE_URL,
     connect_args={"check_same_thread": False},
@@ -23,11 +26,15 @@ TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=Fals
 
 @pytest.fixture(scope="function", autouse=True)
 def setup_database():
+    from app.core.rate_limit import rate_limiter
+    from app.deps import token_cache
     from app.models.base import Base
 
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+    token_cache.clear()
+    rate_limiter.store.clear()
 
 
 def override_get_db() -> Generator:
@@ -38,12 +45,26 @@ def override_get_db() -> Generator:
         db.close()
 
 
-@pytest.fixture()
-def client() -> Generator[TestClient, None, None]:
+@pytest.fixture(params=["sync", "async"])
+def client(request, monkeypatch) -> Generator[TestClient, None, None]:
     from app import app
+    from app.core.config import settings
+    from app.db import session as db_session
+
+    async_engine = create_async_engine(TEST_ASYNC_DATABASE_URL, poolclass=NullPool)
+    testing_async_sessionmaker = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(settings, "db_async", request.param == "async")
+
+    async def override_get_sessionmaker():
+        return TestingSessionLocal
+
+    async def override_get_async_db_sessionmaker():
+        return testing_async_sessionmaker if settings.db_async else None
 
     app.dependency_overrides.clear()
-    app.dependency_overrides[__import__("app.db.session", fromlist=["get_db"]).get_db] = override_get_db
+    app.dependency_overrides[db_session.get_db] = override_get_db
+    app.dependency_overrides[db_session.get_sessionmaker] = override_get_sessionmaker
+    app.dependency_overrides[db_session.get_async_db_sessionmaker] = override_get_async_db_sessionmaker
 
     with TestClient(app) as test_client:
         yield test_client
@@ -69,3 +69,80 @@ def test_access_protected_route_with_invalid_token(client: TestClient):
     )
     assert response.status_code == 401
     assert response.json()["detail"] == "Could not validate credentials"
+
+
+def test_authenticated_requests_hit_token_cache(client: TestClient):
+    from app.deps import token_cache
+
+    email = "cached@example.com"
+    register_user(client, email, "password123")
+    token = login_user(client, email, "password123")["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/api/tasks", headers=headers).status_code == 200
+    before = token_cache.stats()
+    assert client.get("/api/tasks", headers=headers).status_code == 200
+    after = token_cache.stats()
+
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+
+
+def test_token_cache_expiry_and_invalidation():
+    import time
+
+    from app.core.auth_cache import TokenCache
+
+    cache = TokenCache(max_entries=2, ttl_seconds=60)
+    cache.set("token-a", 1, "principal-a", None)
+    cache.set("token-b", 2, "principal-b", None)
+    assert cache.get("token-a") == "principal-a"
+
+    # Capacity is bounded; least recently used entry goes first
+    cache.set("token-c", 3, "principal-c", None)
+    assert cache.get("token-b") is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.invalidate_user(1)
+    assert cache.get("token-a") is None
+
+    # Already-expired tokens are never cached
+    cache.set("token-d", 4, "principal-d", int(time.time()) - 1)
+    assert cache.get("token-d") is None
+
+
+def test_login_rehashes_password_when_bcrypt_cost_changes(client: TestClient, monkeypatch):
+    from conftest import TestingSessionLocal
+
+    from app.core.config import settings
+    from app.models.user import User
+
+    email = "rehash@example.com"
+    register_user(client, email, "password123")
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    login_user(client, email, "password123")
+
+    with TestingSessionLocal() as db:
+        hashed = db.query(User).filter(User.email == email).one().hashed_password
+    assert hashed.startswith("$2b$04$")
+
+    # The upgraded hash still authenticates
+    login_user(client, email, "password123")
+
+
+def test_register_returns_503_when_hash_queue_is_full(client: TestClient, monkeypatch):
+    import threading
+
+    from app.core import security
+
+    full = threading.BoundedSemaphore(1)
+    full.acquire()
+    monkeypatch.setattr(security, "_pending", full)
+
+    response = client.post(
+        "/api/auth/register",
+        json={"email": "busy@example.com", "password": "password123"},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
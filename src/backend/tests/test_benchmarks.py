@@ -0,0 +1,44 @@
+import os
+
+from benchmarks import report
+
+
+def test_percentile_nearest_rank():
+    values = sorted(float(v) for v in range(1, 101))
+    assert report.percentile(values, 50) == 50.0
+    assert report.percentile(values, 95) == 95.0
+    assert report.percentile(values, 99) == 99.0
+    assert report.percentile([], 99) == 0.0
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    recorder = report.Recorder()
+    for latency in (10.0, 10.0, 10.0, 10.0):
+        recorder.record("GET /api/tasks", latency, queries=2, ok=True)
+    baseline = recorder.summary(duration_s=1.0, config={})
+
+    slower = report.Recorder()
+    for latency in (13.0, 13.0, 13.0, 13.0):
+        slower.record("GET /api/tasks", latency, queries=2, ok=True)
+    result = slower.summary(duration_s=1.0, config={})
+
+    regressions = report.compare(result, baseline, max_regression=0.2)
+    assert any(line.startswith("GET /api/tasks p50_ms") for line in regressions)
+    assert report.compare(result, baseline, max_regression=0.5) == []
+
+
+def test_startup_summary_reports_milliseconds():
+    from benchmarks.startup import summarize
+
+    summary = summarize([0.3, 0.1, 0.2])
+    assert summary == {"runs": 3, "min_ms": 100.0, "median_ms": 200.0, "p95_ms": 300.0, "max_ms": 300.0}
+
+
+def test_benchmark_environment_disables_rate_limits(tmp_path, monkeypatch):
+    from benchmarks.run import configure_environment, parse_args
+
+    for name in ("DATABASE_URL", "BCRYPT_ROUNDS", "DB_ASYNC", "RATE_LIMIT_ENABLED", "MAX_CONCURRENT_REQUESTS"):
+        monkeypatch.setenv(name, "")
+    configure_environment(parse_args([]), tmp_path)
+    assert os.environ["RATE_LIMIT_ENABLED"] == "false"
+    assert os.environ["MAX_CONCURRENT_REQUESTS"] == "0"
@@ -0,0 +1,84 @@
+from sqlalchemy import event, text
+
+from app.db.engine import TimedQueuePool, create_db_engine, pool_status, pool_wait_stats
+
+
+def test_sqlite_file_engine_applies_profile_and_pool_settings(tmp_path):
+    engine = create_db_engine(f"sqlite+pysqlite:///{tmp_path / 'profile.db'}")
+    try:
+        assert isinstance(engine.pool, TimedQueuePool)
+
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+            assert pool_status(engine)["checked_out"] == 1
+        assert pool_status(engine)["checked_out"] == 0
+    finally:
+        engine.dispose()
+
+
+def test_pool_checkout_wait_is_recorded(tmp_path):
+    engine = create_db_engine(f"sqlite+pysqlite:///{tmp_path / 'wait.db'}")
+    try:
+        before = pool_wait_stats.snapshot()["checkouts"]
+        with engine.connect():
+            pass
+        assert pool_wait_stats.snapshot()["checkouts"] == before + 1
+    finally:
+        engine.dispose()
+
+
+def test_in_memory_sqlite_keeps_default_pool():
+    engine = create_db_engine("sqlite+pysqlite:///:memory:")
+    try:
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT 1")).scalar() == 1
+        assert pool_status(engine) == {}
+    finally:
+        engine.dispose()
+
+
+def test_init_db_creates_schema_once_then_only_checks_version(tmp_path):
+    from app.db.base import SCHEMA_VERSION, get_schema_version, init_db
+
+    engine = create_db_engine(f"sqlite+pysqlite:///{tmp_path / 'schema.db'}")
+    try:
+        assert init_db(engine) is True
+        with engine.connect() as connection:
+            assert get_schema_version(connection) == SCHEMA_VERSION
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        assert init_db(engine) is False
+        assert len(statements) == 1
+    finally:
+        engine.dispose()
+
+
+def test_init_db_upgrades_tasks_table_from_version_1(tmp_path):
+    from sqlalchemy import inspect
+
+    from app.db.base import SCHEMA_VERSION, get_schema_version, init_db
+
+    engine = create_db_engine(f"sqlite+pysqlite:///{tmp_path / 'upgrade.db'}")
+    try:
+        init_db(engine)
+        # Roll the tasks table back to its version 1 shape
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_tasks_user_id_change_version"))
+            connection.execute(text("DROP INDEX ix_tasks_user_id_created_at_id"))
+            connection.execute(text("ALTER TABLE tasks DROP COLUMN change_version"))
+            connection.execute(text("DROP TABLE task_tombstones"))
+            connection.execute(text("UPDATE schema_version SET version = 1"))
+
+        assert init_db(engine) is True
+        inspector = inspect(engine)
+        assert "change_version" in {column["name"] for column in inspector.get_columns("tasks")}
+        indexes = {index["name"] for index in inspector.get_indexes("tasks")}
+        assert {"ix_tasks_user_id_change_version", "ix_tasks_user_id_created_at_id"} <= indexes
+        assert inspector.has_table("task_tombstones")
+        with engine.connect() as connection:
+            assert get_schema_version(connection) == SCHEMA_VERSION
+    finally:
+        engine.dispose()
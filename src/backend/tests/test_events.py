@@ -0,0 +1,151 @@
+import asyncio
+import json
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.core.events import TASKS_CREATED, EventBroker, LocalEventBackend, RedisEventBackend, TaskEvent
+from test_tasks import auth_headers, create_user_and_get_token
+
+
+def test_brokers_sharing_a_backend_see_each_others_events():
+    async def scenario():
+        backend = LocalEventBackend()
+        worker_a, worker_b = EventBroker(backend), EventBroker(backend)
+        subscription = worker_b.subscribe(user_id=1)
+        other_user = worker_b.subscribe(user_id=2)
+
+        worker_a.publish(1, TASKS_CREATED, b'{"tasks":[]}')
+        await asyncio.sleep(0)
+
+        received = await subscription.get(timeout=1)
+        assert received.user_id == 1 and received.type == TASKS_CREATED
+        assert await other_user.get(timeout=0.01) is None
+
+    asyncio.run(scenario())
+
+
+class SlowRedisStandIn:
+    """The slice of redis.Redis the event backend publishes with; each call waits for `released`."""
+
+    def __init__(self):
+        self.released = threading.Event()
+        self.last_id = 0
+        self.published: list[bytes] = []
+        self.closed = False
+
+    def incr(self, name):
+        self.released.wait(5)
+        self.last_id += 1
+        return self.last_id
+
+    def publish(self, channel, message):
+        self.published.append(message)
+
+    def close(self):
+        self.closed = True
+
+
+def test_redis_publish_does_not_block_the_caller():
+    client = SlowRedisStandIn()
+    backend = RedisEventBackend(client=client)
+    for n in range(3):
+        backend.publish(1, TASKS_CREATED, b'{"n":%d}' % n)
+    # Returned while Redis was still unanswered
+    assert client.published == []
+
+    client.released.set()
+    backend.close()
+    assert [TaskEvent.decode(message).data for message in client.published] == [b'{"n":0}', b'{"n":1}', b'{"n":2}']
+    assert [TaskEvent.decode(message).id for message in client.published] == [1, 2, 3]
+    assert client.closed
+
+
+def test_resume_replays_missed_events_or_asks_for_resync():
+    async def scenario():
+        broker = EventBroker(LocalEventBackend(), replay_size=3)
+        for n in range(5):
+            broker.publish(1, TASKS_CREATED, b'{"n":%d}' % n)
+        first, *_, last = broker._replay[1]
+
+        resumed = broker.subscribe(1, last_event_id=first.id)
+        assert [event.data for event in resumed.replay] == [b'{"n":3}', b'{"n":4}']
+        assert resumed.resync_reason is None
+
+        # Events 0 and 1 fell out of the buffer
+        expired = broker.subscribe(1, last_event_id=first.id - 2)
+        assert expired.resync_reason == "expired"
+
+        up_to_date = broker.subscribe(1, last_event_id=last.id)
+        assert up_to_date.replay == [] and up_to_date.resync_reason is None
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_is_told_to_resync():
+    async def scenario():
+        broker = EventBroker(LocalEventBackend(), queue_size=2)
+        subscription = broker.subscribe(1)
+        for n in range(3):
+            broker.publish(1, TASKS_CREATED, b'{"n":%d}' % n)
+        await asyncio.sleep(0)
+
+        frames = [frame async for frame in subscription.sse(heartbeat=0.01)]
+        assert frames[0].startswith(b"retry: ")
+        assert frames[-1] == b'event: resync\ndata: {"reason":"lagged"}\n\n'
+        assert broker.subscriber_count() == 0
+
+    asyncio.run(scenario())
+
+
+def test_sse_sends_heartbeats_and_event_frames():
+    async def scenario():
+        broker = EventBroker(LocalEventBackend())
+        subscription = broker.subscribe(1)
+        frames = subscription.sse(heartbeat=0.01)
+        assert (await anext(frames)).startswith(b"retry: ")
+        assert await anext(frames) == b": keep-alive\n\n"
+
+        broker.publish(1, TASKS_CREATED, b'{"tasks":[]}')
+        await asyncio.sleep(0)
+        frame = await anext(frames)
+        assert frame.startswith(b"id: ") and frame.endswith(b'\nevent: tasks.created\ndata: {"tasks":[]}\n\n')
+        await frames.aclose()
+        assert broker.subscriber_count() == 0
+
+    asyncio.run(scenario())
+
+
+def test_websocket_stream_receives_committed_changes(client: TestClient):
+    token = create_user_and_get_token(client, "stream@example.com")
+    headers = auth_headers(token)
+
+    with client.websocket_connect(f"/api/tasks/events/ws?token={token}") as websocket:
+        task_id = client.post("/api/tasks", json={"title": "Live"}, headers=headers).json()["id"]
+        message = json.loads(websocket.receive_text())
+        assert message["event"] == "tasks.created"
+        assert message["data"]["tasks"][0]["title"] == "Live"
+
+        client.patch(f"/api/tasks/{task_id}/complete", headers=headers)
+        message = json.loads(websocket.receive_text())
+        assert message["event"] == "tasks.updated"
+        assert message["data"]["tasks"][0]["is_completed"] is True
+
+        client.delete(f"/api/tasks/{task_id}", headers=headers)
+        deleted = json.loads(websocket.receive_text())
+        assert deleted == {"id": deleted["id"], "event": "tasks.deleted", "data": {"ids": [task_id]}}
+        assert deleted["id"] > message["id"]
+
+    # Resuming replays what happened after the given event
+    with client.websocket_connect(f"/api/tasks/events/ws?token={token}&last_event_id={message['id']}") as websocket:
+        assert json.loads(websocket.receive_text()) == deleted
+
+
+def test_websocket_rejects_invalid_token(client: TestClient):
+    from starlette.websockets import WebSocketDisconnect
+
+    try:
+        with client.websocket_connect("/api/tasks/events/ws?token=not-a-token"):
+            raise AssertionError("connection should have been refused")
+    except WebSocketDisconnect as exc:
+        assert exc.code == 1008
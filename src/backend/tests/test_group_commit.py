@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core import events
+from app.crud import task as task_crud
+from app.db import group_commit
+from app.db.base import init_db
+from app.db.engine import create_db_engine
+from app.db.group_commit import GroupCommitter
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.task import TaskCreate, TaskUpdate
+from test_tasks import auth_headers, create_user_and_get_token
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_db_engine(f"sqlite+pysqlite:///{tmp_path / 'group.db'}")
+    init_db(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    with factory() as db:
+        db.add(User(id=1, email="group@example.com", hashed_password="x"))
+        db.commit()
+    yield factory
+    engine.dispose()
+
+
+def _create_then_fail(db: Session, title: str) -> None:
+    db.add(Task(user_id=1, title=title))
+    db.flush()
+    raise ValueError("rejected")
+
+
+class RecordingBroker:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, user_id, event_type, data):
+        self.published.append((user_id, event_type))
+
+
+def test_batched_calls_get_their_own_results_and_errors(session_factory, monkeypatch):
+    broker = RecordingBroker()
+    monkeypatch.setattr(events, "get_broker", lambda: broker)
+    group_commit.batch_size_histogram.reset()
+
+    async def scenario():
+        committer = GroupCommitter(session_factory, max_batch=32, max_delay=0.05)
+        try:
+            return await asyncio.gather(
+                *(committer.run(task_crud.create_task, 1, TaskCreate(title=f"Task {n}")) for n in range(10)),
+                committer.run(_create_then_fail, "Never stored"),
+                committer.run(task_crud.update_task, 999, 1, TaskUpdate(title="Missing")),
+                return_exceptions=True,
+            )
+        finally:
+            committer.close()
+
+    *created, failed, missing = asyncio.run(scenario())
+    assert [task.title for task in created] == [f"Task {n}" for n in range(10)]
+    assert isinstance(failed, ValueError)
+    assert missing is None
+
+    with session_factory() as db:
+        assert db.scalar(select(func.count()).select_from(Task)) == 10
+        assert task_crud.get_task_stats(db, 1) == (10, 0)
+        # Every successful create bumped the version once; the miss rolled its bump back
+        assert task_crud.get_list_version(db, 1) == 10
+    # Only the committed calls announce their changes
+    assert broker.published == [(1, events.TASKS_CREATED)] * 10
+    # All twelve calls shared one transaction
+    assert "db_group_commit_batch_size_count 1" in group_commit.batch_size_histogram.render()
+
+
+def test_failed_commit_fails_every_call_in_the_batch(session_factory):
+    class FailingCommitSession(Session):
+        def commit(self):
+            raise OperationalError("COMMIT", {}, Exception("disk I/O error"))
+
+    failing_factory = sessionmaker(bind=session_factory.kw["bind"], class_=FailingCommitSession)
+
+    async def scenario():
+        committer = GroupCommitter(failing_factory, max_delay=0.05)
+        try:
+            return await asyncio.gather(
+                committer.run(task_crud.create_task, 1, TaskCreate(title="Lost")),
+                committer.run(_create_then_fail, "Rejected"),
+                return_exceptions=True,
+            )
+        finally:
+            committer.close()
+
+    lost, rejected = asyncio.run(scenario())
+    assert isinstance(lost, OperationalError)
+    assert isinstance(rejected, ValueError)
+    with session_factory() as db:
+        assert db.scalar(select(func.count()).select_from(Task)) == 0
+
+
+def test_cancelled_call_does_not_stop_the_writer(session_factory):
+    async def scenario():
+        committer = GroupCommitter(session_factory, max_delay=0.2)
+        try:
+            # Cancelled while still queued, as when the client disconnects
+            abandoned = asyncio.ensure_future(committer.run(task_crud.create_task, 1, TaskCreate(title="Abandoned")))
+            kept = asyncio.ensure_future(committer.run(task_crud.create_task, 1, TaskCreate(title="Kept")))
+            await asyncio.sleep(0.01)
+            abandoned.cancel()
+            kept_task = await asyncio.wait_for(kept, 5)
+            later = await asyncio.wait_for(committer.run(task_crud.create_task, 1, TaskCreate(title="Later")), 5)
+            return abandoned.cancelled(), kept_task, later, committer._thread.is_alive()
+        finally:
+            committer.close()
+
+    cancelled, kept, later, writer_alive = asyncio.run(scenario())
+    assert cancelled
+    assert (kept.title, later.title) == ("Kept", "Later")
+    assert writer_alive
+    with session_factory() as db:
+        assert db.scalars(select(Task.title).order_by(Task.id)).all() == ["Kept", "Later"]
+
+
+def test_task_routes_through_group_commit(client: TestClient, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "group_commit_enabled", True)
+    headers = auth_headers(create_user_and_get_token(client, "grouped@example.com"))
+
+    task = client.post("/api/tasks", json={"title": "Grouped"}, headers=headers).json()
+    response = client.put(f"/api/tasks/{task['id']}", json={"description": "Edited"}, headers=headers)
+    assert response.json()["description"] == "Edited"
+    # Nothing to change: the row is read back, not written
+    response = client.put(f"/api/tasks/{task['id']}", json={}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["description"] == "Edited"
+    assert client.patch(f"/api/tasks/{task['id']}/complete", headers=headers).json()["is_completed"] is True
+    assert client.put("/api/tasks/999", json={"title": "Missing"}, headers=headers).status_code == 404
+    assert client.get("/api/tasks/stats", headers=headers).json() == {"total": 1, "completed": 1, "pending": 0}
+    assert client.delete(f"/api/tasks/{task['id']}", headers=headers).status_code == 204
+    assert client.get("/api/tasks", headers=headers).json() == []
+
+    body = client.get("/api/metrics").text
+    assert "db_group_commit_batch_size_count" in body
+    assert "db_group_commit_queue_delay_seconds_bucket" in body
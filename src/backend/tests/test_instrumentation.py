@@ -0,0 +1,82 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.db import instrumentation
+from app.db.instrumentation import QueryStats, server_timing, statement_shape
+from test_tasks import auth_headers, create_user_and_get_token
+
+
+def test_statement_shape_ignores_parameter_count():
+    assert statement_shape("SELECT id FROM tasks WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT id\n  FROM tasks WHERE id IN (?)"
+    )
+    assert statement_shape("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)") == "INSERT INTO t (a, b) VALUES (?)"
+    assert statement_shape("SELECT 1 FROM t WHERE a = ?") != statement_shape("SELECT 1 FROM t WHERE b = ?")
+
+
+def test_server_timing_reports_db_time_and_slowest_statement():
+    stats = QueryStats()
+    stats.record("SELECT 1", 0.002)
+    stats.record('SELECT "slow"', 0.010)
+
+    header = server_timing(stats, total_seconds=0.015)
+    assert header.startswith('db;dur=12.00;desc="2 queries"')
+    assert 'db-slowest;dur=10.00;desc="SELECT \\"slow\\""' in header
+    assert header.endswith("app;dur=3.00")
+
+
+def test_failed_statement_does_not_leave_its_start_time_behind():
+    engine = create_engine("sqlite://")
+    stats = QueryStats()
+    token = instrumentation._current_stats.set(stats)
+    try:
+        with engine.connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM missing_table"))
+            assert connection.info["query_start_time"] == []
+            connection.execute(text("SELECT 1"))
+            assert connection.info["query_start_time"] == []
+    finally:
+        instrumentation._current_stats.reset(token)
+        engine.dispose()
+    assert stats.count == 1
+
+
+def test_server_timing_header_only_in_debug(client: TestClient, monkeypatch):
+    from app.core.config import settings
+
+    headers = auth_headers(create_user_and_get_token(client, "timing@example.com"))
+    assert "Server-Timing" not in client.get("/api/tasks", headers=headers).headers
+
+    monkeypatch.setattr(settings, "debug", True)
+    timing = client.get("/api/tasks", headers=headers).headers["Server-Timing"]
+    # The principal comes from the token cache, leaving the list version and the rows themselves
+    assert 'desc="2 queries"' in timing
+
+
+def test_query_budget_and_repeated_statements_are_logged(client: TestClient, monkeypatch, caplog):
+    from app.core.config import settings
+
+    headers = auth_headers(create_user_and_get_token(client, "budget@example.com"))
+    # Warm the token cache so the principal lookup does not count
+    client.get("/api/tasks", headers=headers)
+    monkeypatch.setattr(settings, "sql_query_budget", 1)
+    monkeypatch.setattr(settings, "sql_repeated_statement_threshold", 3)
+
+    with caplog.at_level(logging.WARNING, logger="app.db.instrumentation"):
+        client.get("/api/tasks", headers=headers)
+        for _ in range(3):
+            client.post("/api/tasks", json={"title": "Again"}, headers=headers)
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("GET /api/tasks ran 2 SQL statements (budget 1" in message for message in messages)
+    assert not any("likely N+1" in message for message in messages)
+
+    caplog.clear()
+    monkeypatch.setattr(settings, "sql_repeated_statement_threshold", 1)
+    with caplog.at_level(logging.WARNING, logger="app.db.instrumentation"):
+        client.get("/api/tasks", headers=headers)
+    assert any("likely N+1" in record.getMessage() for record in caplog.records)
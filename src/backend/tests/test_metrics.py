@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsRegistry
+from test_tasks import auth_headers, create_user_and_get_token
+
+
+def test_metrics_labels_requests_by_route_template(client: TestClient):
+    from app.core.metrics import metrics
+
+    metrics.reset()
+    headers = auth_headers(create_user_and_get_token(client, "metrics@example.com"))
+    task_id = client.post("/api/tasks", json={"title": "Measured"}, headers=headers).json()["id"]
+    client.put(f"/api/tasks/{task_id}", json={"title": "Again"}, headers=headers)
+    client.put("/api/tasks/999999", json={"title": "Missing"}, headers=headers)
+    client.get("/api/no-such-route")
+
+    assert metrics.request_count("PUT", "/api/tasks/{task_id}", 200) == 1
+    assert metrics.request_count("PUT", "/api/tasks/{task_id}", 404) == 1
+    assert metrics.request_count("GET", "<unmatched>", 404) == 1
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="POST",route="/api/tasks",status="201"} 1' in body
+    assert f"/api/tasks/{task_id}" not in body
+    assert 'http_request_duration_seconds_count{method="PUT",route="/api/tasks/{task_id}"} 2' in body
+    assert "http_requests_in_flight 1" in body
+    assert "threadpool_threads_max " in body
+    assert "db_pool_checkouts_total " in body
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 5.0):
+        registry.observe("GET", "/x", 200, seconds)
+
+    lines = registry.render()
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="0.1"} 1' in lines
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="1.0"} 2' in lines
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/x",le="+Inf"} 3' in lines
+    assert 'http_request_duration_seconds_count{method="GET",route="/x"} 3' in lines
+
+
+def test_health_readiness(client: TestClient, monkeypatch):
+    from app.api.v1.routes import health
+
+    def no_session(*args):
+        raise AssertionError("liveness opened a database session")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(health, "open_session_runner", no_session)
+        assert client.get("/api/health").json() == {"status": "ok"}
+
+    response = client.get("/api/health", params={"ready": True})
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+    assert response.json()["database"] == "ok"
+
+    saturated = {"size": 5, "checked_out": 15, "overflow": 10, "max_overflow": 10}
+    monkeypatch.setattr(health, "pool_status", lambda engine: saturated)
+    response = client.get("/api/health", params={"ready": True})
+    assert response.status_code == 503
+    assert response.json()["database"] == "saturated"
+    assert response.json()["pool"]["saturation"] == 1.0
+
+
+def test_metrics_report_auth_cache_hits_and_misses(client: TestClient):
+    def sample(body: str, name: str) -> float:
+        return float(next(line.split()[-1] for line in body.splitlines() if line.startswith(name + " ")))
+
+    headers = auth_headers(create_user_and_get_token(client, "cache-metrics@example.com"))
+    before = client.get("/api/metrics").text
+    for _ in range(3):
+        assert client.get("/api/tasks", headers=headers).status_code == 200
+    after = client.get("/api/metrics").text
+
+    hits, misses = 'auth_cache_lookups_total{result="hit"}', 'auth_cache_lookups_total{result="miss"}'
+    # The first request verifies the token, the next two find it cached
+    assert sample(after, misses) - sample(before, misses) == 1
+    assert sample(after, hits) - sample(before, hits) == 2
+    assert sample(after, "auth_cache_entries") >= 1
+    assert "auth_cache_evictions_total" in after
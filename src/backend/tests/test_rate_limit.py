@@ -0,0 +1,162 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit import (
+    ConcurrencyLimitMiddleware,
+    LocalRateLimitStore,
+    Rate,
+    RedisRateLimitStore,
+    rate_limiter,
+)
+from test_tasks import auth_headers, create_user_and_get_token
+
+
+class RedisStandIn:
+    """The slice of redis.Redis the rate limit store uses, with WATCH/MULTI/EXEC semantics."""
+
+    def __init__(self):
+        self.values: dict[str, tuple[bytes, float]] = {}
+        self.now = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        value = self.values.get(name)
+        return value[0] if value is not None and value[1] > self.now else None
+
+    def set(self, name, value, px):
+        self.values[name] = (str(value).encode(), self.now + px / 1000)
+
+    def transaction(self, func, *watches):
+        # EXEC fails and redis-py retries when a watched key changed; serialising gives the same outcome
+        with self.lock:
+            pipe = _PipelineStandIn(self)
+            func(pipe)
+            for command in pipe.queued:
+                command()
+
+
+class _PipelineStandIn:
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+        self.in_multi = False
+
+    def get(self, name):
+        assert not self.in_multi, "reads must happen before MULTI"
+        return self.client.get(name)
+
+    def multi(self):
+        self.in_multi = True
+
+    def set(self, name, value, px):
+        assert self.in_multi
+        self.queued.append(lambda: self.client.set(name, value, px))
+
+
+def test_rate_parse():
+    assert Rate.parse("20/minute") == Rate(20, 60)
+    assert Rate.parse("5 / seconds") == Rate(5, 1)
+    for text in ("20", "0/minute", "x/minute", "20/fortnight"):
+        with pytest.raises(ValueError):
+            Rate.parse(text)
+
+
+@pytest.mark.parametrize("store_factory", ["local", "redis"])
+def test_store_allows_a_burst_then_one_request_per_interval(store_factory):
+    redis = RedisStandIn()
+    if store_factory == "local":
+        store = LocalRateLimitStore()
+        other_worker = store
+    else:
+        # Two workers' stores sharing one Redis draw from the same budget
+        store = RedisRateLimitStore(client=redis)
+        other_worker = RedisRateLimitStore(client=redis)
+    rate = Rate(3, 60)
+
+    assert [store.acquire("k", rate, 0.0) for _ in range(2)] == [0.0, 0.0]
+    assert other_worker.acquire("k", rate, 0.0) == 0.0
+    assert other_worker.acquire("k", rate, 0.0) == pytest.approx(20.0)
+    # Rejected requests do not spend budget, and other keys are unaffected
+    assert store.acquire("k", rate, 5.0) == pytest.approx(15.0)
+    assert store.acquire("other", rate, 5.0) == 0.0
+
+    assert store.acquire("k", rate, 20.0) == 0.0
+    assert store.acquire("k", rate, 20.0) == pytest.approx(20.0)
+    # Long idle: the bucket is full again (and the Redis key has expired)
+    redis.now = 1000.0
+    assert [store.acquire("k", rate, 1000.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_local_store_drops_least_recently_seen_keys():
+    store = LocalRateLimitStore(max_keys=2)
+    rate = Rate(1, 60)
+    store.acquire("a", rate, 0.0)
+    store.acquire("b", rate, 0.0)
+    store.acquire("c", rate, 0.0)
+    assert store.acquire("a", rate, 0.0) == 0.0
+    assert store.acquire("c", rate, 0.0) > 0
+
+
+def test_auth_routes_are_limited_per_client_ip(client: TestClient, monkeypatch):
+    monkeypatch.setitem(rate_limiter.limits, "auth", Rate(2, 60))
+    form = {"username": "nobody@example.com", "password": "wrong-password"}
+
+    assert [client.post("/api/auth/login", data=form).status_code for _ in range(2)] == [401, 401]
+    response = client.post("/api/auth/login", data=form)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    # Registration shares the auth budget
+    response = client.post("/api/auth/register", json={"email": "new@example.com", "password": "password123"})
+    assert response.status_code == 429
+
+
+def test_task_routes_are_limited_per_user(client: TestClient, monkeypatch):
+    first = auth_headers(create_user_and_get_token(client, "limited@example.com"))
+    second = auth_headers(create_user_and_get_token(client, "unlimited@example.com"))
+    monkeypatch.setitem(rate_limiter.limits, "tasks", Rate(2, 10))
+
+    assert [client.get("/api/tasks", headers=first).status_code for _ in range(2)] == [200, 200]
+    response = client.post("/api/tasks", json={"title": "Over budget"}, headers=first)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
+    assert client.get("/api/tasks", headers=second).status_code == 200
+    # Unauthenticated requests are rejected before any budget is spent
+    assert client.get("/api/tasks").status_code == 401
+
+
+def test_concurrency_limit_sheds_excess_requests():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        middleware = ConcurrencyLimitMiddleware(slow_app, max_concurrent=1, exempt_prefixes=("/api/health",))
+
+        async def request(path):
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            await middleware({"type": "http", "path": path, "method": "GET"}, None, send)
+            return messages[0]
+
+        admitted = asyncio.create_task(request("/api/tasks"))
+        await asyncio.sleep(0)
+        shed = await request("/api/tasks")
+        assert shed["status"] == 503 and (b"retry-after", b"1") in shed["headers"]
+
+        probe = asyncio.create_task(request("/api/health"))
+        release.set()
+        assert (await admitted)["status"] == 200
+        assert (await probe)["status"] == 200
+        assert middleware.in_flight == 0
+        assert (await request("/api/tasks"))["status"] == 200
+
+    asyncio.run(scenario())
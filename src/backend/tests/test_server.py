@@ -0,0 +1,145 @@
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import uvicorn
+
+from app import server
+from app.server import choose_worker_count, cpu_quota, default_worker_count
+from conftest import ROOT_DIR
+
+
+def test_cpu_quota_reads_cgroup_v2_then_v1(tmp_path):
+    assert cpu_quota(tmp_path) is None
+
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("150000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert cpu_quota(tmp_path) == 1.5
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert cpu_quota(tmp_path) is None
+
+    (tmp_path / "cpu.max").write_text("200000 100000\n")
+    assert cpu_quota(tmp_path) == 2.0
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cpu_quota(tmp_path) is None
+
+
+def test_default_worker_count_is_capped_by_quota(tmp_path):
+    (tmp_path / "cpu.max").write_text("50000 100000\n")
+    # Half a CPU still gets one worker
+    assert default_worker_count(tmp_path) == 1
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert default_worker_count(tmp_path) == len(os.sched_getaffinity(0))
+
+
+def test_default_is_one_worker_while_state_is_per_process(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(server, "default_worker_count", lambda: 8)
+    assert choose_worker_count(None) == 1
+    assert choose_worker_count(3) == 3
+
+    monkeypatch.setattr(settings, "events_backend", "redis")
+    monkeypatch.setattr(settings, "rate_limit_backend", "redis")
+    assert server.per_process_state() == ["AUTH_CACHE_ENABLED=true"]
+    assert choose_worker_count(None) == 1
+    monkeypatch.setattr(settings, "auth_cache_enabled", False)
+    assert choose_worker_count(None) == 8
+
+    monkeypatch.setattr(settings, "events_backend", "local")
+    monkeypatch.setattr(settings, "events_enabled", False)
+    assert choose_worker_count(None) == 8
+
+
+def test_config_trusts_the_configured_proxies(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "forwarded_allow_ips", "10.0.0.1,10.0.0.2")
+    config = server.build_config(object(), server.parse_args([]))
+    assert config.proxy_headers is True
+    assert config.forwarded_allow_ips == "10.0.0.1,10.0.0.2"
+
+
+def test_config_leaves_out_jitter_on_uvicorn_without_it(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "worker_max_requests", 1000)
+    monkeypatch.setattr(server, "CONFIG_HAS_JITTER", False)
+    created = {}
+
+    def config_without_jitter(app, **options):
+        assert "limit_max_requests_jitter" not in options
+        created.update(options)
+        return object()
+
+    monkeypatch.setattr(uvicorn, "Config", config_without_jitter)
+    server.build_config(object(), server.parse_args([]))
+    assert created["limit_max_requests"] == 1000
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_log(process: subprocess.Popen, lines: list[str], pattern: str, timeout: float = 30) -> re.Match:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for line in lines:
+            match = re.search(pattern, line)
+            if match:
+                return match
+        line = process.stderr.readline()
+        if not line:
+            raise AssertionError("server exited:\n" + "".join(lines))
+        lines.append(line)
+    raise AssertionError(f"{pattern!r} not logged:\n" + "".join(lines))
+
+
+def test_launcher_recycles_workers_and_restarts_them_gracefully(tmp_path):
+    port = _free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite+pysqlite:///{tmp_path / 'server.db'}",
+        WORKER_MAX_REQUESTS="3",
+        PASSWORD_HASH_WORKERS="0",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port), "--workers", "1"],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    lines: list[str] = []
+    try:
+        first = _wait_for_log(process, lines, r"Worker (\d+) ready").group(1)
+
+        # The listening socket stays open in the master, so no request fails while the worker is replaced
+        for _ in range(8):
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=10) as response:
+                assert response.status == 200
+        _wait_for_log(process, lines, rf"Worker {first} recycled")
+
+        lines.clear()
+        process.send_signal(signal.SIGHUP)
+        _wait_for_log(process, lines, r"Rolling restart of 1 worker")
+        _wait_for_log(process, lines, r"Worker \d+ ready")
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=10) as response:
+            assert response.status == 200
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stderr.close()
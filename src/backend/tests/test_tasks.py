@@ -1,3 +1,6 @@
+import time
+from datetime import datetime, timedelta
+
 from fastapi.testclient import TestClient
 
 
@@ -123,6 +126,24 @@ def test_complete_nonexistent_task(client: TestClient):
     assert response.json()["detail"] == "Task not found"
 
 
+def test_completing_a_completed_task_changes_nothing(client: TestClient):
+    headers = auth_headers(create_user_and_get_token(client, "recomplete@example.com"))
+    task = client.post("/api/tasks", json={"title": "Done once"}, headers=headers).json()
+    completed = client.patch(f"/api/tasks/{task['id']}/complete", headers=headers).json()
+    etag = client.get("/api/tasks", headers=headers).headers["ETag"]
+    cursor = client.get("/api/tasks/changes", headers=headers).json()["cursor"]
+
+    again = client.patch(f"/api/tasks/{task['id']}/complete", headers=headers)
+    assert again.status_code == 200
+    assert again.json() == completed
+    same = client.put(f"/api/tasks/{task['id']}", json={"is_completed": True}, headers=headers)
+    assert same.json() == completed
+
+    assert client.get("/api/tasks", headers={**headers, "If-None-Match": etag}).status_code == 304
+    delta = client.get("/api/tasks/changes", params={"since": cursor}, headers=headers).json()
+    assert delta["tasks"] == [] and delta["deleted"] == []
+
+
 def test_partial_update_task(client: TestClient):
     token = create_user_and_get_token(client, "user6@example.com")
     headers = auth_headers(token)
@@ -154,3 +175,400 @@ def test_multiple_tasks_completion_stats(client: TestClient):
     tasks = response.json()
     assert len(tasks) == 2
     assert sum(1 for task in tasks if task["is_completed"]) == 1
+
+
+def test_task_stats_follow_mutations(client: TestClient):
+    headers = auth_headers(create_user_and_get_token(client, "stats@example.com"))
+    other_headers = auth_headers(create_user_and_get_token(client, "stats-other@example.com"))
+
+    def stats(h=headers):
+        response = client.get("/api/tasks/stats", headers=h)
+        assert response.status_code == 200
+        return response.json()
+
+    assert stats() == {"total": 0, "completed": 0, "pending": 0}
+
+    first = client.post("/api/tasks", json={"title": "One"}, headers=headers).json()["id"]
+    second = client.post("/api/tasks", json={"title": "Two"}, headers=headers).json()["id"]
+    client.post("/api/tasks/batch", json={"items": [{"title": "Three"}, {"title": "Four"}]}, headers=headers)
+    assert stats() == {"total": 4, "completed": 0, "pending": 4}
+
+    client.patch(f"/api/tasks/{first}/complete", headers=headers)
+    # Completing twice must not count twice
+    client.patch(f"/api/tasks/{first}/complete", headers=headers)
+    assert stats() == {"total": 4, "completed": 1, "pending": 3}
+
+    client.put(f"/api/tasks/{first}", json={"is_completed": False}, headers=headers)
+    client.put(f"/api/tasks/{second}", json={"title": "Two, renamed"}, headers=headers)
+    assert stats() == {"total": 4, "completed": 0, "pending": 4}
+
+    client.post("/api/tasks/batch/complete", json={"ids": [first, second]}, headers=headers)
+    client.patch(
+        "/api/tasks/batch",
+        json={"items": [{"id": first, "is_completed": False}, {"id": second, "is_completed": True}]},
+        headers=headers,
+    )
+    assert stats() == {"total": 4, "completed": 1, "pending": 3}
+
+    client.delete(f"/api/tasks/{second}", headers=headers)
+    client.post("/api/tasks/batch/delete", json={"ids": [first]}, headers=headers)
+    assert stats() == {"total": 2, "completed": 0, "pending": 2}
+
+    # Another user cannot touch these tasks, and has counters of their own
+    client.delete(f"/api/tasks/{first}", headers=other_headers)
+    assert stats(other_headers) == {"total": 0, "completed": 0, "pending": 0}
+
+
+def test_rebuild_task_stats_repairs_drift(client: TestClient):
+    from conftest import TestingSessionLocal
+
+    from app.crud.task import rebuild_task_stats
+    from app.models.task_stats import TaskStats
+
+    headers = auth_headers(create_user_and_get_token(client, "drift@example.com"))
+    task_id = client.post("/api/tasks", json={"title": "One"}, headers=headers).json()["id"]
+    client.post("/api/tasks", json={"title": "Two"}, headers=headers)
+    client.patch(f"/api/tasks/{task_id}/complete", headers=headers)
+
+    with TestingSessionLocal() as db:
+        db.query(TaskStats).update({"total": 99, "completed": 42})
+        db.commit()
+        assert rebuild_task_stats(db) == 1
+
+    assert client.get("/api/tasks/stats", headers=headers).json() == {"total": 2, "completed": 1, "pending": 1}
+
+
+def test_list_tasks_keyset_pagination(client: TestClient):
+    token = create_user_and_get_token(client, "pager@example.com")
+    headers = auth_headers(token)
+
+    for i in range(5):
+        client.post("/api/tasks", json={"title": f"Task {i}"}, headers=headers)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/tasks", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(task["title"] for task in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == [f"Task {i}" for i in reversed(range(5))]
+
+
+def test_list_tasks_filters(client: TestClient):
+    token = create_user_and_get_token(client, "filter@example.com")
+    headers = auth_headers(token)
+
+    client.post("/api/tasks", json={"title": "Open"}, headers=headers)
+    response = client.post("/api/tasks", json={"title": "Done"}, headers=headers)
+    client.patch(f"/api/tasks/{response.json()['id']}/complete", headers=headers)
+
+    response = client.get("/api/tasks", params={"is_completed": True}, headers=headers)
+    assert [task["title"] for task in response.json()] == ["Done"]
+
+    response = client.get("/api/tasks", params={"is_completed": False}, headers=headers)
+    assert [task["title"] for task in response.json()] == ["Open"]
+
+    response = client.get("/api/tasks", params={"created_before": "2000-01-01T00:00:00"}, headers=headers)
+    assert response.json() == []
+
+
+def test_list_tasks_invalid_cursor(client: TestClient):
+    token = create_user_and_get_token(client, "badcursor@example.com")
+    response = client.get("/api/tasks", params={"cursor": "not-a-cursor"}, headers=auth_headers(token))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_task_changes_delta_sync(client: TestClient):
+    headers = auth_headers(create_user_and_get_token(client, "sync@example.com"))
+    other_headers = auth_headers(create_user_and_get_token(client, "sync-other@example.com"))
+
+    def changes(since=None, h=headers):
+        response = client.get("/api/tasks/changes", params={"since": since} if since else {}, headers=h)
+        assert response.status_code == 200
+        return response.json()
+
+    keep = client.post("/api/tasks", json={"title": "Keep"}, headers=headers).json()["id"]
+    edit = client.post("/api/tasks", json={"title": "Edit"}, headers=headers).json()["id"]
+    gone = client.post("/api/tasks", json={"title": "Gone"}, headers=headers).json()["id"]
+
+    full = changes()
+    assert [task["id"] for task in full["tasks"]] == [keep, edit, gone]
+    assert full["deleted"] == []
+
+    # Nothing changed: an empty delta
+    empty = changes(full["cursor"])
+    assert empty["tasks"] == [] and empty["deleted"] == []
+
+    client.put(f"/api/tasks/{edit}", json={"title": "Edited"}, headers=headers)
+    client.delete(f"/api/tasks/{gone}", headers=headers)
+    added = client.post("/api/tasks/batch", json={"items": [{"title": "New"}]}, headers=headers).json()
+    client.post("/api/tasks", json={"title": "Not mine"}, headers=other_headers)
+    # Failed and no-op mutations are not changes
+    client.delete("/api/tasks/999", headers=headers)
+    client.post("/api/tasks/batch/complete", json={"ids": [999]}, headers=headers)
+
+    delta = changes(full["cursor"])
+    assert [(task["id"], task["title"]) for task in delta["tasks"]] == [
+        (edit, "Edited"),
+        (added["results"][0]["id"], "New"),
+    ]
+    # SQLite may hand the deleted id to the new task; clients apply `deleted` first, so either way works
+    assert delta["deleted"] == [gone]
+
+    client.post("/api/tasks/batch/complete", json={"ids": [keep]}, headers=headers)
+    client.post("/api/tasks/batch/delete", json={"ids": [edit]}, headers=headers)
+    later = changes(delta["cursor"])
+    assert [(task["id"], task["is_completed"]) for task in later["tasks"]] == [(keep, True)]
+    assert later["deleted"] == [edit]
+    assert [task["title"] for task in changes(h=other_headers)["tasks"]] == ["Not mine"]
+
+
+def test_task_changes_rejects_bad_and_expired_cursors(client: TestClient, monkeypatch):
+    from conftest import TestingSessionLocal
+
+    from app.core.config import settings
+    from app.crud.task import encode_change_cursor, purge_task_tombstones
+    from app.models.task_tombstone import TaskTombstone
+
+    headers = auth_headers(create_user_and_get_token(client, "sync-expired@example.com"))
+    task_id = client.post("/api/tasks", json={"title": "Short-lived"}, headers=headers).json()["id"]
+    cursor = client.get("/api/tasks/changes", headers=headers).json()["cursor"]
+    client.delete(f"/api/tasks/{task_id}", headers=headers)
+
+    response = client.get("/api/tasks/changes", params={"since": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+    stale = encode_change_cursor(1, time.time() - settings.tasks_tombstone_retention_days * 86400 - 60)
+    response = client.get("/api/tasks/changes", params={"since": stale}, headers=headers)
+    assert response.status_code == 410
+
+    # A cursor from the future (e.g. issued before a database restore) cannot be patched either
+    ahead = encode_change_cursor(10**6, time.time())
+    assert client.get("/api/tasks/changes", params={"since": ahead}, headers=headers).status_code == 410
+
+    with TestingSessionLocal() as db:
+        assert purge_task_tombstones(db, datetime.utcnow() - timedelta(days=1)) == 0
+        assert db.query(TaskTombstone).count() == 1
+        assert purge_task_tombstones(db, datetime.utcnow() + timedelta(seconds=1)) == 1
+    monkeypatch.setattr(settings, "tasks_tombstone_retention_days", 0)
+    assert client.get("/api/tasks/changes", params={"since": cursor}, headers=headers).status_code == 410
+
+
+def test_search_tasks_matches_all_terms_and_prefixes(client: TestClient):
+    headers = auth_headers(create_user_and_get_token(client, "search@example.com"))
+    client.post("/api/tasks", json={"title": "Buy groceries", "description": "milk and eggs"}, headers=headers)
+    client.post("/api/tasks", json={"title": "Call plumber", "description": "kitchen sink leaks"}, headers=headers)
+    client.post("/api/tasks", json={"title": "Kitchen cleanup"}, headers=headers)
+
+    response = client.get("/api/tasks/search", params={"q": "kitchen"}, headers=headers)
+    assert response.status_code == 200
+    # Title matches outrank description matches
+    assert [task["title"] for task in response.json()] == ["Kitchen cleanup", "Call plumber"]
+
+    response = client.get("/api/tasks/search", params={"q": "groc MILK"}, headers=headers)
+    assert [task["title"] for task in response.json()] == ["Buy groceries"]
+
+    response = client.get("/api/tasks/search", params={"q": "groc", "prefix": False}, headers=headers)
+    assert response.json() == []
+
+    response = client.get("/api/tasks/search", params={"q": "kitchen", "limit": 1}, headers=headers)
+    assert len(response.json()) == 1
+
+    response = client.get("/api/tasks/search", params={"q": '"*'}, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_search_tasks_follows_updates_deletes_and_owner(client: TestClient):
+    headers = auth_headers(create_user_and_get_token(client, "searcher@example.com"))
+    other_headers = auth_headers(create_user_and_get_token(client, "snoop@example.com"))
+    task_id = client.post("/api/tasks", json={"title": "Renew passport"}, headers=headers).json()["id"]
+
+    response = client.get("/api/tasks/search", params={"q": "passport"}, headers=other_headers)
+    assert response.json() == []
+
+    client.put(f"/api/tasks/{task_id}", json={"title": "Renew license"}, headers=headers)
+    assert client.get("/api/tasks/search", params={"q": "passport"}, headers=headers).json() == []
+    response = client.get("/api/tasks/search", params={"q": "license"}, headers=headers)
+    assert [task["id"] for task in response.json()] == [task_id]
+
+    client.patch(f"/api/tasks/{task_id}/complete", headers=headers)
+    response = client.get("/api/tasks/search", params={"q": "license", "is_completed": False}, headers=headers)
+    assert response.json() == []
+
+    client.delete(f"/api/tasks/{task_id}", headers=headers)
+    assert client.get("/api/tasks/search", params={"q": "license"}, headers=headers).json() == []
+
+
+def test_batch_create_update_complete_delete(client: TestClient):
+    headers = auth_headers(create_user_and_get_token(client, "batch@example.com"))
+
+    response = client.post(
+        "/api/tasks/batch",
+        json={"items": [{"title": "One"}, {"title": "Two", "description": "second"}, {"title": "Three"}]},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["created"] * 3
+    assert [r["task"]["title"] for r in results] == ["One", "Two", "Three"]
+    one_id, two_id, three_id = (r["id"] for r in results)
+
+    response = client.patch(
+        "/api/tasks/batch",
+        json={"items": [{"id": one_id, "title": "One!"}, {"id": two_id, "is_completed": True}, {"id": 999, "title": "x"}]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["updated", "updated", "not_found"]
+    assert results[0]["task"]["title"] == "One!"
+    assert results[1]["task"]["is_completed"] is True
+    assert results[1]["task"]["description"] == "second"
+
+    response = client.post("/api/tasks/batch/complete", json={"ids": [three_id, 999]}, headers=headers)
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["updated", "not_found"]
+    assert results[0]["task"]["is_completed"] is True
+
+    response = client.post("/api/tasks/batch/delete", json={"ids": [one_id, two_id, 999]}, headers=headers)
+    assert [r["status"] for r in response.json()["results"]] == ["deleted", "deleted", "not_found"]
+
+    response = client.get("/api/tasks", headers=headers)
+    assert [task["id"] for task in response.json()] == [three_id]
+
+
+def test_batch_operations_are_scoped_to_owner(client: TestClient):
+    owner_headers = auth_headers(create_user_and_get_token(client, "batchowner@example.com"))
+    other_headers = auth_headers(create_user_and_get_token(client, "batchother@example.com"))
+
+    response = client.post("/api/tasks/batch", json={"items": [{"title": "Mine"}]}, headers=owner_headers)
+    task_id = response.json()["results"][0]["id"]
+
+    response = client.patch("/api/tasks/batch", json={"items": [{"id": task_id, "title": "Stolen"}]}, headers=other_headers)
+    assert response.json()["results"][0]["status"] == "not_found"
+    response = client.post("/api/tasks/batch/delete", json={"ids": [task_id]}, headers=other_headers)
+    assert response.json()["results"][0]["status"] == "not_found"
+
+    response = client.get("/api/tasks", headers=owner_headers)
+    assert [task["title"] for task in response.json()] == ["Mine"]
+
+
+def test_batch_rejects_duplicate_ids(client: TestClient):
+    headers = auth_headers(create_user_and_get_token(client, "batchdup@example.com"))
+    response = client.patch(
+        "/api/tasks/batch",
+        json={"items": [{"id": 1, "title": "a"}, {"id": 1, "title": "b"}]},
+        headers=headers,
+    )
+    assert response.status_code == 422
+
+
+def test_mutations_on_another_users_task_return_404(client: TestClient):
+    owner_headers = auth_headers(create_user_and_get_token(client, "owner@example.com"))
+    other_headers = auth_headers(create_user_and_get_token(client, "intruder@example.com"))
+
+    task_id = client.post("/api/tasks", json={"title": "Private"}, headers=owner_headers).json()["id"]
+
+    assert client.put(f"/api/tasks/{task_id}", json={"title": "Hijacked"}, headers=other_headers).status_code == 404
+    assert client.patch(f"/api/tasks/{task_id}/complete", headers=other_headers).status_code == 404
+    assert client.delete(f"/api/tasks/{task_id}", headers=other_headers).status_code == 404
+
+    tasks = client.get("/api/tasks", headers=owner_headers).json()
+    assert [(task["title"], task["is_completed"]) for task in tasks] == [("Private", False)]
+
+
+def test_list_tasks_conditional_get(client: TestClient):
+    headers = auth_headers(create_user_and_get_token(client, "etag@example.com"))
+
+    response = client.get("/api/tasks", headers=headers)
+    etag = response.headers["ETag"]
+
+    response = client.get("/api/tasks", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    # Different query => different representation => different tag
+    response = client.get("/api/tasks", params={"is_completed": True}, headers=headers)
+    assert response.headers["ETag"] != etag
+
+    task_id = client.post("/api/tasks", json={"title": "Changes the list"}, headers=headers).json()["id"]
+    response = client.get("/api/tasks", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    etag = response.headers["ETag"]
+
+    for method, url in (
+        ("put", f"/api/tasks/{task_id}"),
+        ("patch", f"/api/tasks/{task_id}/complete"),
+        ("delete", f"/api/tasks/{task_id}"),
+    ):
+        kwargs = {"json": {"title": "Edited"}} if method == "put" else {}
+        getattr(client, method)(url, headers=headers, **kwargs)
+        response = client.get("/api/tasks", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200, method
+        etag = response.headers["ETag"]
+
+    # Failed mutations leave the version alone
+    client.delete("/api/tasks/999", headers=headers)
+    response = client.get("/api/tasks", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_list_tasks_streaming_matches_buffered_response(client: TestClient, monkeypatch):
+    import json
+
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "tasks_stream_chunk_size", 2)
+    headers = auth_headers(create_user_and_get_token(client, "stream@example.com"))
+    client.post("/api/tasks/batch", json={"items": [{"title": f"Task {i}"} for i in range(5)]}, headers=headers)
+
+    buffered = client.get("/api/tasks", headers=headers)
+    streamed = client.get("/api/tasks", params={"stream": True}, headers=headers)
+    assert streamed.status_code == 200
+    assert streamed.json() == buffered.json()
+    assert len(buffered.json()) == 5
+
+    response = client.get("/api/tasks", headers={**headers, "Accept": "application/x-ndjson"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == buffered.json()
+    assert response.headers["ETag"] != buffered.headers["ETag"]
+
+    empty = client.get("/api/tasks", params={"stream": True, "is_completed": True}, headers=headers)
+    assert empty.json() == []
+
+
+def test_json_backends_produce_identical_bytes(monkeypatch):
+    from datetime import datetime, timezone
+
+    from app.core import serialization
+    from app.core.config import settings
+    from app.schemas.task import TaskRead
+
+    rows = [
+        {"title": "a", "description": None, "id": 1, "is_completed": False,
+         "created_at": datetime(2026, 1, 1, 12, 0, 0, 123), "updated_at": datetime(2026, 1, 1, 12, 0, 0)},
+        {"title": "bé", "description": "d", "id": 2, "is_completed": True,
+         "created_at": datetime(2026, 1, 1, tzinfo=timezone.utc), "updated_at": datetime(2026, 1, 1, tzinfo=timezone.utc)},
+    ]
+    monkeypatch.setattr(settings, "json_backend", "pydantic")
+    pydantic_bytes = serialization.encode_task_rows(rows)
+    assert [TaskRead.model_validate_json(serialization.encode_task_row(row)) for row in rows] == [
+        TaskRead(**row) for row in rows
+    ]
+
+    if serialization.orjson is not None:
+        monkeypatch.setattr(settings, "json_backend", "auto")
+        assert serialization.encode_task_rows(rows) == pydantic_bytes
@@ -0,0 +1,411 @@
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+import todo_cli  # noqa: E402 - todo_cli.py lives at the repository root
+from todo_cli import JournalError, TaskJournal, TaskStore, TodoCLI  # noqa: E402
+
+
+def open_cli(data_dir=None, store=None, **journal_options) -> TodoCLI:
+    journal = TaskJournal(str(data_dir), **journal_options) if data_dir is not None else None
+    return TodoCLI(journal, out=io.StringIO(), store=store)
+
+
+def close_cli(cli: TodoCLI) -> None:
+    if cli.journal is not None:
+        cli.journal.close()
+
+
+def task_rows(cli: TodoCLI) -> list[tuple]:
+    return [(task.id, task.title, task.description, task.completed) for task in cli.tasks.values()]
+
+
+def journal_files(data_dir, kind: str) -> list[str]:
+    return sorted(name for name in os.listdir(data_dir) if name.startswith(kind + "-"))
+
+
+@pytest.mark.parametrize("store_name", sorted(todo_cli.STORES))
+def test_journal_reloads_every_kind_of_change(tmp_path, monkeypatch, store_name):
+    cli = open_cli(tmp_path, todo_cli.STORES[store_name]())
+    cli.add_task("Buy milk", "Two litres")
+    cli.add_task("Write report")
+    cli.add_task("Call back")
+    cli.update_task(2, "Write the report", "By Friday")
+    cli.complete_task(1)
+    cli.delete_task(3)
+    close_cli(cli)
+
+    cli = open_cli(tmp_path, todo_cli.STORES[store_name]())
+    assert task_rows(cli) == [(1, "Buy milk", "Two litres", True), (2, "Write the report", "By Friday", False)]
+    assert cli.tasks.completed_count == 1
+    assert cli.next_id == 4
+    monkeypatch.setattr("builtins.input", lambda prompt: "yes")
+    cli.clear_tasks()
+    cli.add_task("Fresh start")
+    close_cli(cli)
+
+    cli = open_cli(tmp_path, todo_cli.STORES[store_name]())
+    try:
+        assert task_rows(cli) == [(1, "Fresh start", "", False)]
+        assert cli.next_id == 2
+    finally:
+        close_cli(cli)
+
+
+def test_journal_compacts_into_a_snapshot(tmp_path):
+    cli = open_cli(tmp_path, compact_min_bytes=512)
+    for n in range(1, 201):
+        cli.add_task(f"Task {n}", f"Description {n}")
+    for n in range(1, 201, 2):
+        cli.complete_task(n)
+    for n in range(1, 201, 5):
+        cli.delete_task(n)
+    expected = task_rows(cli)
+    close_cli(cli)
+
+    snapshots = journal_files(tmp_path, "snapshot")
+    assert len(snapshots) == 1
+    # Segments folded into the snapshot are gone; only the ones after it remain
+    folded = int(snapshots[0].split("-")[1].split(".")[0])
+    assert all(int(name.split("-")[1].split(".")[0]) > folded for name in journal_files(tmp_path, "journal"))
+
+    cli = open_cli(tmp_path)
+    try:
+        assert task_rows(cli) == expected
+        assert cli.next_id == 201
+    finally:
+        close_cli(cli)
+
+
+def test_journal_drops_a_torn_last_record(tmp_path):
+    cli = open_cli(tmp_path)
+    cli.add_task("Kept")
+    cli.add_task("Also kept")
+    close_cli(cli)
+    (segment,) = journal_files(tmp_path, "journal")
+    path = tmp_path / segment
+    intact = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b'{"op":"add","id":3,"ti')
+
+    cli = open_cli(tmp_path)
+    try:
+        assert [task.title for task in cli.tasks.values()] == ["Kept", "Also kept"]
+        assert path.stat().st_size == intact
+        cli.add_task("After the crash")
+        assert cli.next_id == 4
+    finally:
+        close_cli(cli)
+
+    cli = open_cli(tmp_path)
+    try:
+        assert [task.title for task in cli.tasks.values()] == ["Kept", "Also kept", "After the crash"]
+    finally:
+        close_cli(cli)
+
+
+@pytest.mark.skipif(todo_cli.fcntl is None, reason="data directory locking needs fcntl")
+def test_journal_refuses_a_locked_data_directory(tmp_path):
+    cli = open_cli(tmp_path)
+    try:
+        with pytest.raises(JournalError, match="in use by another todo_cli process"):
+            open_cli(tmp_path)
+    finally:
+        close_cli(cli)
+    # Released on close
+    close_cli(open_cli(tmp_path))
+
+
+@pytest.mark.skipif(todo_cli.fcntl is None, reason="data directory locking needs fcntl")
+def test_main_reports_a_locked_data_directory_on_stderr(tmp_path, capsys):
+    cli = open_cli(tmp_path)
+    try:
+        assert todo_cli.main(["--data-dir", str(tmp_path)]) == 1
+    finally:
+        close_cli(cli)
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "Error: Cannot open data directory" in captured.err
+
+
+def test_failed_compaction_is_retried_later(tmp_path, capsys):
+    cli = open_cli(tmp_path, compact_min_bytes=256)
+    journal = cli.journal
+
+    def broken_snapshot(*args):
+        raise RuntimeError("out of memory")
+
+    write_snapshot, journal._write_snapshot = journal._write_snapshot, broken_snapshot
+    try:
+        for _ in range(100):
+            cli.add_task("Task", "Padding to reach the compaction threshold")
+            compactor = journal._compactor
+            if compactor is not None:
+                break
+        compactor.join(5)
+        assert journal._compactor is None
+        assert journal._retry_bytes
+        assert "journal compaction failed: out of memory" in capsys.readouterr().err
+
+        journal._write_snapshot = write_snapshot
+        while journal._journal_bytes <= journal._retry_bytes:
+            cli.add_task("Task", "Padding to reach the compaction threshold")
+        expected = task_rows(cli)
+    finally:
+        close_cli(cli)
+    assert journal_files(tmp_path, "snapshot")
+
+    cli = open_cli(tmp_path)
+    try:
+        assert task_rows(cli) == expected
+    finally:
+        close_cli(cli)
+
+
+def run_main(tmp_path, capsys, commands: str, *options: str) -> tuple[int, str, str]:
+    batch = tmp_path / "commands.txt"
+    batch.write_text(commands)
+    status = todo_cli.main(["--batch", str(batch), *options])
+    captured = capsys.readouterr()
+    return status, captured.out, captured.err
+
+
+def test_batch_reports_failed_lines_and_exit_status(tmp_path, capsys):
+    status, out, err = run_main(tmp_path, capsys, (
+        "# setup\n"
+        "add 'Buy milk' \"Two litres\"\n"
+        "\n"
+        "complete 7\n"
+        "add Second\n"
+        "frobnicate\n"
+    ))
+    assert status == 1
+    assert err.splitlines() == [
+        "line 4: Error: Task with ID 7 not found.",
+        "line 6: Unknown command: 'frobnicate'. Type 'help' for available commands.",
+    ]
+    assert "Task added successfully! (ID: 2)" in out
+    assert out.endswith("Batch finished: 4 command(s), 2 failed | Total: 2 task(s)\n")
+
+    status, out, err = run_main(tmp_path, capsys, "add One\nclear\nadd Two\nexit\nadd Never\n")
+    assert status == 0
+    assert err == ""
+    assert out.endswith("Batch finished: 4 command(s), 0 failed | Total: 1 task(s)\n")
+
+
+def test_batch_quiet_prints_only_failures_and_the_summary(tmp_path, capsys):
+    status, out, err = run_main(tmp_path, capsys, "add One\nlist\ndelete 9\n", "--quiet")
+    assert status == 1
+    assert out == "Batch finished: 3 command(s), 1 failed | Total: 1 task(s)\n"
+    assert err == "line 3: Error: Task with ID 9 not found.\n"
+
+
+def test_batch_reports_an_unreadable_file(tmp_path, capsys):
+    assert todo_cli.main(["--batch", str(tmp_path / "missing.txt")]) == 1
+    assert "Error: Cannot read" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "options, store",
+    [((), TaskStore), (("--store", "columnar"), todo_cli.ColumnarTaskStore)],
+)
+def test_main_uses_records_unless_columnar_is_asked_for(tmp_path, capsys, monkeypatch,
+                                                          options, store):
+    opened = []
+    monkeypatch.setattr(todo_cli, "run_batch", lambda app, path: opened.append(app) or 0)
+    status, _, _ = run_main(tmp_path, capsys, "", *options)
+    assert status == 0
+    assert type(opened[0].tasks) is store
+
+
+def test_quiet_requires_batch(capsys):
+    with pytest.raises(SystemExit):
+        todo_cli.main(["--quiet"])
+    assert "--quiet requires --batch" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "line, parts",
+    [
+        ("add Title", ["add", "Title"]),
+        ("add  'Buy milk'   \"Two litres\" ", ["add", "Buy milk", "Two litres"]),
+        ("add pre'quoted text'post", ["add", "prequoted text", "post"]),
+        ("add \"it's\" ''", ["add", "it's"]),
+        ("add 'runs to the end", ["add", "runs to the end"]),
+    ],
+)
+def test_parse_input_handles_quotes(line, parts):
+    assert TodoCLI().parse_input(line) == parts
+
+
+
+def assert_stores_match(columnar: todo_cli.ColumnarTaskStore, records: TaskStore) -> None:
+    assert list(columnar.rows()) == list(records.rows())
+    assert len(columnar) == len(records)
+    for completed in (None, True, False):
+        assert columnar.count(completed) == records.count(completed)
+        for offset, limit in ((0, None), (0, 10), (5, 3), (1023, 2), (1500, 700), (max(len(records) - 1, 0), 5), (10**6, 1)):
+            assert [task.id for task in columnar.page(offset, limit, completed)] == [
+                task.id for task in records.page(offset, limit, completed)
+            ], (offset, limit, completed)
+
+
+def test_columnar_store_matches_the_record_store():
+    import random
+
+    rng = random.Random(7)
+    columnar, records = todo_cli.ColumnarTaskStore(), TaskStore()
+    for task_id in range(1, 5001):
+        title, description = f"Tâche {task_id}", "✓ détails" * rng.randint(0, 3)
+        for store in (columnar, records):
+            store.add(task_id, title, description, completed=task_id % 7 == 0)
+    assert_stores_match(columnar, records)
+
+    live = list(range(1, 5001))
+    for step in range(20000):
+        task_id = rng.choice(live)
+        action = rng.random()
+        if action < 0.3:
+            title = f"Renamed {step}" if rng.random() < 0.5 else None
+            for store in (columnar, records):
+                store.edit(task_id, title, f"Edited {step}")
+        elif action < 0.5:
+            assert columnar.complete(task_id) == records.complete(task_id)
+        elif len(live) > 50:
+            live.remove(task_id)
+            for store in (columnar, records):
+                del store[task_id]
+    assert_stores_match(columnar, records)
+    # Dead slots and replaced text were reclaimed along the way
+    assert len(columnar._ids) < 5000
+    assert columnar._stale_bytes < len(columnar._text)
+
+    for task_id in live[:20]:
+        assert columnar[task_id].title == records[task_id].title
+        assert columnar.is_completed(task_id) == records.is_completed(task_id)
+    missing = max(set(range(1, 5001)) - set(live))
+    assert missing not in columnar
+    with pytest.raises(KeyError):
+        columnar[missing]
+    with pytest.raises(ValueError):
+        columnar.add(live[-1], "Out of order")
+
+    columnar.clear()
+    records.clear()
+    assert_stores_match(columnar, records)
+
+
+def test_columnar_page_skips_whole_blocks_by_their_counts():
+    store = todo_cli.ColumnarTaskStore()
+    for task_id in range(1, 3 * todo_cli._BLOCK + 1):
+        store.add(task_id, f"Task {task_id}", completed=task_id > 2 * todo_cli._BLOCK)
+    # Mark a task in the first block completed behind the block counters' back: paging that
+    # walked every slot would count it against the offset, block skipping never looks at it
+    store._flags[0] = todo_cli._LIVE | todo_cli._COMPLETED
+    page = list(store.page(offset=5, limit=2, completed=True))
+    assert [task.id for task in page] == [2 * todo_cli._BLOCK + 6, 2 * todo_cli._BLOCK + 7]
+
+
+def listed_ids(cli: TodoCLI) -> list[int]:
+    return [int(line.split()[2]) for line in cli.out.getvalue().splitlines() if line.startswith("[")]
+
+
+@pytest.mark.parametrize("store_name", sorted(todo_cli.STORES))
+def test_list_filters_pages_and_counts(store_name, monkeypatch):
+    # Several output chunks even for a short list
+    monkeypatch.setattr(todo_cli, "LIST_CHUNK_LINES", 4)
+    cli = open_cli(store=todo_cli.STORES[store_name]())
+    cli.quiet = True
+    for n in range(1, 31):
+        cli.add_task(f"Task {n}")
+    for n in range(3, 31, 3):
+        cli.complete_task(n)
+    cli.quiet = False
+
+    def run(line: str) -> str:
+        cli.out = io.StringIO()
+        cli.execute(cli.parse_input(line))
+        return cli.out.getvalue()
+
+    run("list")
+    assert listed_ids(cli) == list(range(1, 31))
+    out = run("list --done --limit 3 --offset=2")
+    assert listed_ids(cli) == [9, 12, 15]
+    assert "Showing completed tasks 3-5 of 10" in out
+    run("list --pending --limit 4")
+    assert listed_ids(cli) == [1, 2, 4, 5]
+    out = run("list --offset 40")
+    assert listed_ids(cli) == []
+    assert "No tasks past offset 40 (30 in all)" in out
+    assert run("list --count") == "Total: 30 task(s) | Completed: 10 | Pending: 20\n"
+
+    assert run("list --pending --done").startswith("Error: --pending and --done cannot be combined.")
+    assert run("list --limit -1").startswith("Error: --limit needs a non-negative number.")
+    assert run("list --sort").startswith("Error: Unknown option '--sort'.")
+    assert cli.last_error is not None
+
+
+def test_search_index_matches_all_terms_and_prefixes():
+    index = todo_cli.TaskSearchIndex()
+    index.add(1, "Buy groceries", "Milk, eggs")
+    index.add(2, "Grocery list", "")
+    index.add(3, "Call the GROCER", "about milk")
+    index.add(4, "Go", "gone")
+
+    assert index.search(["milk"]) == {1, 3}
+    assert index.search(["MILK", "groceries"]) == {1}
+    assert index.search(["groc*"]) == {1, 2, 3}
+    assert index.search(["grocer*"]) == {1, 2, 3}
+    assert index.search(["grocery*"]) == {2}
+    assert index.search(["gr*", "milk"]) == {1, 3}
+    assert index.search(["go*"]) == {4}
+    assert index.search(["g*"]) == {1, 2, 3, 4}
+    assert index.search(["groc"]) == set()
+    assert index.search(["milk", "missing"]) == set()
+    assert index.search(["***"]) == set()
+
+    index.remove(1, "Buy groceries", "Milk, eggs")
+    assert index.search(["milk"]) == {3}
+    assert index.search(["groceries*"]) == set()
+    assert index.search(["eggs"]) == set()
+    assert len(index) == 9
+
+
+@pytest.mark.parametrize("store_name", sorted(todo_cli.STORES))
+def test_find_follows_changes_made_after_the_index_is_built(store_name):
+    cli = open_cli(store=todo_cli.STORES[store_name]())
+    cli.quiet = True
+    cli.add_task("Buy milk", "Semi-skimmed")
+    cli.add_task("Milk the cow")
+    cli.add_task("Write report", "Quarterly milestones")
+
+    def find(line: str) -> list[int]:
+        cli.quiet, cli.out = False, io.StringIO()
+        cli.execute(cli.parse_input(line))
+        cli.quiet = True
+        return listed_ids(cli)
+
+    assert find("find milk") == [1, 2]
+    assert find("find mil*") == [1, 2, 3]
+    cli.add_task("Oat milk")
+    cli.update_task(2, "Feed the cow")
+    cli.update_task(3, description="Yearly targets")
+    cli.complete_task(1)
+    assert find("find milk") == [1, 4]
+    assert find("find mil* --pending") == [4]
+    assert find("find mil* --done") == [1]
+    assert find("find --limit 1 milk") == [1]
+    assert find("find cow") == [2]
+    cli.delete_task(4)
+    assert find("find milk") == [1]
+    cli.clear_tasks(confirm=False)
+    cli.add_task("Milk again")
+    assert find("find milk") == [1]
+    assert find("find 'write report'") == []
@@ -6,4 +6,4 @@ cd src/backend
 pip install -r requirements.txt
 
 echo "Starting backend server..."
-exec uvicorn app.main:app --host 0.0.0.0 --port $PORT
+exec python -m app.server --host 0.0.0.0 --port $PORT
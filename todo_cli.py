@@ -6,18 +6,37 @@ Author: Tabraiz Haider
 Description: A command-line based Todo application for task management.
 """
 
+import argparse
+import heapq
+import io
+import json
+import os
+import re
 import sys
-from typing import List, Dict, Optional
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from typing import Any, List, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one process per data directory is on the user
+    fcntl = None
 
 
 class Task:
     """Represents a single task with id, title, description and completion status."""
 
-    def __init__(self, task_id: int, title: str, description: str = ""):
+    # No per-instance __dict__: a few million tasks would otherwise cost gigabytes
+    __slots__ = ("id", "title", "description", "completed")
+
+    def __init__(self, task_id: int, title: str, description: str = "", completed: bool = False):
         self.id = task_id
         self.title = title
         self.description = description
-        self.completed = False
+        self.completed = completed
 
     def __str__(self) -> str:
         status = "✓" if self.completed else "✗"
@@ -25,102 +44,926 @@ class Task:
         return f"[{status}] ID: {self.id} - {self.title}{desc_text}"
 
 
+class TaskStore:
+    """
+    Tasks as Task records in a dict keyed by ID. TodoCLI and the journal change tasks only
+    through these methods, so ColumnarTaskStore can stand in for it.
+
+    IDs are handed out in increasing order, so the dict's insertion order is ID order.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[int, Task] = {}
+        self.completed_count = 0
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._tasks
+
+    def __getitem__(self, task_id: int) -> Task:
+        return self._tasks[task_id]
+
+    def __delitem__(self, task_id: int) -> None:
+        self.completed_count -= self._tasks.pop(task_id).completed
+
+    def add(self, task_id: int, title: str, description: str = "", completed: bool = False) -> None:
+        """Store a new task; `task_id` must be higher than every ID already stored."""
+        self._tasks[task_id] = Task(task_id, title, description, completed)
+        self.completed_count += completed
+
+    def edit(self, task_id: int, title: Optional[str] = None, description: Optional[str] = None) -> None:
+        task = self._tasks[task_id]
+        if title is not None:
+            task.title = title
+        if description is not None:
+            task.description = description
+
+    def is_completed(self, task_id: int) -> bool:
+        return self._tasks[task_id].completed
+
+    def complete(self, task_id: int) -> bool:
+        """Mark a task completed; returns False if it already was."""
+        task = self._tasks[task_id]
+        if task.completed:
+            return False
+        task.completed = True
+        self.completed_count += 1
+        return True
+
+    def clear(self) -> None:
+        self._tasks.clear()
+        self.completed_count = 0
+
+    def count(self, completed: Optional[bool] = None) -> int:
+        """Tasks in total, or only completed (True) or pending (False) ones; from counters."""
+        if completed is None:
+            return len(self._tasks)
+        return self.completed_count if completed else len(self._tasks) - self.completed_count
+
+    def values(self) -> Iterator[Task]:
+        """All tasks in ID order."""
+        return iter(self._tasks.values())
+
+    def page(self, offset: int = 0, limit: Optional[int] = None,
+             completed: Optional[bool] = None) -> Iterator[Task]:
+        """Up to `limit` tasks in ID order after skipping `offset`, optionally only completed or pending ones."""
+        tasks: Iterable[Task] = self._tasks.values()
+        if completed is not None:
+            tasks = (task for task in tasks if task.completed == completed)
+        # A dict offers no positions to jump to: the skipped tasks are walked over
+        return islice(tasks, offset, None if limit is None else offset + limit)
+
+    def rows(self) -> Iterator[Tuple[int, str, str, bool]]:
+        """(id, title, description, completed) for every task, in ID order."""
+        for task in self._tasks.values():
+            yield task.id, task.title, task.description, task.completed
+
+
+# ColumnarTaskStore slot flags
+_LIVE = 1
+_COMPLETED = 2
+# Slots per block of ColumnarTaskStore's live/completed counts
+_BLOCK = 1024
+
+
+class ColumnarTaskStore:
+    """
+    Tasks in parallel arrays instead of one object each: about 25 bytes per task plus its
+    UTF-8 text, against a few hundred for a Task record in a dict. Same methods as TaskStore,
+    but lookups, edits and completions run about 5x slower, so it is opt-in (--store columnar).
+
+    Slot i holds the task with the i-th smallest ID: `_ids` (sorted, searched by bisection),
+    one flag byte (live, completed), and the offset and lengths of its title and description,
+    stored back to back in one shared bytearray. Edits append the new text; deletes only
+    clear the live flag. Once dead slots or stale text outweigh the live ones, the columns
+    are rebuilt, so that work is amortised over the changes that caused it.
+
+    Live and completed tasks are also counted per block of _BLOCK slots, so paging can skip
+    to an offset block by block instead of walking every task before it.
+
+    Tasks handed out are copies: change them through the store's methods.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self._ids = array("q")
+        self._flags = bytearray()
+        self._offsets = array("Q")
+        self._title_lens = array("I")
+        self._desc_lens = array("I")
+        self._text = bytearray()
+        self._block_live = array("I")
+        self._block_completed = array("I")
+        self._live = 0
+        self.completed_count = 0
+        self._stale_bytes = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __contains__(self, task_id: int) -> bool:
+        return self._slot(task_id) >= 0
+
+    def __getitem__(self, task_id: int) -> Task:
+        slot = self._slot(task_id)
+        if slot < 0:
+            raise KeyError(task_id)
+        return self._task(slot)
+
+    def __delitem__(self, task_id: int) -> None:
+        slot = self._slot(task_id)
+        if slot < 0:
+            raise KeyError(task_id)
+        if self._flags[slot] & _COMPLETED:
+            self._block_completed[slot // _BLOCK] -= 1
+            self.completed_count -= 1
+        self._flags[slot] = 0
+        self._block_live[slot // _BLOCK] -= 1
+        self._live -= 1
+        self._stale_bytes += self._title_lens[slot] + self._desc_lens[slot]
+        self._maybe_vacuum()
+
+    def add(self, task_id: int, title: str, description: str = "", completed: bool = False) -> None:
+        """Store a new task; `task_id` must be higher than every ID already stored."""
+        if self._ids and task_id <= self._ids[-1]:
+            raise ValueError(f"task ID {task_id} is not above the highest stored ID {self._ids[-1]}")
+        if len(self._ids) % _BLOCK == 0:
+            self._block_live.append(0)
+            self._block_completed.append(0)
+        self._block_live[-1] += 1
+        if completed:
+            self._block_completed[-1] += 1
+            self.completed_count += 1
+        self._ids.append(task_id)
+        self._flags.append(_LIVE | _COMPLETED if completed else _LIVE)
+        self._offsets.append(len(self._text))
+        title_bytes = title.encode("utf-8")
+        desc_bytes = description.encode("utf-8")
+        self._title_lens.append(len(title_bytes))
+        self._desc_lens.append(len(desc_bytes))
+        self._text += title_bytes
+        self._text += desc_bytes
+        self._live += 1
+
+    def edit(self, task_id: int, title: Optional[str] = None, description: Optional[str] = None) -> None:
+        slot = self._slot(task_id)
+        if slot < 0:
+            raise KeyError(task_id)
+        start = self._offsets[slot]
+        middle = start + self._title_lens[slot]
+        end = middle + self._desc_lens[slot]
+        title_bytes = self._text[start:middle] if title is None else title.encode("utf-8")
+        desc_bytes = self._text[middle:end] if description is None else description.encode("utf-8")
+        self._stale_bytes += self._title_lens[slot] + self._desc_lens[slot]
+        self._offsets[slot] = len(self._text)
+        self._title_lens[slot] = len(title_bytes)
+        self._desc_lens[slot] = len(desc_bytes)
+        self._text += title_bytes
+        self._text += desc_bytes
+        self._maybe_vacuum()
+
+    def is_completed(self, task_id: int) -> bool:
+        slot = self._slot(task_id)
+        if slot < 0:
+            raise KeyError(task_id)
+        return bool(self._flags[slot] & _COMPLETED)
+
+    def complete(self, task_id: int) -> bool:
+        """Mark a task completed; returns False if it already was."""
+        slot = self._slot(task_id)
+        if slot < 0:
+            raise KeyError(task_id)
+        if self._flags[slot] & _COMPLETED:
+            return False
+        self._flags[slot] |= _COMPLETED
+        self._block_completed[slot // _BLOCK] += 1
+        self.completed_count += 1
+        return True
+
+    def count(self, completed: Optional[bool] = None) -> int:
+        """Tasks in total, or only completed (True) or pending (False) ones; from counters."""
+        if completed is None:
+            return self._live
+        return self.completed_count if completed else self._live - self.completed_count
+
+    def page(self, offset: int = 0, limit: Optional[int] = None,
+             completed: Optional[bool] = None) -> Iterator[Task]:
+        """Up to `limit` tasks in ID order after skipping `offset`, optionally only completed or pending ones."""
+        wanted = None if completed is None else (_LIVE | _COMPLETED if completed else _LIVE)
+        remaining = -1 if limit is None else limit
+        flags = self._flags
+        for block in range(len(self._block_live)):
+            if remaining == 0:
+                return
+            matching = self._block_matching(block, completed)
+            if offset >= matching:
+                # The whole block is skipped (or has nothing to show) without looking at its slots
+                offset -= matching
+                continue
+            for slot in range(block * _BLOCK, min((block + 1) * _BLOCK, len(flags))):
+                slot_flags = flags[slot]
+                if not slot_flags or (wanted is not None and slot_flags != wanted):
+                    continue
+                if offset:
+                    offset -= 1
+                    continue
+                yield self._task(slot)
+                remaining -= 1
+                if remaining == 0:
+                    return
+
+    def _block_matching(self, block: int, completed: Optional[bool]) -> int:
+        if completed is None:
+            return self._block_live[block]
+        if completed:
+            return self._block_completed[block]
+        return self._block_live[block] - self._block_completed[block]
+
+    def values(self) -> Iterator[Task]:
+        """All tasks in ID order."""
+        for slot, flags in enumerate(self._flags):
+            if flags:
+                yield self._task(slot)
+
+    def rows(self) -> Iterator[Tuple[int, str, str, bool]]:
+        """(id, title, description, completed) for every task, in ID order."""
+        for task in self.values():
+            yield task.id, task.title, task.description, task.completed
+
+    def _slot(self, task_id: int) -> int:
+        ids = self._ids
+        if not ids:
+            return -1
+        # IDs are handed out one after another, so without gaps the slot follows from the ID
+        slot = task_id - ids[0]
+        if not (0 <= slot < len(ids) and ids[slot] == task_id):
+            slot = bisect_left(ids, task_id)
+            if slot == len(ids) or ids[slot] != task_id:
+                return -1
+        return slot if self._flags[slot] else -1
+
+    def _task(self, slot: int) -> Task:
+        start = self._offsets[slot]
+        middle = start + self._title_lens[slot]
+        end = middle + self._desc_lens[slot]
+        text = self._text
+        return Task(self._ids[slot], text[start:middle].decode("utf-8"), text[middle:end].decode("utf-8"),
+                    bool(self._flags[slot] & _COMPLETED))
+
+    def _maybe_vacuum(self) -> None:
+        dead_slots = len(self._ids) - self._live
+        if dead_slots > max(self._live, 1024) or self._stale_bytes > max(len(self._text) // 2, 1 << 16):
+            self._vacuum()
+
+    def _vacuum(self) -> None:
+        ids, offsets = array("q"), array("Q")
+        title_lens, desc_lens = array("I"), array("I")
+        flags, text = bytearray(), bytearray()
+        old_text = memoryview(self._text)
+        for slot, slot_flags in enumerate(self._flags):
+            if not slot_flags:
+                continue
+            start = self._offsets[slot]
+            ids.append(self._ids[slot])
+            flags.append(slot_flags)
+            offsets.append(len(text))
+            title_lens.append(self._title_lens[slot])
+            desc_lens.append(self._desc_lens[slot])
+            text += old_text[start:start + self._title_lens[slot] + self._desc_lens[slot]]
+        old_text.release()
+        self._ids, self._offsets = ids, offsets
+        self._title_lens, self._desc_lens = title_lens, desc_lens
+        self._flags, self._text = flags, text
+        self._stale_bytes = 0
+        self._block_live, self._block_completed = array("I"), array("I")
+        for start in range(0, len(flags), _BLOCK):
+            block_flags = flags[start:start + _BLOCK]
+            completed = block_flags.count(_LIVE | _COMPLETED)
+            self._block_live.append(completed + block_flags.count(_LIVE))
+            self._block_completed.append(completed)
+
+
+STORES = {"records": TaskStore, "columnar": ColumnarTaskStore}
+
+
+# A search word: letters, digits and underscores
+_WORD = re.compile(r"\w+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.casefold())
+
+
+class TaskSearchIndex:
+    """
+    Inverted index from the words of task titles and descriptions to task IDs, for `find`.
+
+    Every word maps to the set of IDs containing it. For prefix queries, every word is also
+    filed under its first three characters, so a prefix only checks the words filed under
+    its own first three characters, not the whole vocabulary. A shorter prefix checks the
+    keys instead, of which there are far fewer than words.
+    """
+
+    PREFIX_KEY_LENGTH = 3
+
+    def __init__(self):
+        self._postings: Dict[str, set] = {}
+        self._words_by_prefix: Dict[str, set] = {}
+
+    def __len__(self) -> int:
+        """Distinct words indexed."""
+        return len(self._postings)
+
+    def add(self, task_id: int, title: str, description: str) -> None:
+        words = set(_words(title))
+        if description:
+            words.update(_words(description))
+        postings = self._postings
+        for word in words:
+            ids = postings.get(word)
+            if ids is not None:
+                ids.add(task_id)
+                continue
+            postings[word] = {task_id}
+            self._words_by_prefix.setdefault(word[:self.PREFIX_KEY_LENGTH], set()).add(word)
+
+    def remove(self, task_id: int, title: str, description: str) -> None:
+        """Forget a task; `title` and `description` must be the text it was added with."""
+        for word in set(_words(title)).union(_words(description)):
+            ids = self._postings.get(word)
+            if ids is None:
+                continue
+            ids.discard(task_id)
+            if not ids:
+                del self._postings[word]
+                key = word[:self.PREFIX_KEY_LENGTH]
+                words = self._words_by_prefix[key]
+                words.discard(word)
+                if not words:
+                    del self._words_by_prefix[key]
+
+    def clear(self) -> None:
+        self._postings.clear()
+        self._words_by_prefix.clear()
+
+    def search(self, terms: List[str]) -> set:
+        """
+        IDs of the tasks containing every term (AND). A term ending in '*' matches any word
+        starting with it. Terms are split into words like the indexed text; a term with no
+        word in it is ignored. Returns a new set.
+        """
+        matches: List[set] = []
+        for term in terms:
+            words = _words(term)
+            if not words:
+                continue
+            prefix = words.pop() if term.endswith("*") else None
+            matches.extend(self._postings.get(word, set()) for word in words)
+            if prefix is not None:
+                matches.append(self._prefix_matches(prefix))
+        if not matches:
+            return set()
+        # Intersecting from the smallest set keeps the work within its size
+        matches.sort(key=len)
+        return matches[0].intersection(*matches[1:])
+
+    def _prefix_matches(self, prefix: str) -> set:
+        if len(prefix) < self.PREFIX_KEY_LENGTH:
+            words = [word for key, filed in self._words_by_prefix.items() if key.startswith(prefix)
+                     for word in filed]
+        else:
+            words = self._words_by_prefix.get(prefix[:self.PREFIX_KEY_LENGTH], ())
+            if len(prefix) > self.PREFIX_KEY_LENGTH:
+                words = [word for word in words if word.startswith(prefix)]
+        ids: set = set()
+        for word in words:
+            ids.update(self._postings[word])
+        return ids
+
+
+# Unquoted token text: everything up to the next space or quote
+_PLAIN_RUN = re.compile(r"[^ \"']+")
+# `list` hands its output over this many lines at a time
+LIST_CHUNK_LINES = 2000
+# Batch output is written in chunks of this size rather than line by line
+BATCH_OUTPUT_BUFFER = 1 << 20
+
+# How long the journal waits to gather more records into one fsync
+JOURNAL_FSYNC_INTERVAL = 0.05
+# Appended records are handed to the OS in chunks of about this size
+JOURNAL_WRITE_BUFFER = 1 << 16
+# Below this size the journal is never compacted, however small the snapshot
+JOURNAL_COMPACT_MIN_BYTES = 1 << 20
+
+
+_encode_record = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+class JournalError(Exception):
+    """Raised when a data directory cannot be opened or read back."""
+
+
+def apply_record(tasks: TaskStore, next_id: int, record: Dict[str, Any]) -> int:
+    """Apply one journal record to `tasks`; returns the next free task ID."""
+    op = record["op"]
+    if op == "add":
+        tasks.add(record["id"], record["title"], record["description"])
+        return max(next_id, record["id"] + 1)
+    if op == "update":
+        tasks.edit(record["id"], record.get("title"), record.get("description"))
+    elif op == "complete":
+        tasks.complete(record["id"])
+    elif op == "delete":
+        del tasks[record["id"]]
+    elif op == "clear":
+        tasks.clear()
+        return 1
+    else:
+        raise ValueError(f"unknown operation {op!r}")
+    return next_id
+
+
+class TaskJournal:
+    """
+    Durable task storage in a data directory: a snapshot plus an append-only journal.
+
+    Every change is appended to the journal as one JSON line. Appends only reach the OS;
+    a background thread fsyncs whatever has gathered every JOURNAL_FSYNC_INTERVAL seconds,
+    so one fsync covers a whole burst of commands. A crash loses at most that window.
+
+    The journal is split into numbered segments (journal-<n>.log); snapshot-<n>.json holds
+    the state after segments 1..n. Once the segments after the snapshot outgrow it, the
+    journal moves on to a fresh segment and a background thread folds the old snapshot
+    and the finished segments into a new snapshot, then deletes them. Startup loads the
+    latest snapshot and replays only the segments after it, so its cost follows the
+    number of tasks, not the length of the history.
+    """
+
+    def __init__(self, data_dir: str, fsync_interval: float = JOURNAL_FSYNC_INTERVAL,
+                 compact_min_bytes: int = JOURNAL_COMPACT_MIN_BYTES):
+        self.data_dir = data_dir
+        self.fsync_interval = fsync_interval
+        self.compact_min_bytes = compact_min_bytes
+        self._file = None
+        self._lock_file = None
+        self._segment = 0
+        self._snapshot_segment = 0
+        self._snapshot_bytes = 0
+        self._journal_bytes = 0
+        # After a failed compaction, wait for the journal to double before trying again
+        self._retry_bytes = 0
+        # Records appended but not yet written to the segment file
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._appended = 0
+        self._synced = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._compactor: Optional[threading.Thread] = None
+        self._store_class = TaskStore
+        self._flusher: Optional[threading.Thread] = None
+
+    def load(self, tasks: TaskStore) -> int:
+        """Lock the data directory and read it back into the empty `tasks`; returns the next free ID."""
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._acquire_lock()
+        # Compaction rebuilds the state in a store of the same kind
+        self._store_class = type(tasks)
+        snapshots, segments = self._scan()
+        next_id = 1
+        if snapshots:
+            self._snapshot_segment = snapshots[-1]
+            path = self._snapshot_path(self._snapshot_segment)
+            next_id = self._read_snapshot(path, tasks)
+            self._snapshot_bytes = os.path.getsize(path)
+
+        pending = [n for n in segments if n > self._snapshot_segment]
+        for n in pending:
+            next_id = self._replay_segment(n, tasks, next_id, last=n == pending[-1])
+            self._journal_bytes += os.path.getsize(self._segment_path(n))
+        # Files already folded into the snapshot, left by a compaction cut short
+        self._remove_up_to(self._snapshot_segment, keep_snapshot=self._snapshot_segment)
+
+        self._segment = pending[-1] if pending else self._snapshot_segment + 1
+        self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+        self._flusher = threading.Thread(target=self._flush_loop, name="journal-fsync", daemon=True)
+        self._flusher.start()
+        return next_id
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Log one change; it is fsynced with the next group."""
+        line = _encode_record(record) + "\n"
+        with self._cond:
+            self._buffer.append(line)
+            self._buffered_bytes += len(line)
+            if self._buffered_bytes >= JOURNAL_WRITE_BUFFER:
+                self._write_buffer()
+            self._appended += 1
+            self._journal_bytes += len(line)
+            if self._appended == self._synced + 1:
+                # The first record of a new group wakes the flusher
+                self._cond.notify()
+            if (self._compactor is None
+                    and self._journal_bytes > max(self._snapshot_bytes, self.compact_min_bytes,
+                                                  self._retry_bytes)):
+                self._start_compaction()
+
+    def sync(self) -> None:
+        """Make every change appended so far durable before returning."""
+        with self._cond:
+            if self._synced == self._appended:
+                return
+            target = self._appended
+            self._write_buffer()
+            self._file.flush()
+            # A duplicate stays valid if the segment is rotated and closed while fsync runs
+            fd = os.dup(self._file.fileno())
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        with self._cond:
+            self._synced = max(self._synced, target)
+
+    def close(self) -> None:
+        """Wait for a running compaction, make everything durable and release the data directory."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            compactor = self._compactor
+        if self._flusher is not None:
+            self._flusher.join()
+        if compactor is not None:
+            compactor.join()
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _write_buffer(self) -> None:
+        # Called with the lock held
+        self._file.write("".join(self._buffer))
+        self._buffer.clear()
+        self._buffered_bytes = 0
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and self._synced == self._appended:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            # Let the rest of the burst arrive, then make it durable in one go
+            time.sleep(self.fsync_interval)
+            self.sync()
+
+    def _start_compaction(self) -> None:
+        # Called with the lock held: seal the current segment and carry on in a fresh one
+        self._write_buffer()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._synced = self._appended
+        self._file.close()
+        sealed = self._segment
+        self._segment += 1
+        self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+        self._compactor = threading.Thread(
+            target=self._compact, args=(self._snapshot_segment, sealed, self._journal_bytes),
+            name="journal-compact", daemon=True)
+        self._compactor.start()
+
+    def _compact(self, base: int, sealed: int, folded_bytes: int) -> None:
+        try:
+            # Rebuilt from the files alone, so the live tasks are never touched from this thread
+            tasks = self._store_class()
+            next_id = self._read_snapshot(self._snapshot_path(base), tasks) if base else 1
+            for n in range(base + 1, sealed + 1):
+                next_id = self._replay_segment(n, tasks, next_id, last=False)
+            size = self._write_snapshot(sealed, tasks, next_id)
+            self._remove_up_to(sealed, keep_snapshot=sealed)
+        except Exception as e:
+            # Anything escaping would leave _compactor set and stop compaction for good
+            print(f"Warning: journal compaction failed: {e}", file=sys.stderr)
+            with self._cond:
+                self._retry_bytes = 2 * self._journal_bytes
+                self._compactor = None
+            return
+        with self._cond:
+            self._retry_bytes = 0
+            self._snapshot_segment = sealed
+            self._snapshot_bytes = size
+            self._journal_bytes -= folded_bytes
+            self._compactor = None
+
+    def _write_snapshot(self, segment: int, tasks: TaskStore, next_id: int) -> int:
+        path = self._snapshot_path(segment)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"next_id": next_id}) + "\n")
+            for row in tasks.rows():
+                f.write(_encode_record(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._sync_dir()
+        return os.path.getsize(path)
+
+    def _read_snapshot(self, path: str, tasks: TaskStore) -> int:
+        try:
+            with open(path, encoding="utf-8") as f:
+                next_id = json.loads(f.readline())["next_id"]
+                for line in f:
+                    tasks.add(*json.loads(line))
+        except (ValueError, KeyError, TypeError) as e:
+            raise JournalError(f"Snapshot {path} is corrupt: {e}") from None
+        return next_id
+
+    def _replay_segment(self, segment: int, tasks: TaskStore, next_id: int, last: bool) -> int:
+        path = self._segment_path(segment)
+        good = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("record is incomplete")
+                    record = json.loads(line)
+                except ValueError as e:
+                    if not last:
+                        raise JournalError(f"Journal {path} is corrupt at byte {good}: {e}") from None
+                    break
+                try:
+                    next_id = apply_record(tasks, next_id, record)
+                except (KeyError, TypeError, ValueError) as e:
+                    raise JournalError(f"Journal {path} has an invalid record at byte {good}: {e}") from None
+                good += len(line)
+        if last and good < os.path.getsize(path):
+            # A torn write at the tail: the command never completed, so drop it
+            with open(path, "r+b") as f:
+                f.truncate(good)
+        return next_id
+
+    def _scan(self) -> Tuple[List[int], List[int]]:
+        snapshots, segments = [], []
+        for name in os.listdir(self.data_dir):
+            stem, _, ext = name.partition(".")
+            kind, _, number = stem.partition("-")
+            if not number.isdigit():
+                continue
+            if kind == "snapshot" and ext == "json":
+                snapshots.append(int(number))
+            elif kind == "journal" and ext == "log":
+                segments.append(int(number))
+        return sorted(snapshots), sorted(segments)
+
+    def _remove_up_to(self, segment: int, keep_snapshot: int) -> None:
+        snapshots, segments = self._scan()
+        for n in snapshots:
+            if n != keep_snapshot:
+                os.remove(self._snapshot_path(n))
+        for n in segments:
+            if n <= segment:
+                os.remove(self._segment_path(n))
+        for name in os.listdir(self.data_dir):
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(self.data_dir, name))
+
+    def _acquire_lock(self) -> None:
+        self._lock_file = open(os.path.join(self.data_dir, ".lock"), "w")
+        if fcntl is None:
+            return
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise JournalError(f"{self.data_dir} is in use by another todo_cli process") from None
+
+    def _sync_dir(self) -> None:
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.data_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _snapshot_path(self, segment: int) -> str:
+        return os.path.join(self.data_dir, f"snapshot-{segment:08d}.json")
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.data_dir, f"journal-{segment:08d}.log")
+
+
 class TodoCLI:
     """Main Todo CLI application class."""
 
-    def __init__(self):
-        self.tasks: Dict[int, Task] = {}
+    def __init__(self, journal: Optional[TaskJournal] = None, out: Optional[TextIO] = None,
+                 quiet: bool = False, store: Optional[TaskStore] = None):
+        self.journal = journal
+        # Where command output goes (sys.stdout when None); quiet drops everything but errors
+        self.out = out
+        self.quiet = quiet
+        # Whether a person is at the prompt; batch runs never stop to ask for confirmation
+        self.interactive = True
+        # What the last failed command reported, for batch runs to count and locate failures
+        self.last_error: Optional[str] = None
+        # Word index for `find`: built from the store by the first search, then kept up to date
+        self._index: Optional[TaskSearchIndex] = None
+        # A TaskStore or ColumnarTaskStore; empty until the journal is loaded into it
+        self.tasks = store if store is not None else TaskStore()
         self.next_id = 1
+        if journal is not None:
+            self.next_id = journal.load(self.tasks)
+
+    def _print(self, text: str = "") -> None:
+        if not self.quiet:
+            (self.out or sys.stdout).write(text + "\n")
+
+    def _error(self, message: str) -> None:
+        self.last_error = message
+        self._print(message)
+
+    def _log(self, record: Dict[str, Any]) -> None:
+        if self.journal is not None:
+            self.journal.append(record)
 
     def add_task(self, title: str, description: str = "") -> None:
         """Add a new task to the list."""
         if not title or not title.strip():
-            print("Error: Task title cannot be empty.")
+            self._error("Error: Task title cannot be empty.")
             return
 
-        task = Task(self.next_id, title.strip(), description.strip())
-        self.tasks[self.next_id] = task
-        print(f"Task added successfully! (ID: {self.next_id})")
+        title, description = title.strip(), description.strip()
+        self.tasks.add(self.next_id, title, description)
+        if self._index is not None:
+            self._index.add(self.next_id, title, description)
+        self._log({"op": "add", "id": self.next_id, "title": title, "description": description})
+        self._print(f"Task added successfully! (ID: {self.next_id})")
         self.next_id += 1
 
     def update_task(self, task_id: int, title: Optional[str] = None,
                     description: Optional[str] = None) -> None:
         """Update an existing task by ID."""
         if task_id not in self.tasks:
-            print(f"Error: Task with ID {task_id} not found.")
+            self._error(f"Error: Task with ID {task_id} not found.")
             return
 
         if title is None and description is None:
-            print("Error: Please provide at least title or description to update.")
+            self._error("Error: Please provide at least title or description to update.")
             return
 
-        task = self.tasks[task_id]
+        record: Dict[str, Any] = {"op": "update", "id": task_id}
 
         if title is not None:
             if not title.strip():
-                print("Error: Task title cannot be empty.")
+                self._error("Error: Task title cannot be empty.")
                 return
-            task.title = title.strip()
+            title = record["title"] = title.strip()
 
         if description is not None:
-            task.description = description.strip()
+            description = record["description"] = description.strip()
 
-        print(f"Task {task_id} updated successfully!")
+        if self._index is not None:
+            old = self.tasks[task_id]
+            self._index.remove(task_id, old.title, old.description)
+            self._index.add(task_id, old.title if title is None else title,
+                            old.description if description is None else description)
+        self.tasks.edit(task_id, title, description)
+        self._log(record)
+
+        self._print(f"Task {task_id} updated successfully!")
 
     def complete_task(self, task_id: int) -> None:
         """Mark a task as completed by ID."""
         if task_id not in self.tasks:
-            print(f"Error: Task with ID {task_id} not found.")
+            self._error(f"Error: Task with ID {task_id} not found.")
             return
 
-        task = self.tasks[task_id]
-        if task.completed:
-            print(f"Task {task_id} is already completed.")
+        if not self.tasks.complete(task_id):
+            self._print(f"Task {task_id} is already completed.")
         else:
-            task.completed = True
-            print(f"Task {task_id} marked as completed!")
+            self._log({"op": "complete", "id": task_id})
+            self._print(f"Task {task_id} marked as completed!")
 
     def delete_task(self, task_id: int) -> None:
         """Delete a task by ID."""
         if task_id not in self.tasks:
-            print(f"Error: Task with ID {task_id} not found.")
+            self._error(f"Error: Task with ID {task_id} not found.")
             return
 
+        if self._index is not None:
+            old = self.tasks[task_id]
+            self._index.remove(task_id, old.title, old.description)
         del self.tasks[task_id]
-        print(f"Task {task_id} deleted successfully!")
+        self._log({"op": "delete", "id": task_id})
+        self._print(f"Task {task_id} deleted successfully!")
 
-    def list_tasks(self) -> None:
-        """List all tasks with their status."""
+    def list_tasks(self, completed: Optional[bool] = None, limit: Optional[int] = None,
+                   offset: int = 0, count_only: bool = False) -> None:
+        """
+        List tasks with their status in ID order: all of them, or only completed (True) or
+        pending (False) ones, `limit` at a time from `offset`. With `count_only`, just the totals.
+        """
         if not self.tasks:
-            print("No tasks found. Add a task to get started!")
+            self._print("No tasks found. Add a task to get started!")
             return
 
-        print("\n" + "=" * 60)
-        print("TODO LIST")
-        print("=" * 60)
+        total = len(self.tasks)
+        done = self.tasks.completed_count
+        summary = f"Total: {total} task(s) | Completed: {done} | Pending: {total - done}"
+        if count_only:
+            self._print(summary)
+            return
 
-        for task_id in sorted(self.tasks.keys()):
-            print(self.tasks[task_id])
-            print("-" * 60)
+        kind = {None: "", True: "completed ", False: "pending "}[completed]
+        matching = self.tasks.count(completed)
+        if not matching:
+            self._print(f"No {kind}tasks found.")
+            return
 
-        completed = sum(1 for task in self.tasks.values() if task.completed)
-        total = len(self.tasks)
-        print(f"\nTotal: {total} task(s) | Completed: {completed} | Pending: {total - completed}")
-        print()
+        shown = self._print_tasks("TODO LIST", self.tasks.page(offset, limit, completed))
+        if shown < matching:
+            if shown:
+                self._print(f"Showing {kind}tasks {offset + 1}-{offset + shown} of {matching}")
+            else:
+                self._print(f"No {kind}tasks past offset {offset} ({matching} in all)")
+        self._print("\n" + summary)
+        self._print()
+
+    def find_tasks(self, terms: List[str], completed: Optional[bool] = None,
+                   limit: Optional[int] = None) -> None:
+        """
+        Show the tasks whose title or description contains every term, in ID order. A term
+        ending in '*' matches words starting with it. Optionally only completed (True) or
+        pending (False) tasks, and at most `limit` of them.
+        """
+        if self._index is None:
+            self._index = TaskSearchIndex()
+            for task_id, title, description, _ in self.tasks.rows():
+                self._index.add(task_id, title, description)
+
+        ids = self._index.search(terms)
+        if completed is not None:
+            ids = [task_id for task_id in ids if self.tasks.is_completed(task_id) == completed]
+        kind = {None: "", True: "completed ", False: "pending "}[completed]
+        if not ids:
+            self._print(f"No {kind}tasks match '{' '.join(terms)}'.")
+            return
+
+        # Only the shown IDs need ordering, not every match
+        shown_ids = sorted(ids) if limit is None or limit >= len(ids) else heapq.nsmallest(limit, ids)
+        shown = self._print_tasks("SEARCH RESULTS", (self.tasks[task_id] for task_id in shown_ids))
+        if shown < len(ids):
+            self._print(f"Showing {shown} of {len(ids)} matching {kind}task(s)")
+        else:
+            self._print(f"{len(ids)} matching {kind}task(s)")
+        self._print()
 
-    def clear_tasks(self) -> None:
-        """Clear all tasks from memory."""
+    def _print_tasks(self, heading: str, tasks: Iterable[Task]) -> int:
+        """Print `tasks` under `heading`, handing output over in chunks; returns how many there were."""
+        self._print("\n" + "=" * 60)
+        self._print(heading)
+        self._print("=" * 60)
+
+        separator = "-" * 60
+        chunk: List[str] = []
+        shown = 0
+        for task in tasks:
+            chunk.append(str(task))
+            chunk.append(separator)
+            shown += 1
+            if len(chunk) >= LIST_CHUNK_LINES:
+                self._print("\n".join(chunk))
+                chunk.clear()
+        if chunk:
+            self._print("\n".join(chunk))
+        return shown
+
+    def clear_tasks(self, confirm: bool = True) -> None:
+        """Clear all tasks, asking first unless `confirm` is False."""
         if not self.tasks:
-            print("No tasks to clear.")
+            self._print("No tasks to clear.")
             return
 
-        confirm = input("Are you sure you want to clear all tasks? (yes/no): ").strip().lower()
-        if confirm in ['yes', 'y']:
+        answer = "yes"
+        if confirm:
+            answer = input("Are you sure you want to clear all tasks? (yes/no): ").strip().lower()
+        if answer in ['yes', 'y']:
             self.tasks.clear()
+            if self._index is not None:
+                self._index.clear()
             self.next_id = 1
-            print("All tasks cleared successfully!")
+            self._log({"op": "clear"})
+            self._print("All tasks cleared successfully!")
         else:
-            print("Clear operation cancelled.")
+            self._print("Clear operation cancelled.")
 
     def print_help(self) -> None:
         """Print help information about available commands."""
@@ -132,7 +975,13 @@ COMMANDS:
   update <id> [title] [desc]    Update an existing task
   complete <id>                 Mark a task as completed
   delete <id>                   Delete a task
-  list                          List all tasks
+  list [options]                List tasks
+      --pending | --done          Only pending / only completed tasks
+      --limit N --offset M        At most N tasks, skipping the first M
+      --count                     Only the totals
+  find [options] <terms>        Find tasks containing all terms (term* for prefixes)
+      --pending | --done          Only pending / only completed tasks
+      --limit N                   At most N tasks
   clear                         Clear all tasks
   help                          Show this help message
   exit/quit                     Exit the application
@@ -143,18 +992,22 @@ EXAMPLES:
   > complete 1
   > delete 1
   > list
+  > list --pending --limit 20 --offset 40
+  > find groc* milk --pending
   > clear
 
-Note: Data is stored in memory and will be lost when the app exits.
+Note: Without --data-dir, tasks are kept in memory and lost when the app exits.
 """
-        print(help_text)
+        self._print(help_text)
 
     def run(self) -> None:
         """Main application loop."""
-        print("\n" + "=" * 60)
-        print("Welcome to Todo CLI v1.0")
-        print("=" * 60)
-        print("Type 'help' for available commands or 'exit' to quit.\n")
+        self._print("\n" + "=" * 60)
+        self._print("Welcome to Todo CLI v1.0")
+        self._print("=" * 60)
+        if self.journal is not None:
+            self._print(f"Tasks are saved in {self.journal.data_dir} ({len(self.tasks)} loaded).")
+        self._print("Type 'help' for available commands or 'exit' to quit.\n")
 
         while True:
             try:
@@ -167,68 +1020,181 @@ Note: Data is stored in memory and will be lost when the app exits.
                 if not parts:
                     continue
 
-                command = parts[0].lower()
-                args = parts[1:]
-
-                if command in ['exit', 'quit']:
-                    print("Thank you for using Todo CLI. Goodbye!")
+                if not self.execute(parts):
+                    self._print("Thank you for using Todo CLI. Goodbye!")
                     break
-                elif command == 'help':
-                    self.print_help()
-                elif command == 'add':
-                    self.handle_add(args)
-                elif command == 'update':
-                    self.handle_update(args)
-                elif command == 'complete':
-                    self.handle_complete(args)
-                elif command == 'delete':
-                    self.handle_delete(args)
-                elif command == 'list':
-                    self.list_tasks()
-                elif command == 'clear':
-                    self.clear_tasks()
-                else:
-                    print(f"Unknown command: '{command}'. Type 'help' for available commands.")
 
-            except KeyboardInterrupt:
-                print("\n\nExiting Todo CLI. Goodbye!")
+            except (KeyboardInterrupt, EOFError):
+                self._print("\n\nExiting Todo CLI. Goodbye!")
                 break
             except Exception as e:
-                print(f"An error occurred: {e}")
+                self._print(f"An error occurred: {e}")
+
+    def execute(self, parts: List[str]) -> bool:
+        """Run one parsed command; returns False when it asks to exit."""
+        command = parts[0].lower()
+        args = parts[1:]
+
+        if command in ['exit', 'quit']:
+            return False
+        elif command == 'help':
+            self.print_help()
+        elif command == 'add':
+            self.handle_add(args)
+        elif command == 'update':
+            self.handle_update(args)
+        elif command == 'complete':
+            self.handle_complete(args)
+        elif command == 'delete':
+            self.handle_delete(args)
+        elif command == 'list':
+            self.handle_list(args)
+        elif command == 'find':
+            self.handle_find(args)
+        elif command == 'clear':
+            self.clear_tasks(confirm=self.interactive)
+        else:
+            self._error(f"Unknown command: '{command}'. Type 'help' for available commands.")
+        return True
+
+    def run_batch(self, lines: Iterable[str], errors: TextIO) -> Tuple[int, int]:
+        """
+        Run one command per line without prompting, stopping early only at exit/quit.
+        Blank lines and lines starting with '#' are skipped. Each failed line is reported
+        to `errors` with its line number. Returns (commands run, commands failed).
+        """
+        self.interactive = False
+        run = failed = 0
+        for lineno, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            run += 1
+            self.last_error = None
+            try:
+                parts = self.parse_input(line)
+                if parts and not self.execute(parts):
+                    break
+            except Exception as e:
+                self.last_error = f"An error occurred: {e}"
+            if self.last_error is not None:
+                failed += 1
+                errors.write(f"line {lineno}: {self.last_error}\n")
+        return run, failed
 
     def parse_input(self, user_input: str) -> List[str]:
-        """Parse user input handling quoted strings."""
+        """
+        Parse user input handling quoted strings. Quoted text is taken whole up to its
+        closing quote, and joins any unquoted text directly before it.
+        """
         parts = []
-        current = ""
-        in_quotes = False
-        quote_char = None
-
-        for char in user_input:
-            if char in ['"', "'"] and not in_quotes:
-                in_quotes = True
-                quote_char = char
-            elif char == quote_char and in_quotes:
-                in_quotes = False
-                quote_char = None
-                if current:
-                    parts.append(current)
-                    current = ""
-            elif char == ' ' and not in_quotes:
-                if current:
-                    parts.append(current)
-                    current = ""
+        pieces: List[str] = []  # of the current token, joined once it ends
+        pos = 0
+        end = len(user_input)
+
+        while pos < end:
+            char = user_input[pos]
+            if char == ' ':
+                if pieces:
+                    parts.append("".join(pieces))
+                    pieces = []
+                pos += 1
+            elif char in '"\'':
+                close = user_input.find(char, pos + 1)
+                if close == -1:
+                    # Unterminated: the quote runs to the end of the input
+                    pieces.append(user_input[pos + 1:])
+                    break
+                pieces.append(user_input[pos + 1:close])
+                token = "".join(pieces)
+                if token:
+                    parts.append(token)
+                pieces = []
+                pos = close + 1
             else:
-                current += char
+                match = _PLAIN_RUN.match(user_input, pos)
+                pieces.append(match.group())
+                pos = match.end()
 
-        if current:
-            parts.append(current)
+        token = "".join(pieces)
+        if token:
+            parts.append(token)
 
         return parts
 
+    def handle_list(self, args: List[str]) -> None:
+        """Handle the list command."""
+        usage = "Usage: list [--pending | --done] [--limit N] [--offset N] [--count]"
+        completed: Optional[bool] = None
+        limit: Optional[int] = None
+        offset = 0
+        count_only = False
+
+        options = iter(args)
+        for option in options:
+            name, _, value = option.partition("=")
+            if name in ("--pending", "--done") and not value:
+                wanted = name == "--done"
+                if completed is not None and completed != wanted:
+                    self._error(f"Error: --pending and --done cannot be combined. {usage}")
+                    return
+                completed = wanted
+            elif name == "--count" and not value:
+                count_only = True
+            elif name in ("--limit", "--offset"):
+                if not value:
+                    value = next(options, "")
+                if not value.isdigit():
+                    self._error(f"Error: {name} needs a non-negative number. {usage}")
+                    return
+                if name == "--limit":
+                    limit = int(value)
+                else:
+                    offset = int(value)
+            else:
+                self._error(f"Error: Unknown option '{option}'. {usage}")
+                return
+
+        self.list_tasks(completed, limit, offset, count_only)
+
+    def handle_find(self, args: List[str]) -> None:
+        """Handle the find command."""
+        usage = "Usage: find [--pending | --done] [--limit N] <terms>"
+        completed: Optional[bool] = None
+        limit: Optional[int] = None
+        terms = []
+
+        options = iter(args)
+        for option in options:
+            name, _, value = option.partition("=")
+            if name in ("--pending", "--done") and not value:
+                wanted = name == "--done"
+                if completed is not None and completed != wanted:
+                    self._error(f"Error: --pending and --done cannot be combined. {usage}")
+                    return
+                completed = wanted
+            elif name == "--limit":
+                if not value:
+                    value = next(options, "")
+                if not value.isdigit():
+                    self._error(f"Error: --limit needs a non-negative number. {usage}")
+                    return
+                limit = int(value)
+            elif option.startswith("--"):
+                self._error(f"Error: Unknown option '{option}'. {usage}")
+                return
+            else:
+                terms.append(option)
+
+        if not any(_words(term) for term in terms):
+            self._error(f"Error: Search terms are required. {usage}")
+            return
+        self.find_tasks(terms, completed, limit)
+
     def handle_add(self, args: List[str]) -> None:
         """Handle the add command."""
         if not args:
-            print("Error: Title is required. Usage: add <title> [description]")
+            self._error("Error: Title is required. Usage: add <title> [description]")
             return
 
         title = args[0]
@@ -238,13 +1204,13 @@ Note: Data is stored in memory and will be lost when the app exits.
     def handle_update(self, args: List[str]) -> None:
         """Handle the update command."""
         if not args:
-            print("Error: Task ID is required. Usage: update <id> [title] [description]")
+            self._error("Error: Task ID is required. Usage: update <id> [title] [description]")
             return
 
         try:
             task_id = int(args[0])
         except ValueError:
-            print("Error: Task ID must be a number.")
+            self._error("Error: Task ID must be a number.")
             return
 
         title = args[1] if len(args) > 1 else None
@@ -254,13 +1220,13 @@ Note: Data is stored in memory and will be lost when the app exits.
     def handle_complete(self, args: List[str]) -> None:
         """Handle the complete command."""
         if not args:
-            print("Error: Task ID is required. Usage: complete <id>")
+            self._error("Error: Task ID is required. Usage: complete <id>")
             return
 
         try:
             task_id = int(args[0])
         except ValueError:
-            print("Error: Task ID must be a number.")
+            self._error("Error: Task ID must be a number.")
             return
 
         self.complete_task(task_id)
@@ -268,23 +1234,97 @@ Note: Data is stored in memory and will be lost when the app exits.
     def handle_delete(self, args: List[str]) -> None:
         """Handle the delete command."""
         if not args:
-            print("Error: Task ID is required. Usage: delete <id>")
+            self._error("Error: Task ID is required. Usage: delete <id>")
             return
 
         try:
             task_id = int(args[0])
         except ValueError:
-            print("Error: Task ID must be a number.")
+            self._error("Error: Task ID must be a number.")
             return
 
         self.delete_task(task_id)
 
 
-def main():
+def _buffered(stream: TextIO) -> TextIO:
+    """A writer over `stream`'s file descriptor with a large buffer; `stream` itself if it has none."""
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return stream
+    stream.flush()
+    return open(fd, "w", encoding="utf-8", buffering=BATCH_OUTPUT_BUFFER, closefd=False)
+
+
+def run_batch(app: TodoCLI, path: str) -> int:
+    """Run the commands in `path` ('-' for stdin); returns the process exit status."""
+    try:
+        source = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    except OSError as e:
+        print(f"Error: Cannot read {path}: {e}", file=sys.stderr)
+        return 1
+    out = _buffered(sys.stdout)
+    errors = _buffered(sys.stderr)
+    app.out = out
+    try:
+        run, failed = app.run_batch(source, errors)
+        out.write(f"Batch finished: {run} command(s), {failed} failed | Total: {len(app.tasks)} task(s)\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        errors.flush()
+        out.flush()
+    return 1 if failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     """Entry point for the Todo CLI application."""
-    app = TodoCLI()
-    app.run()
+    parser = argparse.ArgumentParser(description="A command-line based Todo application.")
+    parser.add_argument(
+        "--data-dir",
+        default=os.environ.get("TODO_DATA_DIR"),
+        help="Directory to keep tasks in across runs (default: TODO_DATA_DIR; in memory when unset)",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Run the commands in FILE ('-' for stdin), one per line, then exit; "
+             "exits with status 1 if any command failed",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="With --batch, print only failed lines and the final summary",
+    )
+    parser.add_argument(
+        "--store",
+        choices=sorted(STORES),
+        default="records",
+        help="How tasks are held in memory: one Task record per task (default), or columnar "
+             "arrays, which take about a fifth of the memory but make lookups, edits and "
+             "completions about 5x slower; use columnar only for very large lists",
+    )
+    args = parser.parse_args(argv)
+    if args.quiet and not args.batch:
+        parser.error("--quiet requires --batch")
+
+    journal = TaskJournal(args.data_dir) if args.data_dir else None
+    try:
+        app = TodoCLI(journal, quiet=args.quiet, store=STORES[args.store]())
+    except (OSError, JournalError) as e:
+        print(f"Error: Cannot open data directory: {e}", file=sys.stderr)
+        if journal is not None:
+            journal.close()
+        return 1
+    try:
+        if args.batch:
+            return run_batch(app, args.batch)
+        app.run()
+    finally:
+        if journal is not None:
+            journal.close()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())